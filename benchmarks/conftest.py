@@ -0,0 +1,109 @@
+import tracemalloc
+
+import pytest
+
+from benchmarks.fakes import FakeEarthEngine, FakeGFMServer
+from eo_floods import cache
+from eo_floods.providers.GFM import aoi, tokens
+
+RESULTS = []
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--ee-latency",
+        type=float,
+        default=0.0,
+        help="latency in seconds of every fake Earth Engine round trip",
+    )
+    parser.addoption(
+        "--gfm-latency",
+        type=float,
+        default=0.0,
+        help="latency in seconds of every request to the fake GFM server",
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_metadata_cache():
+    cache.set_cache(None)
+    yield
+    cache.set_cache(None)
+
+
+@pytest.fixture
+def fake_ee(request):
+    fake = FakeEarthEngine(latency=request.config.getoption("--ee-latency"))
+    fake.install()
+    yield fake
+    fake.uninstall()
+
+
+@pytest.fixture
+def gfm_server(request, monkeypatch):
+    server = FakeGFMServer(latency=request.config.getoption("--gfm-latency"))
+    server.start()
+    monkeypatch.setenv("GFM_API_URL", server.url)
+    tokens.set_token_store(tokens.TokenStore())
+    aoi._registries.clear()
+    yield server
+    tokens.set_token_store(None)
+    aoi._registries.clear()
+    server.stop()
+
+
+@pytest.fixture
+def measure(request, benchmark):
+    """Benchmark a workflow and report its wall time, round trips and peak memory.
+
+    The wall time is measured by pytest-benchmark. The round trips and the peak memory are
+    measured in a separate run, as tracemalloc slows down the workflow.
+    """
+    fakes = [
+        request.getfixturevalue(name)
+        for name in ["fake_ee", "gfm_server"]
+        if name in request.fixturenames
+    ]
+
+    def _measure(workflow, setup=None, rounds=5):
+        # warm up, so that imports and other one-time costs are not measured
+        workflow(*(setup() if setup else ()))
+        args = setup() if setup else ()
+        for fake in fakes:
+            fake.reset()
+        tracemalloc.start()
+        workflow(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        round_trips = {type(fake).__name__: dict(fake.calls) for fake in fakes}
+
+        benchmark.pedantic(
+            workflow,
+            setup=(lambda: (setup(), {})) if setup else None,
+            rounds=rounds,
+            iterations=1,
+        )
+        benchmark.extra_info["round_trips"] = round_trips
+        benchmark.extra_info["peak_memory_mb"] = round(peak / 2**20, 2)
+        RESULTS.append(
+            (
+                request.node.name,
+                sum(sum(calls.values()) for calls in round_trips.values()),
+                benchmark.stats.stats.mean if benchmark.stats else float("nan"),
+                peak / 2**20,
+            ),
+        )
+        return round_trips
+
+    return _measure
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section("eo_floods workflows")
+    terminalreporter.write_line(
+        f"{'workflow':<45} {'round trips':>12} {'mean (s)':>10} {'peak (MB)':>10}",
+    )
+    for name, round_trips, mean, peak in RESULTS:
+        terminalreporter.write_line(f"{name:<45} {round_trips:>12} {mean:>10.4f} {peak:>10.2f}")
@@ -0,0 +1,227 @@
+"""Local stand-ins for Earth Engine and the GFM API with configurable latency."""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+import ee
+from ee import apitestcase
+
+START = datetime(2022, 10, 1)
+EE_FUNCTIONS = [
+    "computeValue",
+    "computePixels",
+    "getMapId",
+    "getDownloadId",
+    "exportImage",
+    "exportTable",
+    "getOperation",
+]
+
+
+class FakeEarthEngine:
+    """Fake Earth Engine client.
+
+    The client is initialized with the algorithm definitions shipped with earthengine-api, so
+    expressions are built exactly like with the real client. Every round trip sleeps for
+    `latency` seconds and is answered with a plausible value based on the function at the
+    top of the expression.
+    """
+
+    def __init__(self, latency: float = 0.0, n_images: int = 5) -> None:
+        self.latency = latency
+        self.n_images = n_images
+        self.calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._originals: dict[str, Any] = {}
+
+    def install(self) -> None:
+        ee.Reset()
+        self._originals = {name: getattr(ee.data, name) for name in EE_FUNCTIONS}
+        self._originals["getAlgorithms"] = ee.data.getAlgorithms
+        self._originals["_install_cloud_api_resource"] = ee.data._install_cloud_api_resource
+        self._originals["_FetchDataCatalogStac"] = ee.deprecation._FetchDataCatalogStac
+        ee.data._install_cloud_api_resource = lambda: None
+        ee.data.getAlgorithms = apitestcase.GetAlgorithms
+        ee.deprecation._FetchDataCatalogStac = dict
+        ee.data.computeValue = self.compute_value
+        ee.data.computePixels = self._round_trip("computePixels", b"")
+        ee.data.getMapId = self.get_map_id
+        ee.data.getDownloadId = self._round_trip("getDownloadId", {"docid": "1", "token": "2"})
+        ee.data.exportImage = self.export
+        ee.data.exportTable = self.export
+        ee.data.getOperation = self.get_operation
+        ee.Initialize(None, "", project="eo-floods-benchmark")
+
+    def uninstall(self) -> None:
+        for name in EE_FUNCTIONS + ["getAlgorithms", "_install_cloud_api_resource"]:
+            setattr(ee.data, name, self._originals[name])
+        ee.deprecation._FetchDataCatalogStac = self._originals["_FetchDataCatalogStac"]
+        ee.Reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.calls.values())
+
+    def compute_value(self, obj: ee.ComputedObject) -> Any:
+        self._wait("computeValue")
+        return self._evaluate(obj)
+
+    def get_map_id(self, params: dict) -> dict:
+        self._wait("getMapId")
+        return {
+            "mapid": "fake",
+            "token": "",
+            "tile_fetcher": ee.data.TileFetcher("http://127.0.0.1/{z}/{x}/{y}", map_name="fake"),
+        }
+
+    def export(self, request_id: str, params: dict) -> dict:
+        self._wait("export")
+        return {"name": f"projects/eo-floods-benchmark/operations/{request_id}"}
+
+    def get_operation(self, name: str) -> dict:
+        self._wait("getOperation")
+        return {"name": name, "metadata": {"state": "SUCCEEDED"}, "done": True}
+
+    def _round_trip(self, name: str, value: Any) -> Any:
+        def func(*args: Any, **kwargs: Any) -> Any:
+            self._wait(name)
+            return value
+
+        return func
+
+    def _wait(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _evaluate(self, obj: Any) -> Any:
+        dictionary = getattr(obj, "_dictionary", None)
+        if isinstance(dictionary, dict):
+            return {key: self._evaluate(value) for key, value in dictionary.items()}
+        func = getattr(obj, "func", None)
+        name = func.getSignature()["name"] if hasattr(func, "getSignature") else None
+        dates = [START + timedelta(days=i) for i in range(self.n_images)]
+        if name == "Collection.size":
+            return self.n_images
+        if name == "List.map":
+            return [date.strftime("%Y-%m-%d %H:%M:%S.000") for date in dates]
+        if name == "AggregateFeatureCollection.array":
+            return [90.0] * self.n_images
+        if name == "Dictionary.select":
+            return {"all": -15.0}
+        if name == "Dictionary.get":
+            return [
+                [f"image_{i}", int((date - datetime(1970, 1, 1)).total_seconds() * 1000)]
+                for i, date in enumerate(dates)
+            ]
+        return None
+
+
+class FakeGFMServer:
+    """Local HTTP server implementing the GFM API endpoints used by eo_floods."""
+
+    def __init__(self, latency: float = 0.0, n_products: int = 5) -> None:
+        self.latency = latency
+        self.n_products = n_products
+        self.calls: Counter[str] = Counter()
+        self.aois: dict[str, str] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2/"
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.calls.values())
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self) -> None:
+        self.calls.clear()
+
+    def respond(self, method: str, path: str, body: dict) -> tuple[int, dict]:
+        query = dict(parse_qsl(urlsplit(path).query))
+        path = re.sub("/+", "/", path.split("?")[0]).removeprefix("/v2")
+        if method == "POST" and path == "/auth/login":
+            return 200, {"access_token": "token", "client_id": "client"}
+        if method == "POST" and path == "/aoi/create":
+            aoi_id = self.aois.setdefault(body["aoi_name"], f"aoi_{len(self.aois)}")
+            return 201, {"aoi_id": aoi_id}
+        if method == "GET" and re.fullmatch("/aoi/user/[^/]+", path):
+            aois = [{"aoi_name": name, "aoi_id": aoi_id} for name, aoi_id in self.aois.items()]
+            return 200, {"aois": aois}
+        if method == "DELETE" and path.startswith("/aoi/delete/id/"):
+            aoi_id = path.split("/")[-1]
+            self.aois = {name: id_ for name, id_ in self.aois.items() if id_ != aoi_id}
+            return 200, {}
+        if method == "GET" and re.fullmatch("/aoi/[^/]+/products", path):
+            products = [
+                {
+                    "product_id": f"product_{i}",
+                    "product_time": (START + timedelta(days=i)).strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+                for i in range(self.n_products)
+            ]
+            products = [
+                product
+                for product in products
+                if query.get("from", "") <= product["product_time"] <= query.get("to", "9999")
+            ]
+            return 200, {"products": products}
+        if method == "GET" and path.startswith("/download/product/"):
+            return 200, {"download_link": f"http://127.0.0.1/{path.split('/')[3]}.zip"}
+        return 404, {"detail": "Not found"}
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                self._respond("GET")
+
+            def do_POST(self) -> None:
+                self._respond("POST")
+
+            def do_DELETE(self) -> None:
+                self._respond("DELETE")
+
+            def _respond(self, method: str) -> None:
+                server.calls[method] += 1
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if server.latency:
+                    time.sleep(server.latency)
+                status, body = server.respond(method, self.path, body)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,16 @@
+import numpy as np
+
+from eo_floods.providers.hydrafloods.edge_otsu import EdgeOtsuEngine, EdgeOtsuParams
+
+
+def sar_stack(n_scenes=32, size=256):
+    rng = np.random.default_rng(0)
+    stack = -8 + rng.normal(0, 1.5, (n_scenes, size, size)).astype(np.float32)
+    stack[:, size // 4 : size // 2, size // 4 :] -= 14
+    return stack
+
+
+def test_edge_otsu_stack(measure):
+    stack = sar_stack()
+    engine = EdgeOtsuEngine(EdgeOtsuParams(invert=True, initial_threshold=-16), pixel_size=10)
+    measure(lambda: engine.classify(stack), rounds=3)
@@ -0,0 +1,72 @@
+import getpass
+
+from eo_floods.batch import FloodMapBatch
+from eo_floods.floodmap import FloodMap
+
+BBOX = [67.740187, 27.712453, 68.104933, 28.000935]
+
+
+def hydrafloods_floodmap(datasets=None):
+    return FloodMap(
+        start_date="2022-10-01",
+        end_date="2022-10-15",
+        provider="Hydrafloods",
+        geometry=BBOX,
+        datasets=datasets,
+    )
+
+
+def test_floodmap_init_all_datasets(fake_ee, measure):
+    measure(hydrafloods_floodmap)
+
+
+def test_floodmap_available_data_all_datasets(fake_ee, measure):
+    round_trips = measure(
+        lambda floodmap: floodmap.available_data(),
+        setup=lambda: (hydrafloods_floodmap(),),
+    )
+    assert round_trips["FakeEarthEngine"] == {"computeValue": 1}
+
+
+def test_floodmap_workflow(fake_ee, measure, tmp_path):
+    def workflow():
+        floodmap = hydrafloods_floodmap(["Sentinel-1", "Sentinel-2"])
+        floodmap.available_data()
+        floodmap.select_data(dates=["2022-10-01", "2022-10-02"])
+        floodmap.provider._generate_flood_extents()
+        return floodmap.metrics()
+
+    measure(workflow)
+
+
+def test_floodmap_batch_available_data(fake_ee, measure):
+    events = [
+        {
+            "start_date": "2022-10-01",
+            "end_date": "2022-10-15",
+            "geometry": [BBOX[0] + i * 0.1, BBOX[1], BBOX[2] + i * 0.1, BBOX[3]],
+            "datasets": ["Sentinel-1", "Sentinel-2"],
+        }
+        for i in range(20)
+    ]
+    round_trips = measure(lambda: FloodMapBatch(events).available_data())
+    assert round_trips["FakeEarthEngine"] == {"computeValue": 1}
+
+
+def test_floodmap_gfm(gfm_server, measure, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt: "user@example.com")
+    monkeypatch.setattr(getpass, "getpass", lambda prompt: "password")
+
+    def workflow():
+        floodmap = FloodMap(
+            start_date="2022-10-01",
+            end_date="2022-10-15",
+            provider="GFM",
+            geometry=BBOX,
+        )
+        floodmap.available_data()
+        floodmap.export_data()
+
+    round_trips = measure(workflow)
+    # the access token and the AOI of the warm-up run are reused
+    assert round_trips["FakeGFMServer"] == {"GET": 1 + gfm_server.n_products}
@@ -0,0 +1,25 @@
+from eo_floods.providers.GFM.gfm import GFM
+
+BBOX = [67.740187, 27.712453, 68.104933, 28.000935]
+
+
+def gfm_provider():
+    return GFM(
+        start_date="2022-10-01",
+        end_date="2022-10-15",
+        geometry=BBOX,
+        email="user@example.com",
+        pwd="password",
+    )
+
+
+def test_gfm_init(gfm_server, measure):
+    round_trips = measure(gfm_provider)
+    # the access token and the AOI of the warm-up run are reused
+    assert round_trips["FakeGFMServer"] == {"GET": 1}
+    assert len(gfm_server.aois) == 1
+
+
+def test_gfm_export_data(gfm_server, measure):
+    round_trips = measure(lambda provider: provider.export_data(), setup=lambda: (gfm_provider(),))
+    assert round_trips["FakeGFMServer"] == {"GET": gfm_server.n_products}
@@ -0,0 +1,98 @@
+from eo_floods import cache
+from eo_floods.providers.hydrafloods.dataset import DATASETS
+from eo_floods.providers.hydrafloods.export import ExportScheduler
+from eo_floods.providers.hydrafloods.hydrafloods import HydraFloods
+from eo_floods.providers.hydrafloods.monitor import WatermarkStore, watermark_key
+
+BBOX = [67.740187, 27.712453, 68.104933, 28.000935]
+
+
+def hydrafloods_provider(datasets=("Sentinel-1", "Sentinel-2", "Landsat 8")):
+    return HydraFloods(
+        datasets=[DATASETS[name] for name in datasets],
+        start_date="2022-10-01",
+        end_date="2022-10-15",
+        geometry=BBOX,
+    )
+
+
+def test_hydrafloods_init(fake_ee, measure):
+    round_trips = measure(hydrafloods_provider)
+    assert round_trips["FakeEarthEngine"] == {}
+
+
+def test_hydrafloods_available_data(fake_ee, measure):
+    round_trips = measure(
+        lambda provider: provider.available_data(),
+        setup=lambda: (hydrafloods_provider(),),
+    )
+    assert round_trips["FakeEarthEngine"] == {"computeValue": 1}
+
+
+def test_hydrafloods_select_data(fake_ee, measure):
+    measure(
+        lambda provider: provider.select_data(dates=["2022-10-01", "2022-10-03", "2022-10-04"]),
+        setup=lambda: (hydrafloods_provider(),),
+    )
+
+
+def test_hydrafloods_generate_flood_extents(fake_ee, measure):
+    measure(
+        lambda provider: provider._generate_flood_extents(),
+        setup=lambda: (hydrafloods_provider(),),
+    )
+
+
+def test_hydrafloods_generate_flood_extents_collection_threshold(fake_ee, measure):
+    round_trips = measure(
+        lambda provider: provider._generate_flood_extents(threshold_mode="collection"),
+        setup=lambda: (hydrafloods_provider(["Sentinel-1"]),),
+    )
+    # only the image count is requested
+    assert round_trips["FakeEarthEngine"] == {"computeValue": 1}
+
+
+def test_hydrafloods_cached_thresholds(fake_ee, measure, tmp_path):
+    cache.set_cache(cache.MetadataCache(tmp_path / "metadata.sqlite"))
+    # the warm up run computes the threshold, the measured runs take it from the cache
+    round_trips = measure(
+        lambda provider: provider._generate_flood_extents(
+            threshold_mode="collection",
+            cache_thresholds=True,
+        ),
+        setup=lambda: (hydrafloods_provider(["Sentinel-1"]),),
+    )
+    # only the image count is requested
+    assert round_trips["FakeEarthEngine"] == {"computeValue": 1}
+    assert len(cache.get_cache()) == 1
+
+
+def test_hydrafloods_export_to_drive(fake_ee, measure, tmp_path):
+    def setup():
+        provider = hydrafloods_provider(["Sentinel-1"])
+        provider._generate_flood_extents()
+        scheduler = ExportScheduler(max_running=10, poll_interval=0.01)
+        return provider, scheduler
+
+    def export(provider, scheduler):
+        provider.export_data(export_type="toDrive", scheduler=scheduler, wait=True)
+
+    round_trips = measure(export, setup=setup)
+    assert round_trips["FakeEarthEngine"]["export"] == fake_ee.n_images
+
+
+def test_hydrafloods_update_monitor(fake_ee, measure, tmp_path):
+    store = WatermarkStore(tmp_path / "watermarks.json")
+
+    def setup():
+        store.invalidate()
+        scheduler = ExportScheduler(max_running=10, poll_interval=0.01)
+        return hydrafloods_provider(["Sentinel-1"]), scheduler
+
+    def update(provider, scheduler):
+        provider.update_monitor("projects/p/assets/monitor", store=store, scheduler=scheduler)
+
+    round_trips = measure(update, setup=setup)
+    # the aggregates of all new scenes are exported as one asset
+    assert round_trips["FakeEarthEngine"]["export"] == 1
+    assert store.get(watermark_key("Sentinel-1", BBOX)).n_scenes == fake_ee.n_images
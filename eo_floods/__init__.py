@@ -1,10 +1,32 @@
 """An easy to use interface for deriving flood maps from earth observation data."""
 
-from dotenv import load_dotenv
+from __future__ import annotations
+
+import importlib
+from typing import Any
 
-from eo_floods.floodmap import FloodMap
+from dotenv import load_dotenv
 
 load_dotenv()
 
 __version__ = "2023.12"
-__all__ = ["FloodMap"]
+__all__ = ["AsyncFloodMap", "FloodMap", "FloodMapBatch"]
+
+# The public classes are imported on first access, so importing eo_floods does not load
+# Earth Engine, the providers or the notebook widget stack.
+_LAZY_IMPORTS = {
+    "AsyncFloodMap": "eo_floods.aio",
+    "FloodMap": "eo_floods.floodmap",
+    "FloodMapBatch": "eo_floods.batch",
+}
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    err_msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(err_msg)
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_IMPORTS])
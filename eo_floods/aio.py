@@ -0,0 +1,231 @@
+"""Asyncio interface for flood maps in EO-Floods."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import ee
+
+from eo_floods.floodmap import FloodMap
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import geemap.foliumap as geemap
+    import ipyleaflet
+
+    from eo_floods.providers.hydrafloods.metadata import AvailableData
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool shared by all async flood maps."""
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="eo_floods")
+    return _executor
+
+
+async def run_blocking(
+    func: Callable[..., T],
+    *args: Any,  # noqa: ANN401
+    deadline: float | None = None,
+    executor: Executor | None = None,
+    **kwargs: Any,  # noqa: ANN401
+) -> T:
+    """Run a blocking call in a thread pool and await its result.
+
+    The deadline is applied with asyncio.wait_for. Cancelling the coroutine or passing the
+    deadline does not stop the call, it keeps running in its thread and its result is
+    dropped.
+
+    Parameters
+    ----------
+    func : Callable
+        the blocking function
+    args : Any
+        positional arguments of the function
+    deadline : float, optional
+        deadline in seconds, a TimeoutError is raised when it passes, by default None
+    executor : Executor, optional
+        executor to run the call in, by default the shared thread pool
+    kwargs : Any
+        keyword arguments of the function
+
+    Returns
+    -------
+    T
+        the result of the function
+
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor or get_executor(), partial(func, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout=deadline)
+    except asyncio.TimeoutError as exc:  # noqa: UP041
+        err_msg = f"{getattr(func, '__name__', func)} did not finish within {deadline} seconds"
+        raise TimeoutError(err_msg) from exc
+
+
+async def evaluate(
+    ee_object: ee.ComputedObject,
+    deadline: float | None = None,
+) -> Any:  # noqa: ANN401
+    """Evaluate an Earth Engine object without blocking the event loop.
+
+    Parameters
+    ----------
+    ee_object : ee.ComputedObject
+        the object to evaluate
+    deadline : float, optional
+        deadline in seconds, by default None
+
+    Returns
+    -------
+    Any
+        the evaluated value
+
+    """
+    return await run_blocking(ee.data.computeValue, ee_object, deadline=deadline)
+
+
+class AsyncFloodMap:
+    """Asyncio interface to a FloodMap.
+
+    Every method runs the blocking FloodMap method as a single call in a shared thread
+    pool, so many flood maps can be processed concurrently from one event loop. Every method
+    accepts a deadline, applied once to that call. Cancelling or timing out a method does
+    not stop the underlying Earth Engine or GFM requests: the FloodMap method keeps running
+    in its thread until it finishes, only its result is dropped.
+    """
+
+    def __init__(self, floodmap: FloodMap, deadline: float | None = None) -> None:
+        """Wrap a FloodMap object.
+
+        Parameters
+        ----------
+        floodmap : FloodMap
+            the flood map to wrap
+        deadline : float, optional
+            default deadline in seconds for every method, by default None
+
+        """
+        self.floodmap = floodmap
+        self.deadline = deadline
+
+    @classmethod
+    async def create(
+        cls,
+        *args: Any,  # noqa: ANN401
+        deadline: float | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> AsyncFloodMap:
+        """Create a FloodMap without blocking the event loop.
+
+        Parameters
+        ----------
+        args : Any
+            positional arguments of FloodMap
+        deadline : float, optional
+            default deadline in seconds for every method, by default None
+        kwargs : Any
+            keyword arguments of FloodMap
+
+        Returns
+        -------
+        AsyncFloodMap
+            the wrapped flood map
+
+        """
+        floodmap = await run_blocking(FloodMap, *args, deadline=deadline, **kwargs)
+        return cls(floodmap, deadline=deadline)
+
+    async def available_data(
+        self,
+        deadline: float | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> AvailableData | None:
+        """Async version of FloodMap.available_data."""
+        return await self._run(self.floodmap.available_data, deadline=deadline, **kwargs)
+
+    async def select_data(
+        self,
+        dates: list[str] | str | None = None,
+        datasets: list[str] | None = None,
+        deadline: float | None = None,
+    ) -> None:
+        """Async version of FloodMap.select_data."""
+        await self._run(
+            self.floodmap.select_data,
+            dates=dates,
+            datasets=datasets,
+            deadline=deadline,
+        )
+
+    async def preview_data(
+        self,
+        deadline: float | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> geemap.Map | None:
+        """Async version of FloodMap.preview_data."""
+        return await self._run(self.floodmap.preview_data, deadline=deadline, **kwargs)
+
+    async def view_flood_extents(
+        self,
+        deadline: float | None = None,
+        zoom: int = 8,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> geemap.Map | ipyleaflet.Map:
+        """Async version of FloodMap.view_flood_extents.
+
+        The deadline applies to generating and plotting the flood extents together, the
+        timeout of FloodMap.view_flood_extents is not used. Cancellation does not stop the
+        underlying requests: when the deadline passes, the generation keeps running in its
+        thread. The flood extents it generates are stored on the provider as usual and
+        reused by the next call, only the map is dropped.
+        """
+        if self.floodmap.provider_name == "GFM":
+            return await self._run(self.floodmap.view_flood_extents, deadline=deadline)
+        try:
+            return await self._run(
+                self.floodmap.view_flood_extents,
+                timeout=None,
+                zoom=zoom,
+                deadline=deadline,
+                **kwargs,
+            )
+        except TimeoutError as exc:
+            err_msg = (
+                "Plotting flood extents has timed out, increase the time out"
+                " threshold or plot a smaller selection of your data"
+            )
+            raise TimeoutError(err_msg) from exc
+
+    async def export_data(
+        self,
+        deadline: float | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        """Async version of FloodMap.export_data."""
+        return await self._run(self.floodmap.export_data, deadline=deadline, **kwargs)
+
+    async def _run(
+        self,
+        func: Callable[..., T],
+        *args: Any,  # noqa: ANN401
+        deadline: float | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> T:
+        return await run_blocking(func, *args, deadline=self._deadline(deadline), **kwargs)
+
+    def _deadline(self, deadline: float | None) -> float | None:
+        return deadline if deadline is not None else self.deadline
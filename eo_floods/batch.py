@@ -0,0 +1,221 @@
+"""Batch processing of multiple flood events."""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel, ConfigDict
+
+from eo_floods.floodmap import FloodMap
+from eo_floods.providers.hydrafloods.dataset import QualityScoreParams
+from eo_floods.providers.hydrafloods.metadata import fetch_metadata_batch
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from eo_floods.providers.hydrafloods.metadata import AvailableData
+
+log = logging.getLogger(__name__)
+
+
+class Event(BaseModel):
+    """A flood event to create a flood map for."""
+
+    start_date: str
+    end_date: str
+    geometry: list[float]
+    provider: str = "Hydrafloods"
+    datasets: list[str] | str | None = None
+    name: str | None = None
+
+
+class EventResult(BaseModel):
+    """Result of processing a single event."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    event: Event
+    floodmap: FloodMap | None = None
+    value: Any = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the event was processed without errors."""
+        return self.error is None
+
+
+class BatchResult(BaseModel):
+    """Results of processing all events of a batch."""
+
+    results: list[EventResult]
+
+    @property
+    def succeeded(self) -> list[EventResult]:
+        """Results of the events that were processed without errors."""
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> list[EventResult]:
+        """Results of the events that failed."""
+        return [result for result in self.results if not result.ok]
+
+
+class FloodMapBatch:
+    """Create and process flood maps for many flood events at once.
+
+    The events share the Earth Engine session and the metadata cache. Flood maps are
+    created and processed in a thread pool and metadata of all Hydrafloods events is
+    requested from Earth Engine together. An event that fails does not stop the others,
+    its error is kept in its EventResult.
+    """
+
+    def __init__(
+        self,
+        events: Iterable[Event | dict] | Any,  # noqa: ANN401
+        max_workers: int = 8,
+        chunk_size: int = 20,
+    ) -> None:
+        """Instantiate a FloodMapBatch.
+
+        Parameters
+        ----------
+        events : Iterable[Event | dict] or pandas.DataFrame
+            the events, as Event objects, dictionaries or rows of a DataFrame with the columns
+            start_date, end_date, geometry and optionally provider, datasets and name
+        max_workers : int, optional
+            number of events processed at the same time, by default 8
+        chunk_size : int, optional
+            maximum number of events whose metadata is requested in one Earth Engine request,
+            by default 20
+
+        """
+        if hasattr(events, "to_dict"):
+            events = events.to_dict("records")
+        self.events = [event if isinstance(event, Event) else Event(**event) for event in events]
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.results: list[EventResult] = []
+
+    def run(self) -> BatchResult:
+        """Create the flood maps of all events.
+
+        Returns
+        -------
+        BatchResult
+            a result for every event, with the flood map or the error
+
+        """
+        log.info("Creating flood maps for %s events", len(self.events))
+        self.results = self._map(self.events, _create_floodmap)
+        n_failed = len([result for result in self.results if not result.ok])
+        log.info("Created flood maps for %s events, %s failed", len(self.events), n_failed)
+        return BatchResult(results=self.results)
+
+    def map(self, func: Callable[[FloodMap], Any]) -> BatchResult:
+        """Apply a function to the flood map of every event.
+
+        Parameters
+        ----------
+        func : Callable[[FloodMap], Any]
+            function that is called with the flood map of an event, its return value is
+            stored as the value of the EventResult.
+
+        Returns
+        -------
+        BatchResult
+            a result for every event, with the return value or the error
+
+        """
+        if not self.results:
+            self.run()
+        results = self._map(self.results, lambda result: _apply_to_result(result, func))
+        return BatchResult(results=results)
+
+    def available_data(self, **kwargs: Any) -> BatchResult:  # noqa: ANN401
+        """Retrieve the available data of all events.
+
+        The metadata of the Hydrafloods events is requested from Earth Engine in batches of
+        chunk_size events. If a batched request fails, its events are requested separately
+        so that one bad event does not fail the others.
+
+        Parameters
+        ----------
+        kwargs : Any
+            keyword arguments passed to the available_data methods of the providers.
+
+        Returns
+        -------
+        BatchResult
+            a result for every event with the AvailableData as value, or the error
+
+        """
+        if not self.results:
+            self.run()
+        quality_params = kwargs.get("quality_params")
+        if isinstance(quality_params, dict):
+            quality_params = QualityScoreParams(**quality_params)
+        hydrafloods_results = [
+            result
+            for result in self.results
+            if result.ok and result.floodmap.provider_name == "Hydrafloods"
+        ]
+        batched: dict[int, AvailableData] = {}
+        for i in range(0, len(hydrafloods_results), self.chunk_size):
+            chunk = hydrafloods_results[i : i + self.chunk_size]
+            try:
+                available_data = fetch_metadata_batch(
+                    [result.floodmap.provider.datasets for result in chunk],
+                    quality_params,
+                )
+            except Exception:
+                log.exception("Batched metadata request failed, requesting events separately")
+                continue
+            batched.update(
+                {id(result): data for result, data in zip(chunk, available_data, strict=True)},
+            )
+
+        def _available_data(result: EventResult) -> EventResult:
+            if id(result) in batched:
+                log.info(batched[id(result)].to_table())
+                return EventResult(
+                    event=result.event,
+                    floodmap=result.floodmap,
+                    value=batched[id(result)],
+                )
+            return _apply_to_result(result, lambda floodmap: floodmap.available_data(**kwargs))
+
+        results = self._map(self.results, _available_data)
+        return BatchResult(results=results)
+
+    def _map(self, items: list, func: Callable[[Any], EventResult]) -> list[EventResult]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(func, items))
+
+
+def _create_floodmap(event: Event) -> EventResult:
+    try:
+        floodmap = FloodMap(
+            start_date=event.start_date,
+            end_date=event.end_date,
+            provider=event.provider,
+            geometry=event.geometry,
+            datasets=event.datasets,
+        )
+    except Exception as e:
+        log.exception("Creating a flood map for event %s failed", event.name or event)
+        return EventResult(event=event, error=repr(e))
+    return EventResult(event=event, floodmap=floodmap)
+
+
+def _apply_to_result(result: EventResult, func: Callable[[FloodMap], Any]) -> EventResult:
+    if not result.ok:
+        return result
+    try:
+        value = func(result.floodmap)
+    except Exception as e:
+        log.exception("Processing event %s failed", result.event.name or result.event)
+        return EventResult(event=result.event, floodmap=result.floodmap, error=repr(e))
+    return EventResult(event=result.event, floodmap=result.floodmap, value=value)
@@ -0,0 +1,209 @@
+"""On-disk cache for dataset metadata queries."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path("~/.cache/eo_floods").expanduser()
+# queries ending within this many days of today still get new products and scenes
+NEAR_REAL_TIME_DAYS = 1
+NEAR_REAL_TIME_MAX_AGE = 10 * 60
+
+
+def cache_key(  # noqa: PLR0913
+    provider: str,
+    dataset: str,
+    geometry: Any,  # noqa: ANN401
+    start_date: str,
+    end_date: str,
+    *,
+    filters: Any = None,  # noqa: ANN401
+) -> str:
+    """Create a cache key for a metadata query.
+
+    Parameters
+    ----------
+    provider : str
+        name of the provider
+    dataset : str
+        name of the dataset
+    geometry : Any
+        json serializable geometry of the query, e.g. a bounding box
+    start_date : str
+        start date of the query
+    end_date : str
+        end date of the query
+    filters : Any, optional
+        json serializable description of any other filters applied, by default None
+
+    Returns
+    -------
+    str
+        sha256 hash of the query parameters
+
+    """
+    query = {
+        "provider": provider,
+        "dataset": dataset,
+        "geometry": geometry,
+        "start_date": start_date,
+        "end_date": end_date,
+        "filters": filters,
+    }
+    return hashlib.sha256(json.dumps(query, sort_keys=True).encode()).hexdigest()
+
+
+def query_max_age(end_date: str) -> float | None:
+    """Return the maximum age in seconds of cached results of a query, None for the cache ttl.
+
+    Products and scenes are still added to a time window that ends today or in the last
+    NEAR_REAL_TIME_DAYS days, so its cached results are only reused for
+    NEAR_REAL_TIME_MAX_AGE seconds.
+    """
+    today = datetime.now(timezone.utc).date()  # noqa: UP017
+    if date.fromisoformat(end_date[:10]) >= today - timedelta(days=NEAR_REAL_TIME_DAYS):
+        return NEAR_REAL_TIME_MAX_AGE
+    return None
+
+
+class MetadataCache:
+    """SQLite backed cache with a time to live and least recently used eviction."""
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        ttl: float = 6 * 3600,
+        max_entries: int = 10_000,
+    ) -> None:
+        """Instantiate a MetadataCache.
+
+        Parameters
+        ----------
+        path : str or Path, optional
+            path of the SQLite database, by default ~/.cache/eo_floods/metadata.sqlite
+        ttl : float, optional
+            seconds an entry stays valid, by default 6 hours
+        max_entries : int, optional
+            maximum number of entries, the least recently used entries are removed first,
+            by default 10000
+
+        """
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "metadata.sqlite"
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)",
+            )
+
+    def get(self, key: str, max_age: float | None = None) -> Any | None:  # noqa: ANN401
+        """Get a value from the cache, returns None if the key is missing or expired.
+
+        Parameters
+        ----------
+        key : str
+            key of the entry
+        max_age : float, optional
+            maximum age in seconds of the entry, shorter than the ttl of the cache for
+            queries whose results change quickly, see query_max_age. By default the ttl
+
+        Returns
+        -------
+        Any or None
+            the cached value
+
+        """
+        now = time.time()
+        with self._lock, self._connect() as con:
+            row = con.execute(
+                "SELECT value, created FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if now - created > self.ttl:
+                con.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            if max_age is not None and now - created > max_age:
+                return None
+            con.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        log.debug("Cache hit for %s", key)
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:  # noqa: ANN401
+        """Store a json serializable value in the cache."""
+        now = time.time()
+        with self._lock, self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            con.execute(
+                "DELETE FROM entries WHERE key NOT IN "
+                "(SELECT key FROM entries ORDER BY accessed DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def invalidate(self, key: str | None = None) -> None:
+        """Remove a single entry, or all entries when no key is given."""
+        with self._lock, self._connect() as con:
+            if key is None:
+                con.execute("DELETE FROM entries")
+            else:
+                con.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def __len__(self) -> int:
+        """Return the number of entries in the cache."""
+        with self._lock, self._connect() as con:
+            return con.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+
+_cache: MetadataCache | None = None
+_cache_set = False
+
+
+def get_cache() -> MetadataCache | None:
+    """Return the metadata cache used by the providers, None when caching is disabled.
+
+    Caching can be disabled by setting the environment variable EO_FLOODS_CACHE=0 or by
+    calling set_cache(None).
+    """
+    global _cache  # noqa: PLW0603
+    if _cache is None and not _cache_set and os.environ.get("EO_FLOODS_CACHE", "1") != "0":
+        _cache = MetadataCache()
+    return _cache
+
+
+def set_cache(cache: MetadataCache | None) -> None:
+    """Set the metadata cache used by the providers, None disables caching."""
+    global _cache, _cache_set  # noqa: PLW0603
+    _cache = cache
+    _cache_set = True
@@ -2,37 +2,65 @@
 
 from __future__ import annotations
 
+import functools
 import logging
-import sys
 import warnings
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from eo_floods.providers import GFM, HydraFloods
+from eo_floods.metrics import Metrics, StageMetrics
 from eo_floods.providers.hydrafloods.dataset import DATASETS, Dataset
 from eo_floods.utils import dates_within_daterange, get_dates_in_time_range
 
 warnings.filterwarnings("ignore")
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
     import geemap.foliumap as geemap
     import ipyleaflet
 
-logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+    from eo_floods.batch import BatchResult
+    from eo_floods.metrics import CallRecord
+    from eo_floods.providers import GFM, HydraFloods
+    from eo_floods.providers.GFM.download import DownloadedProduct
+    from eo_floods.providers.hydrafloods.export import ExportScheduler
+    from eo_floods.providers.hydrafloods.metadata import AvailableData
+    from eo_floods.providers.hydrafloods.monitor import Watermark
+
 log = logging.getLogger(__name__)
 
 PROVIDERS = ["Hydrafloods", "GFM"]
 
+T = TypeVar("T")
+
+
+def _stage(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Record the round trips of a FloodMap method under a stage name."""
+
+    def decorator(method: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(method)
+        def wrapper(self: FloodMap, *args: Any, **kwargs: Any) -> T:  # noqa: ANN401
+            with self._metrics.stage(name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
 
 class FloodMap:
     """General API for flood maps in EO-Floods."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         start_date: str,
         end_date: str,
         provider: str,
         geometry: list[float],
         datasets: list[str] | str | None = None,
+        *,
+        metrics_hooks: list[Callable[[CallRecord], None]] | None = None,
     ) -> None:
         """Flood map object for creating and exporting flood maps.
 
@@ -51,6 +79,9 @@ class FloodMap:
             MODIS, and VIIRS. By default None
         provider : providers, optional
             The dataset provider, by default none
+        metrics_hooks : list[Callable[[CallRecord], None]], optional
+            functions called with every Earth Engine and HTTP round trip of the flood map,
+            e.g. to feed them into monitoring, by default None
 
         """
         self.start_date = start_date
@@ -61,22 +92,28 @@ class FloodMap:
         )
         self.geometry = geometry
         self.datasets = _instantiate_datasets(datasets)
-        if provider == "GFM":
-            self._provider = GFM(
-                start_date=start_date,
-                end_date=end_date,
-                geometry=geometry,
-            )
-        elif provider == "Hydrafloods":
-            self._provider = HydraFloods(
-                datasets=self.datasets,
-                start_date=start_date,
-                end_date=end_date,
-                geometry=geometry,
-            )
-        else:
-            err_msg = "Provider not given or recognized, choose from [GFM, Hydrafloods]"
-            raise ValueError(err_msg)
+        self._metrics = Metrics(hooks=metrics_hooks)
+        with self._metrics.stage("init"):
+            if provider == "GFM":
+                from eo_floods.providers.GFM.gfm import GFM  # noqa: PLC0415
+
+                self._provider = GFM(
+                    start_date=start_date,
+                    end_date=end_date,
+                    geometry=geometry,
+                )
+            elif provider == "Hydrafloods":
+                from eo_floods.providers.hydrafloods.hydrafloods import HydraFloods  # noqa: PLC0415
+
+                self._provider = HydraFloods(
+                    datasets=self.datasets,
+                    start_date=start_date,
+                    end_date=end_date,
+                    geometry=geometry,
+                )
+            else:
+                err_msg = "Provider not given or recognized, choose from [GFM, Hydrafloods]"
+                raise ValueError(err_msg)
         self.provider_name = provider
         log.info("Provider set as %s", provider)
         log.info("Flood map object initialized")
@@ -100,15 +137,76 @@ class FloodMap:
         """Property to fetch the provider object."""
         return self._provider
 
-    def available_data(self) -> None:
+    def metrics(self) -> dict[str, StageMetrics]:
+        """Earth Engine and HTTP round trips of the flood map, aggregated per stage.
+
+        The stages are init, available_data, select, generate, plot, export and monitor. The
+        individual calls, with their duration, expression size and call site, are stored in
+        `FloodMap.recorder.records`.
+
+        Returns
+        -------
+        dict[str, StageMetrics]
+            the number of calls, total wall time and total expression size per stage
+
+        """
+        return self._metrics.summary()
+
+    @property
+    def recorder(self) -> Metrics:
+        """The recorder of the round trips of the flood map."""
+        return self._metrics
+
+    @classmethod
+    def from_events(
+        cls,
+        events: Any,  # noqa: ANN401
+        max_workers: int = 8,
+    ) -> BatchResult:
+        """Create flood maps for multiple flood events.
+
+        Parameters
+        ----------
+        events : Iterable[Event | dict] or pandas.DataFrame
+            the events with the start_date, end_date, geometry and optionally provider,
+            datasets and name of every event.
+        max_workers : int, optional
+            number of flood maps created at the same time, by default 8
+
+        Returns
+        -------
+        BatchResult
+            a result for every event with the flood map, or the error when creating the flood
+            map failed. Use FloodMapBatch to process the flood maps further as a batch.
+
+        """
+        from eo_floods.batch import FloodMapBatch  # noqa: PLC0415
+
+        return FloodMapBatch(events, max_workers=max_workers).run()
+
+    @_stage("available_data")
+    def available_data(self, **kwargs: dict[str, Any]) -> AvailableData | None:
         """Print information of the selected datasets.
 
         The information contains the dataset name, the number
         of images, the timestamp of the images, and a quality score in percentage of the selected
             datasets.
+
+        Parameters
+        ----------
+        kwargs: dict,
+            keyword arguments passed to the available_data method of the provider, e.g.
+            quality_params for the Hydrafloods provider.
+
+        Returns
+        -------
+        AvailableData or None
+            For the Hydrafloods provider the metadata of the datasets is returned as well.
+
         """
-        self.provider.available_data()
+        return self.provider.available_data(**kwargs)
 
+    @_stage("plot")
     def preview_data(
         self,
         datasets: list[str] | str | None = None,
@@ -148,6 +246,10 @@ class FloodMap:
                 )
 
             if datasets:
+                from eo_floods.providers.hydrafloods.hydrafloods import (  # noqa: PLC0415
+                    HydraFloods,
+                )
+
                 self._provider = HydraFloods(
                     geometry=self.geometry,
                     datasets=_instantiate_datasets(datasets),
@@ -162,6 +264,7 @@ class FloodMap:
         log.warning("GFM does not support previewing data")
         return None
 
+    @_stage("select")
     def select_data(
         self,
         dates: list[str] | str | None = None,
@@ -191,17 +294,18 @@ class FloodMap:
         if self.provider_name == "GFM":
             self.provider.select_data(dates=dates)
 
+    @_stage("plot")
     def view_flood_extents(
         self,
-        timeout: int = 300,
+        timeout: float | None = 300,
         **kwargs: dict[Any],
     ) -> geemap.Map | ipyleaflet.Map:
         """Plot the generated flood extents on a map.
 
         Parameters
         ----------
-        timeout: int, optional
-            The time in seconds it takes to raise a timeout error
+        timeout: float, optional
+            The time in seconds it takes to raise a timeout error, None for no timeout
         kwargs: dict[Any]
             keyword arguments that are passed to the view_flood_extents HydraFloods method.
 
@@ -216,10 +320,45 @@ class FloodMap:
             return self.provider.view_data()
         return None
 
-    def export_data(self, **kwargs: dict) -> None:
-        """Export the flood data."""
+    @_stage("export")
+    def export_data(
+        self,
+        **kwargs: dict,
+    ) -> ExportScheduler | dict[str, Path] | list[DownloadedProduct] | None:
+        """Export the flood data.
+
+        Returns
+        -------
+        ExportScheduler, dict[str, Path], list[DownloadedProduct] or None
+            for Hydrafloods the scheduler of the export tasks, or the paths of the local
+            files by image name for "toLocal". For GFM the downloaded products, None when
+            there were no products to download
+
+        """
         return self.provider.export_data(**kwargs)
 
+    @_stage("monitor")
+    def update_monitor(self, asset_root: str, **kwargs: dict) -> dict[str, Watermark]:
+        """Process the scenes ingested since the previous run and update the aggregates.
+
+        Parameters
+        ----------
+        asset_root : str
+            Earth Engine folder to export the running aggregates to
+        kwargs : dict
+            keyword arguments that are passed to the update_monitor HydraFloods method
+
+        Returns
+        -------
+        dict[str, Watermark]
+            the watermarks after the run by dataset name
+
+        """
+        if self.provider_name != "Hydrafloods":
+            err_msg = "Incremental monitoring is only available for the Hydrafloods provider"
+            raise ValueError(err_msg)
+        return self.provider.update_monitor(asset_root, **kwargs)
+
 
 def _instantiate_datasets(datasets: list[str] | str) -> list[Dataset]:
     if isinstance(datasets, str):
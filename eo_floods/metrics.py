@@ -0,0 +1,287 @@
+"""Instrumentation of Earth Engine and HTTP round trips."""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import logging
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlparse
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    import requests
+
+log = logging.getLogger(__name__)
+
+# Earth Engine client functions that make a round trip to the server.
+EE_FUNCTIONS = [
+    "computeValue",
+    "computePixels",
+    "getMapId",
+    "getDownloadId",
+    "getThumbId",
+    "exportImage",
+    "exportTable",
+    "getTaskStatus",
+    "getOperation",
+]
+
+PACKAGE_DIR = Path(__file__).parent
+
+_active: contextvars.ContextVar[tuple[Metrics, str] | None] = contextvars.ContextVar(
+    "eo_floods_metrics",
+    default=None,
+)
+_hooks: list[Callable[[CallRecord], None]] = []
+_instrument_lock = threading.Lock()
+
+
+class CallRecord(BaseModel):
+    """A single round trip to Earth Engine or an HTTP API.
+
+    Attributes
+    ----------
+    kind : str
+        "ee" for Earth Engine calls, "http" for HTTP requests
+    name : str
+        name of the Earth Engine function, or the method and path of the request
+    stage : str
+        the FloodMap stage in which the call was made, e.g. "available_data"
+    start : float
+        unix timestamp of the start of the call
+    duration : float
+        wall time of the call in seconds
+    expression_size : int, optional
+        size in bytes of the serialized Earth Engine expression or the request body
+    call_site : str
+        file, line and function in eo_floods from which the call was made
+    error : str, optional
+        the error raised by the call, or the HTTP status of a failed request
+
+    """
+
+    kind: str
+    name: str
+    stage: str
+    start: float
+    duration: float
+    expression_size: int | None = None
+    call_site: str
+    error: str | None = None
+
+
+class StageMetrics(BaseModel):
+    """Aggregated round trips of a stage."""
+
+    count: int = 0
+    duration: float = 0
+    expression_size: int = 0
+    errors: int = 0
+    calls: dict[str, int] = {}
+
+
+class Metrics:
+    """Recorder of the round trips made by a flood map.
+
+    Calls are recorded while a stage of the recorder is active. The active stage is kept in
+    a context variable, so concurrent flood maps record their calls separately.
+    """
+
+    def __init__(self, hooks: list[Callable[[CallRecord], None]] | None = None) -> None:
+        """Instantiate a Metrics recorder.
+
+        Parameters
+        ----------
+        hooks : list[Callable[[CallRecord], None]], optional
+            functions called with every recorded call, by default None
+
+        """
+        self.records: list[CallRecord] = []
+        self.hooks = list(hooks or [])
+        self._lock = threading.Lock()
+        instrument_ee()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Record the calls made within the context under a stage name."""
+        token = _active.set((self, name))
+        try:
+            yield
+        finally:
+            _active.reset(token)
+
+    def record(self, record: CallRecord) -> None:
+        """Store a call record and pass it to the hooks."""
+        with self._lock:
+            self.records.append(record)
+        for hook in [*_hooks, *self.hooks]:
+            try:
+                hook(record)
+            except Exception:
+                log.exception("Metrics hook %s failed", hook)
+
+    def summary(self) -> dict[str, StageMetrics]:
+        """Aggregate the recorded calls per stage."""
+        stages: dict[str, StageMetrics] = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            stage = stages.setdefault(record.stage, StageMetrics())
+            stage.count += 1
+            stage.duration += record.duration
+            stage.expression_size += record.expression_size or 0
+            stage.errors += int(record.error is not None)
+            stage.calls[record.name] = stage.calls.get(record.name, 0) + 1
+        return stages
+
+    def reset(self) -> None:
+        """Remove all recorded calls."""
+        with self._lock:
+            self.records.clear()
+
+
+def add_hook(hook: Callable[[CallRecord], None]) -> None:
+    """Register a function that is called with the calls recorded by every flood map."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[CallRecord], None]) -> None:
+    """Unregister a function registered with add_hook."""
+    _hooks.remove(hook)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Record the calls within the context under another stage of the active recorder.
+
+    Does nothing when no recorder is active.
+    """
+    active = _active.get()
+    if active is None:
+        yield
+        return
+    with active[0].stage(name):
+        yield
+
+
+@contextmanager
+def track(kind: str, name: str, expression_size: int | None = None) -> Iterator[None]:
+    """Time the call made within the context and record it with the active recorder."""
+    active = _active.get()
+    if active is None:
+        yield
+        return
+    start = time.time()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = repr(e)
+        raise
+    finally:
+        recorder, stage_name = active
+        recorder.record(
+            CallRecord(
+                kind=kind,
+                name=name,
+                stage=stage_name,
+                start=start,
+                duration=time.time() - start,
+                expression_size=expression_size,
+                call_site=_call_site(),
+                error=error,
+            ),
+        )
+
+
+def bind_context(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Bind a function to the current context, so calls in other threads are recorded."""
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+def http_hooks() -> dict[str, list[Callable[..., None]]]:
+    """Request hooks that record the response time of a request with the active recorder.
+
+    Examples
+    --------
+    >>> requests.get(url, hooks=http_hooks())
+
+    """
+    return {"response": [_record_response]}
+
+
+def instrument_ee() -> None:
+    """Wrap the Earth Engine client functions that make round trips to the server.
+
+    The wrappers only record calls while a recorder is active, other calls are passed
+    through unchanged.
+    """
+    import ee  # noqa: PLC0415
+
+    with _instrument_lock:
+        for name in EE_FUNCTIONS:
+            func = getattr(ee.data, name)
+            if not getattr(func, "_eo_floods_instrumented", False):
+                setattr(ee.data, name, _wrap_ee(func))
+
+
+def _wrap_ee(func: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        if _active.get() is None:
+            return func(*args, **kwargs)
+        with track("ee", func.__name__, _expression_size([*args, *kwargs.values()])):
+            return func(*args, **kwargs)
+
+    wrapper._eo_floods_instrumented = True  # noqa: SLF001
+    return wrapper
+
+
+def _expression_size(args: list[Any]) -> int | None:
+    import ee  # noqa: PLC0415
+
+    for arg in args:
+        values = arg.values() if isinstance(arg, dict) else [arg]
+        for value in values:
+            if isinstance(value, ee.ComputedObject):
+                return len(value.serialize())
+    return None
+
+
+def _record_response(response: requests.Response, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401, ARG001
+    active = _active.get()
+    if active is None:
+        return
+    recorder, stage_name = active
+    duration = response.elapsed.total_seconds()
+    body = response.request.body
+    recorder.record(
+        CallRecord(
+            kind="http",
+            name=f"{response.request.method} {urlparse(response.url).path}",
+            stage=stage_name,
+            start=time.time() - duration,
+            duration=duration,
+            expression_size=len(body) if body else None,
+            call_site=_call_site(),
+            error=f"HTTP {response.status_code}" if not response.ok else None,
+        ),
+    )
+
+
+def _call_site() -> str:
+    """Return the innermost frame in eo_floods, outside of this module."""
+    for frame in reversed(traceback.extract_stack()):
+        path = Path(frame.filename)
+        if path != Path(__file__) and PACKAGE_DIR in path.parents:
+            return f"{path.relative_to(PACKAGE_DIR.parent)}:{frame.lineno} in {frame.name}"
+    return "unknown"
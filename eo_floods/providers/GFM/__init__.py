@@ -1,4 +1,21 @@
 """GFM provider module."""
-from .gfm import GFM
 
-__all__ = ["GFM"]
\ No newline at end of file
+from __future__ import annotations
+
+import importlib
+from typing import Any
+
+__all__ = ["GFM"]
+
+_LAZY_IMPORTS = {"GFM": "eo_floods.providers.GFM.gfm"}
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    err_msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(err_msg)
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_IMPORTS])
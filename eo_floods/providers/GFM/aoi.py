@@ -0,0 +1,219 @@
+"""Registry of the areas of interest uploaded to the GFM API."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from typing import TYPE_CHECKING, Any
+
+from eo_floods.cache import get_cache
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from eo_floods.providers.GFM.client import GFMClient
+
+log = logging.getLogger(__name__)
+
+AOI_PREFIX = "eo_floods_"
+# decimals kept when hashing coordinates, about 0.1 m
+COORDINATE_DECIMALS = 6
+
+_registries: dict[tuple[str, str], AOIRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def aoi_name(geojson: Any) -> str:  # noqa: ANN401
+    """Name an AOI after the hash of its normalized GeoJSON.
+
+    Coordinates are rounded and tuples are treated as lists, so the same bounding box always
+    results in the same name.
+    """
+    normalized = json.dumps(_normalize(geojson), sort_keys=True, separators=(",", ":"))
+    return AOI_PREFIX + hashlib.sha256(normalized.encode()).hexdigest()[:16]
+
+
+def _normalize(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [_normalize(item) for item in value]
+    if isinstance(value, float):
+        return round(value, COORDINATE_DECIMALS)
+    return value
+
+
+class AOIRegistry:
+    """Lookup of the AOIs of a GFM user, so that each geometry is uploaded only once.
+
+    The AOIs of the user are listed from the API at most once per registry. Found and
+    created AOI ids are also stored in the metadata cache, so later runs do not need to list
+    the AOIs at all.
+    """
+
+    def __init__(self, client: GFMClient) -> None:
+        """Instantiate an AOIRegistry.
+
+        Parameters
+        ----------
+        client : GFMClient
+            client of the user that owns the AOIs
+
+        """
+        self.client = client
+        self._aois: dict[str, str] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def user_id(self) -> str:
+        """The client id of the user that owns the AOIs."""
+        return self.client.user["client_id"]
+
+    def get_or_create(self, geojson: Any) -> str:  # noqa: ANN401
+        """Return the id of the AOI of a geometry, uploading the geometry if it is new.
+
+        Parameters
+        ----------
+        geojson : Any
+            GeoJSON geometry of the AOI, as created by coords_to_geojson
+
+        Returns
+        -------
+        str
+            the aoi_id of the existing or created AOI
+
+        """
+        name = aoi_name(geojson)
+        with self._lock:
+            aoi_id = self._lookup(name)
+            if aoi_id is not None:
+                log.info("Reusing GFM AOI %s", name)
+                return aoi_id
+            aoi_id = self._create(name, geojson)
+            self._remember(name, aoi_id)
+            return aoi_id
+
+    def forget(self, geojson: Any) -> None:  # noqa: ANN401
+        """Remove a geometry from the registry, e.g. after its AOI was deleted on the server."""
+        name = aoi_name(geojson)
+        with self._lock:
+            self._forget(name)
+
+    def list(self, *, refresh: bool = False) -> dict[str, str]:
+        """List the AOIs of the user.
+
+        Parameters
+        ----------
+        refresh : bool, optional
+            list the AOIs from the API again, by default False
+
+        Returns
+        -------
+        dict[str, str]
+            mapping of AOI names to aoi_ids
+
+        """
+        with self._lock:
+            if self._aois is None or refresh:
+                self._aois = self._fetch()
+            return dict(self._aois)
+
+    def cleanup(self, keep: Iterable[Any] = ()) -> list[str]:
+        """Delete the AOIs created by eo_floods that are no longer needed.
+
+        Only AOIs with a name starting with AOI_PREFIX are deleted, AOIs created in other
+        ways are left alone.
+
+        Parameters
+        ----------
+        keep : Iterable[Any], optional
+            GeoJSON geometries of the AOIs to keep, by default ()
+
+        Returns
+        -------
+        list[str]
+            the ids of the deleted AOIs
+
+        """
+        keep_names = {aoi_name(geojson) for geojson in keep}
+        deleted = []
+        for name, aoi_id in self.list(refresh=True).items():
+            if not name.startswith(AOI_PREFIX) or name in keep_names:
+                continue
+            r = self.client.request("DELETE", f"aoi/delete/id/{aoi_id}")
+            if r.status_code not in (200, 204, 404):
+                r.raise_for_status()
+            with self._lock:
+                self._forget(name)
+            deleted.append(aoi_id)
+        log.info("Deleted %s stale GFM AOIs", len(deleted))
+        return deleted
+
+    def _lookup(self, name: str) -> str | None:
+        if self._aois is not None and name in self._aois:
+            return self._aois[name]
+        cache = get_cache()
+        if cache is not None:
+            aoi_id = cache.get(self._cache_key(name))
+            if aoi_id is not None:
+                return aoi_id
+        if self._aois is None:
+            self._aois = self._fetch()
+        aoi_id = self._aois.get(name)
+        if aoi_id is not None and cache is not None:
+            cache.set(self._cache_key(name), aoi_id)
+        return aoi_id
+
+    def _remember(self, name: str, aoi_id: str) -> None:
+        if self._aois is not None:
+            self._aois[name] = aoi_id
+        cache = get_cache()
+        if cache is not None:
+            cache.set(self._cache_key(name), aoi_id)
+
+    def _forget(self, name: str) -> None:
+        if self._aois is not None:
+            self._aois.pop(name, None)
+        cache = get_cache()
+        if cache is not None:
+            cache.invalidate(self._cache_key(name))
+
+    def _fetch(self) -> dict[str, str]:
+        log.info("Listing the AOIs of the GFM user")
+        r = self.client.get(f"aoi/user/{self.user_id}")
+        if r.status_code != 200:  # noqa: PLR2004
+            r.raise_for_status()
+        return {aoi["aoi_name"]: aoi["aoi_id"] for aoi in r.json().get("aois", [])}
+
+    def _create(self, name: str, geojson: Any) -> str:  # noqa: ANN401
+        log.info("Uploading geometry to GFM server")
+        payload = {
+            "aoi_name": name,
+            "user_id": self.user_id,
+            "description": "area of interest for flood mapping",
+            "geoJSON": geojson,
+        }
+        r = self.client.post("aoi/create", json=payload)
+        if r.status_code != 201:  # noqa: PLR2004
+            r.raise_for_status()
+        log.info("Successfully uploaded geometry to GFM server")
+        return r.json().get("aoi_id")
+
+    def _cache_key(self, name: str) -> str:
+        return f"gfm-aoi/{self.client.base_url}/{self.user_id}/{name}"
+
+
+def get_registry(client: GFMClient) -> AOIRegistry:
+    """Return the AOI registry of the user of a client, shared by all clients of the user.
+
+    The registry sends its requests with the client it was last requested with.
+    """
+    key = (client.base_url, client.user["client_id"])
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = AOIRegistry(client)
+        registry.client = client
+        return registry
@@ -9,7 +9,11 @@ import os
 import requests
 from requests import Request
 
+from eo_floods.metrics import http_hooks
+
 log = logging.getLogger(__name__)
+API_URL = "https://api.gfm.eodc.eu/v2/"
+MAX_PROMPT_ATTEMPTS = 3
 
 
 def authenticate_gfm(
@@ -17,6 +21,8 @@ def authenticate_gfm(
     pwd: str | None = None,
     *,
     from_env: bool = False,
+    session: requests.Session | None = None,
+    api_url: str | None = None,
 ) -> dict:
     """Authenticate to the GFM server.
 
@@ -29,16 +35,21 @@ def authenticate_gfm(
     from_env : bool, optional
         bool option to use environment viarables. If set to True this function will look for
         'GFM_EMAIL' and 'GFM_PWD`.
+    session : requests.Session, optional
+        session to send the login request with, by default a new connection is used
+    api_url : str, optional
+        base URL of the GFM API, by default API_URL
 
     Returns
     -------
     dict
-        returns user information
+        returns user information, None if the email or password is incorrect. When the
+        credentials are entered in prompts, the user gets MAX_PROMPT_ATTEMPTS attempts.
 
     Raises
     ------
-    r.raise_for_status
-        _description_
+    requests.HTTPError
+        if the login request fails for another reason than incorrect credentials
 
     """
     from_input_prompt = False
@@ -47,22 +58,27 @@ def authenticate_gfm(
             "To authenticate to the GFM API please enter your email and your password in the "
             "following prompts",
         )
-        email = input(prompt="Enter your email")
-        pwd = getpass.getpass(prompt="Enter your password")
         from_input_prompt = True
     elif not email and not pwd and from_env:
         email, pwd = _get_credentials_from_env()
-    url = "https://api.gfm.eodc.eu/v2/auth/login"
-    r = requests.post(url=url, json={"email": email, "password": pwd}, timeout=120)
-    if r.status_code == 200:  # noqa: PLR2004
-        log.info("Successfully authenticated to the GFM API")
-        return r.json()
-    if r.status_code == 400:  # noqa: PLR2004
-        log.info("Incorrect email or password, please try again")
+    url = (api_url or API_URL) + "auth/login"
+    for _ in range(MAX_PROMPT_ATTEMPTS if from_input_prompt else 1):
         if from_input_prompt:
-            return authenticate_gfm(email, pwd)
-    else:
-        r.raise_for_status()
+            email = input("Enter your email")
+            pwd = getpass.getpass(prompt="Enter your password")
+        r = (session or requests).post(
+            url=url,
+            json={"email": email, "password": pwd},
+            timeout=120,
+            # a session records its requests with its own hooks
+            hooks=http_hooks() if session is None else None,
+        )
+        if r.status_code == 200:  # noqa: PLR2004
+            log.info("Successfully authenticated to the GFM API")
+            return r.json()
+        if r.status_code != 400:  # noqa: PLR2004
+            r.raise_for_status()
+        log.info("Incorrect email or password, please try again")
     return None
 
 
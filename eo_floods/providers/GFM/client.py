@@ -0,0 +1,239 @@
+"""HTTP client for the GFM API."""
+
+from __future__ import annotations
+
+import getpass
+import logging
+import os
+import random
+import time
+from typing import TYPE_CHECKING, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from eo_floods.metrics import http_hooks
+from eo_floods.providers.GFM import auth
+from eo_floods.providers.GFM.auth import BearerAuth, authenticate_gfm
+from eo_floods.providers.GFM.tokens import Token, TokenStore, get_token_store, token_key
+
+if TYPE_CHECKING:
+    from typing import Self
+
+log = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GFMClient:
+    """Client for the GFM API with a pooled session, retries and token refresh.
+
+    All requests share one requests.Session, so connections are kept alive and reused.
+    Idempotent requests that fail with a connection error, a timeout, or a 429 or 5xx
+    response are retried with exponential backoff and jitter. Access tokens are taken from a
+    TokenStore and refreshed shortly before they expire. When a request is rejected with 401
+    the client logs in again and repeats the request once.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        email: str | None = None,
+        pwd: str | None = None,
+        base_url: str | None = None,
+        *,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30,
+        timeout: float = 120,
+        token_store: TokenStore | None = None,
+    ) -> None:
+        """Instantiate a GFMClient.
+
+        Parameters
+        ----------
+        email : str, optional
+            GFM account email, by default the GFM_EMAIL environment variable or a prompt
+        pwd : str, optional
+            GFM account password, by default the GFM_PWD environment variable or a prompt
+        base_url : str, optional
+            base URL of the GFM API, by default the GFM_API_URL environment variable or
+            https://api.gfm.eodc.eu/v2/
+        pool_size : int, optional
+            maximum number of kept-alive connections per host, by default 10
+        max_retries : int, optional
+            maximum number of retries of a failed request, by default 3
+        backoff_factor : float, optional
+            base delay in seconds of the exponential backoff, by default 0.5
+        max_backoff : float, optional
+            maximum delay in seconds between retries, by default 30
+        timeout : float, optional
+            default timeout in seconds of a request, by default 120
+        token_store : TokenStore, optional
+            store to cache access tokens in, by default the store returned by
+            get_token_store
+
+        """
+        base_url = base_url or os.getenv("GFM_API_URL") or auth.API_URL
+        self.base_url = base_url.rstrip("/") + "/"
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.hooks["response"].extend(http_hooks()["response"])
+        self._email = email
+        self._pwd = pwd
+        self.token_store = token_store if token_store is not None else get_token_store()
+        self._auth = BearerAuth("")
+        self._token: Token | None = None
+
+    @property
+    def user(self) -> dict:
+        """User information returned by the login, logs in on first access."""
+        self._ensure_token()
+        return self._token.user
+
+    def login(self, *, force: bool = False) -> dict:
+        """Get an access token for all requests, logging in if the store has no valid token.
+
+        Parameters
+        ----------
+        force : bool, optional
+            discard the current access token, e.g. because it was rejected, by default False
+
+        Returns
+        -------
+        dict
+            user information returned by the login
+
+        """
+        if not self._email or not self._pwd:
+            self._email, self._pwd = _get_credentials(self._email, self._pwd)
+        stale_token = self._token.access_token if force and self._token is not None else None
+        self._token = self.token_store.get_or_login(
+            token_key(self.base_url, self._email),
+            self._authenticate,
+            stale_token=stale_token,
+        )
+        self._auth.token = self._token.access_token
+        return self._token.user
+
+    def _authenticate(self) -> dict:
+        user = authenticate_gfm(
+            self._email,
+            self._pwd,
+            session=self.session,
+            api_url=self.base_url,
+        )
+        if user is None:
+            err_msg = "Authentication to the GFM API failed"
+            raise ValueError(err_msg)
+        return user
+
+    def _ensure_token(self) -> None:
+        if self._token is None or self._token.expires_within(self.token_store.refresh_margin):
+            self.login()
+
+    def get(self, path: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+        """Send a GET request, see GFMClient.request."""
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+        """Send a POST request, see GFMClient.request."""
+        return self.request("POST", path, **kwargs)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        retry: bool | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> requests.Response:
+        """Send an authenticated request to the GFM API.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method
+        path : str
+            path relative to the base URL, e.g. "aoi/create"
+        retry : bool, optional
+            retry the request on failures, by default only idempotent methods are retried
+        kwargs : Any
+            keyword arguments passed to requests.Session.request
+
+        Returns
+        -------
+        requests.Response
+            the response of the last attempt
+
+        """
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        url = self.base_url + path.lstrip("/")
+        kwargs.setdefault("timeout", self.timeout)
+        self._ensure_token()
+        refreshed = False
+        attempt = 0
+        while True:
+            try:
+                r = self.session.request(method, url, auth=self._auth, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not retry or attempt >= self.max_retries:
+                    raise
+                log.warning("%s %s failed (%s), retrying", method, path, e)
+                self._sleep(attempt)
+                attempt += 1
+                continue
+            if r.status_code == 401 and not refreshed:  # noqa: PLR2004
+                log.info("GFM access token expired, logging in again")
+                self.login(force=True)
+                refreshed = True
+                continue
+            if r.status_code in RETRY_STATUSES and retry and attempt < self.max_retries:
+                log.warning("%s %s returned %s, retrying", method, path, r.status_code)
+                self._sleep(attempt, r.headers.get("Retry-After"))
+                attempt += 1
+                continue
+            return r
+
+    def close(self) -> None:
+        """Close the connections of the session."""
+        self.session.close()
+
+    def __enter__(self) -> Self:
+        """Use the client as a context manager that closes the session on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the session."""
+        self.close()
+
+    def _sleep(self, attempt: int, retry_after: str | None = None) -> None:
+        delay = min(self.max_backoff, self.backoff_factor * 2**attempt)
+        delay = random.uniform(delay / 2, delay)  # noqa: S311
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.max_backoff))
+        time.sleep(delay)
+
+
+def _get_credentials(email: str | None, pwd: str | None) -> tuple[str, str]:
+    """Complete the credentials from the environment or, as a last resort, prompts."""
+    email = email or os.getenv("GFM_EMAIL")
+    pwd = pwd or os.getenv("GFM_PWD")
+    if not email or not pwd:
+        log.info(
+            "To authenticate to the GFM API please enter your email and your password in the "
+            "following prompts",
+        )
+    if not email:
+        email = input("Enter your email")
+    if not pwd:
+        pwd = getpass.getpass(prompt="Enter your password")
+    return email, pwd
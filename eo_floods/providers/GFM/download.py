@@ -0,0 +1,302 @@
+"""Concurrent, resumable download of GFM product archives."""
+
+from __future__ import annotations
+
+import fnmatch
+import logging
+import re
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import requests
+import urllib3
+from pydantic import BaseModel
+
+from eo_floods import metrics
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from eo_floods.providers.GFM.client import GFMClient
+
+log = logging.getLogger(__name__)
+
+# names of the flood extent rasters in the product archives
+FLOOD_EXTENT_PATTERNS = ("*ENSEMBLE_FLOOD*.tif", "*observed_flood_extent*.tif")
+
+
+class DownloadedProduct(BaseModel):
+    """A GFM product archive downloaded to disk.
+
+    Attributes
+    ----------
+    product_id : str
+        id of the product
+    product_time : str
+        time stamp of the product
+    archive : Path
+        path of the zip archive
+    size : int
+        size of the archive in bytes
+    files : list[Path]
+        the rasters extracted from the archive
+
+    """
+
+    product_id: str
+    product_time: str
+    archive: Path
+    size: int
+    files: list[Path] = []
+
+
+class ProductDownloader:
+    """Download GFM products by streaming their archives to disk concurrently.
+
+    The download links are requested and the archives are downloaded by one bounded thread
+    pool. Archives are written in chunks to a `.part` file, so memory use does not depend
+    on the size of the archives, and interrupted downloads are resumed with HTTP range
+    requests.
+    """
+
+    def __init__(
+        self,
+        client: GFMClient,
+        *,
+        max_workers: int = 4,
+        chunk_size: int = 2**20,
+        timeout: float = 300,
+        progress: Callable[[int, int, int], None] | None = None,
+    ) -> None:
+        """Instantiate a ProductDownloader.
+
+        Parameters
+        ----------
+        client : GFMClient
+            client used to request the download links
+        max_workers : int, optional
+            maximum number of products downloaded at the same time, by default 4
+        chunk_size : int, optional
+            size in bytes of the chunks written to disk, by default 1 MiB
+        timeout : float, optional
+            timeout in seconds of the requests, by default 300
+        progress : Callable[[int, int, int], None], optional
+            function called after every downloaded product with the number of downloaded
+            products, the total number of products and the number of downloaded bytes, by
+            default the progress is logged
+
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.progress = progress if progress is not None else _log_progress
+
+    def links(self, products: list[dict], user_id: str) -> dict[str, dict]:
+        """Request the download links of products concurrently.
+
+        Parameters
+        ----------
+        products : list[dict]
+            products as returned by the GFM API
+        user_id : str
+            client id of the user
+
+        Returns
+        -------
+        dict[str, dict]
+            the responses of the download endpoint by product id
+
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(metrics.bind_context(self._link), product, user_id): product
+                for product in products
+            }
+            return {futures[future]["product_id"]: future.result() for future in futures}
+
+    def download(
+        self,
+        products: list[dict],
+        user_id: str,
+        out_dir: str | Path,
+        patterns: Iterable[str] | None = FLOOD_EXTENT_PATTERNS,
+    ) -> list[DownloadedProduct]:
+        """Download product archives to a local directory.
+
+        Parameters
+        ----------
+        products : list[dict]
+            products as returned by the GFM API
+        user_id : str
+            client id of the user
+        out_dir : str or Path
+            directory to write the archives to
+        patterns : Iterable[str], optional
+            glob patterns of the files to extract from the archives, None to keep the
+            archives packed, by default FLOOD_EXTENT_PATTERNS
+
+        Returns
+        -------
+        list[DownloadedProduct]
+            the downloaded products, in the order of the given products
+
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        log.info("Downloading %s GFM products to %s", len(products), out_dir)
+        results: dict[str, DownloadedProduct] = {}
+        downloaded_bytes = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(
+                    metrics.bind_context(self._download_product),
+                    product,
+                    user_id,
+                    out_dir,
+                    patterns,
+                ): product["product_id"]
+                for product in products
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                downloaded_bytes += result.size
+                self.progress(len(results), len(products), downloaded_bytes)
+        return [results[product["product_id"]] for product in products]
+
+    def _link(self, product: dict, user_id: str) -> dict:
+        r = self.client.get(
+            f"download/product/{product['product_id']}/{user_id}",
+            timeout=self.timeout,
+        )
+        if r.status_code != 200:  # noqa: PLR2004
+            r.raise_for_status()
+        return r.json()
+
+    def _download_product(
+        self,
+        product: dict,
+        user_id: str,
+        out_dir: Path,
+        patterns: Iterable[str] | None,
+    ) -> DownloadedProduct:
+        archive = out_dir / f"{product['product_id']}.zip"
+        if not archive.exists():
+            link = self._link(product, user_id)
+            self._stream(link["download_link"], archive)
+        files = []
+        if patterns is not None:
+            files = extract_files(archive, out_dir / product["product_id"], patterns)
+        return DownloadedProduct(
+            product_id=product["product_id"],
+            product_time=product["product_time"],
+            archive=archive,
+            size=archive.stat().st_size,
+            files=files,
+        )
+
+    def _stream(self, url: str, path: Path) -> None:
+        """Stream a file to disk, resuming from a partial download if there is one."""
+        part = path.with_name(path.name + ".part")
+        attempts = self.client.max_retries + 1
+        for attempt in range(attempts):
+            offset = part.stat().st_size if part.exists() else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                expected = self._fetch(url, part, offset, headers)
+            except (requests.ConnectionError, requests.Timeout, urllib3.exceptions.HTTPError) as e:
+                # reading the raw body raises urllib3 errors, e.g. when the connection drops
+                if attempt == attempts - 1:
+                    raise
+                log.warning("Download of %s interrupted (%s), resuming", path.name, e)
+                continue
+            if not part.exists():
+                # the partial download did not match the file on the server, start over
+                continue
+            size = part.stat().st_size
+            if expected is None or size == expected:
+                part.replace(path)
+                return
+            log.warning("Downloaded %s of %s bytes of %s, resuming", size, expected, path.name)
+        err_msg = f"Download of {path.name} is incomplete after {attempts} attempts"
+        raise OSError(err_msg)
+
+    def _fetch(self, url: str, part: Path, offset: int, headers: dict) -> int | None:
+        """Write the response to the part file and return the expected size of the file."""
+        with self.client.session.get(
+            url,
+            headers=headers,
+            stream=True,
+            timeout=self.timeout,
+        ) as r:
+            if r.status_code == 416:  # noqa: PLR2004
+                # the part file is complete or larger than the file on the server
+                total = _content_range_total(r.headers.get("Content-Range"))
+                if total != offset:
+                    part.unlink()
+                return total
+            if r.status_code not in (200, 206):
+                r.raise_for_status()
+            if r.status_code == 200:  # noqa: PLR2004
+                # the server ignored the range request, start over
+                offset = 0
+            expected = _content_range_total(r.headers.get("Content-Range"))
+            if expected is None and "Content-Length" in r.headers:
+                expected = offset + int(r.headers["Content-Length"])
+            with part.open("ab" if offset else "wb") as f:
+                for chunk in r.raw.stream(self.chunk_size, decode_content=False):
+                    f.write(chunk)
+        return expected
+
+
+def extract_files(archive: str | Path, out_dir: str | Path, patterns: Iterable[str]) -> list[Path]:
+    """Extract the files matching glob patterns from a zip archive.
+
+    Only the matching files are decompressed, in chunks. The files are written to out_dir
+    without the directory structure of the archive.
+
+    Parameters
+    ----------
+    archive : str or Path
+        path of the zip archive
+    out_dir : str or Path
+        directory to extract the files to
+    patterns : Iterable[str]
+        case insensitive glob patterns that are matched with the file names
+
+    Returns
+    -------
+    list[Path]
+        paths of the extracted files
+
+    """
+    out_dir = Path(out_dir)
+    patterns = [pattern.lower() for pattern in patterns]
+    files = []
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            name = Path(info.filename).name
+            if info.is_dir() or not any(fnmatch.fnmatch(name.lower(), p) for p in patterns):
+                continue
+            out_dir.mkdir(parents=True, exist_ok=True)
+            path = out_dir / name
+            if not path.exists() or path.stat().st_size != info.file_size:
+                with zf.open(info) as src, path.open("wb") as dst:
+                    shutil.copyfileobj(src, dst, 2**20)
+            files.append(path)
+    if not files:
+        log.warning("No files matching %s found in %s", patterns, Path(archive).name)
+    return files
+
+
+def _content_range_total(content_range: str | None) -> int | None:
+    match = re.fullmatch(r"bytes [\d*-]+/(\d+)", (content_range or "").strip())
+    return int(match.group(1)) if match else None
+
+
+def _log_progress(done: int, total: int, downloaded_bytes: int) -> None:
+    log.info("Downloaded %s/%s GFM products (%.1f MB)", done, total, downloaded_bytes / 2**20)
@@ -3,22 +3,35 @@
 from __future__ import annotations
 
 import logging
+from typing import TYPE_CHECKING
 
 import requests
 
+from eo_floods.cache import cache_key, get_cache, query_max_age
 from eo_floods.providers import ProviderBase
-from eo_floods.providers.GFM.auth import BearerAuth, authenticate_gfm
-from eo_floods.providers.GFM.leaflet import WMSMap
+from eo_floods.providers.GFM.aoi import get_registry
+from eo_floods.providers.GFM.client import GFMClient
+from eo_floods.providers.GFM.download import (
+    FLOOD_EXTENT_PATTERNS,
+    DownloadedProduct,
+    ProductDownloader,
+)
+from eo_floods.providers.GFM.products import ProductIndex, ProductQuery
 from eo_floods.utils import coords_to_geojson
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from eo_floods.providers.GFM.leaflet import WMSMap
+
 log = logging.getLogger(__name__)
-API_URL = "https://api.gfm.eodc.eu/v2/"
 
 
 class GFM(ProviderBase):
     """Provider class for retrieving and processing GFM data."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         start_date: str,
         end_date: str,
@@ -26,6 +39,7 @@ class GFM(ProviderBase):
         *,
         email: str | None = None,
         pwd: str | None = None,
+        client: GFMClient | None = None,
     ) -> None:
         """Instantiate a GFM provider object.
 
@@ -41,22 +55,40 @@ class GFM(ProviderBase):
             email of the GFM user account, by default None
         pwd : _type_, optional
             password of the GFM user account, by default None
+        client : GFMClient, optional
+            client for the GFM API, e.g. to share connections between providers or to
+            configure retries, by default a new GFMClient with the given credentials
 
         """
-        self.user: dict = authenticate_gfm(email, pwd)
+        self.client = client if client is not None else GFMClient(email=email, pwd=pwd)
+        self.user: dict = self.client.user
         self.aoi_id: str = self._create_aoi(geometry=coords_to_geojson(geometry))
         self.start_date: str = start_date
         self.end_date: str = end_date
         self.geometry: list[float] = geometry
-        self.products: dict = self._get_products()
+        self.index = ProductIndex(self._get_products())
+        self.products: ProductIndex = self.index
 
-    def view_data(self, layer: str = "observed_flood_extent") -> WMSMap:
+    def view_data(
+        self,
+        layer: str = "observed_flood_extent",
+        *,
+        cache_tiles: bool = False,
+        per_product: bool = False,
+    ) -> WMSMap:
         """View the data for the given period and geometry.
 
         Parameters
         ----------
         layer : str, optional
             name of the data layer, by default "observed_flood_extent"
+        cache_tiles : bool, optional
+            serve the tiles through a local proxy that caches them on disk and prefetches
+            the tiles of the neighbouring times, by default False. The proxy only works when
+            the browser runs on the same machine as the notebook kernel.
+        per_product : bool, optional
+            offer every product time stamp in the time slider instead of every day with
+            products, by default False
 
         Returns
         -------
@@ -64,88 +96,135 @@ class GFM(ProviderBase):
             a ipyleaflet map object wrapped in a custom map class.
 
         """
+        from eo_floods.providers.GFM.leaflet import WMS_URL, WMSMap  # noqa: PLC0415
+        from eo_floods.providers.GFM.tiles import get_tile_proxy  # noqa: PLC0415
+
+        if not self.products:
+            err_msg = "No GFM products to view for the selected dates"
+            raise ValueError(err_msg)
+        # only times with products are offered, so no empty frames are requested
+        if per_product:
+            times = [product["product_time"] for product in self.products]
+        else:
+            times = [
+                (f"{day} ({len(day_times)})", day)
+                for day, day_times in self.products.by_day().items()
+            ]
         wms_map = WMSMap(
             start_date=self.start_date,
             end_date=self.end_date,
             layers=layer,
             bbox=self.geometry,
+            tile_proxy=get_tile_proxy(WMS_URL) if cache_tiles else None,
+            times=times,
         )
         return wms_map.get_map()
 
-    def available_data(self) -> None:
-        """Show the available data for the given time period and geometry."""
-        dates = [product["product_time"] for product in self.products]
+    def available_data(self) -> dict[str, list[str]]:
+        """Show the available data for the given time period and geometry.
+
+        Returns
+        -------
+        dict[str, list[str]]
+            the product times of the available data by day
+
+        """
+        dates = [product["product_time"] for product in self.index]
         log.info("For the following dates there is GFM data: %s", dates)
+        days = self.index.by_day()
+        for day, times in days.items():
+            log.info("%s: %s products", day, len(times))
+        return days
 
-    def select_data(self, dates: list[str]) -> None:
-        """Select data by supplying a list of timestamps.
+    def select_data(self, dates: list[str] | None = None) -> None:
+        """Select data by supplying a list of timestamps or days.
+
+        The selection is always made from all available products, so a new selection can
+        widen a previous one.
 
         Parameters
         ----------
-        dates : list[str]
+        dates : list[str], optional
             a list of timestamps that should match at least one of the timestamps given with
-                the available_data method
+                the available_data method, or days to select all products of, by default all
+                products are selected
 
         """
+        if dates is None:
+            self.products = self.index
+            return
         if not isinstance(dates, list):
             err_msg = f"dates should be a list of dates, not {type(dates)}"
             raise TypeError(err_msg)
-        products = [product for product in self.products if product["product_time"] in dates]
+        products = self.index.select(dates)
         if not products:
             err_msg = f"No data found for given date(s): {', '.join(dates)}"
             raise ValueError(err_msg)
         self.products = products
 
-    def export_data(self) -> None:
-        """Retrieve a download link for downloading the GFM data."""
-        log.info("Retrieving download link")
-
-        for product in self.products:
-            r = requests.get(
-                url=API_URL + f"download/product/{product['product_id']}/{self.user['client_id']}",
-                auth=BearerAuth(self.user["access_token"]),
-                timeout=300,
-            )
-            if r.status_code != 200:  # noqa: PLR2004
-                r.raise_for_status()
-            link = r.json()
-            log.info("Image: %s, download link: %s", product["product_time"], link)
-
-    def _create_aoi(self, geometry: list[float]) -> str:
-        log.info("Uploading geometry to GFM server")
-        payload = {
-            "aoi_name": "flood_aoi",
-            "user_id": self.user["client_id"],
-            "description": "area of interest for flood mapping",
-            "geoJSON": geometry,
-        }
-
-        r = requests.post(
-            API_URL + "/aoi/create",
-            json=payload,
-            auth=BearerAuth(self.user["access_token"]),
-            timeout=120,
-        )
+    def export_data(
+        self,
+        output_dir: str | Path | None = None,
+        *,
+        patterns: Iterable[str] | None = FLOOD_EXTENT_PATTERNS,
+        max_workers: int = 4,
+    ) -> list[DownloadedProduct] | None:
+        """Download the GFM data, or log the download links if no output directory is given.
 
-        if r.status_code != 201:  # noqa: PLR2004
-            r.raise_for_status()
-        log.info("Successfully uploaded geometry to GFM server")
+        Parameters
+        ----------
+        output_dir : str or Path, optional
+            directory to download the product archives to, by default the download links
+            are only logged
+        patterns : Iterable[str], optional
+            glob patterns of the files to extract from the archives, None to keep the
+            archives packed, by default the flood extent rasters
+        max_workers : int, optional
+            maximum number of products downloaded at the same time, by default 4
 
-        return r.json().get("aoi_id")
+        Returns
+        -------
+        list[DownloadedProduct] | None
+            the downloaded products if an output directory is given
 
-    def _get_products(self) -> dict:
+        """
+        downloader = ProductDownloader(self.client, max_workers=max_workers)
+        if output_dir is None:
+            log.info("Retrieving download link")
+            links = downloader.links(self.products, self.user["client_id"])
+            for product in self.products:
+                log.info(
+                    "Image: %s, download link: %s",
+                    product["product_time"],
+                    links[product["product_id"]],
+                )
+            return None
+        return downloader.download(self.products, self.user["client_id"], output_dir, patterns)
+
+    def _create_aoi(self, geometry: dict) -> str:
+        return get_registry(self.client).get_or_create(geometry)
+
+    def _get_products(self) -> list[dict]:
+        cache = get_cache()
+        key = cache_key("GFM", "GFM", self.geometry, self.start_date, self.end_date)
+        if cache is not None:
+            products = cache.get(key, max_age=query_max_age(self.end_date))
+            if products is not None:
+                log.info("Using cached GFM product information")
+                return products
         log.info("Retrieving GFM product information")
-        params = {
-            "time": "range",
-            "from": self.start_date + "T00:00:00",
-            "to": self.end_date + "T23:59:59",
-        }
-        r = requests.get(
-            API_URL + f"/aoi/{self.aoi_id}/products",
-            auth=BearerAuth(self.user["access_token"]),
-            params=params,
-            timeout=120,
-        )
-        if r.status_code != 200:  # noqa: PLR2004
-            r.raise_for_status()
-        return r.json()["products"]
+        query = ProductQuery(self.client)
+        try:
+            products = query.fetch(self.aoi_id, self.start_date, self.end_date)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:  # noqa: PLR2004
+                raise
+            # the registered AOI was deleted on the server, upload the geometry again
+            log.info("GFM AOI %s no longer exists", self.aoi_id)
+            geojson = coords_to_geojson(self.geometry)
+            get_registry(self.client).forget(geojson)
+            self.aoi_id = self._create_aoi(geojson)
+            products = query.fetch(self.aoi_id, self.start_date, self.end_date)
+        if cache is not None:
+            cache.set(key, products)
+        return products
@@ -2,12 +2,20 @@
 
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 from ipyleaflet import Map, Polygon, WidgetControl, WMSLayer, basemaps
 from ipywidgets import SelectionSlider
 from traitlets import Unicode
 
+from eo_floods.providers.GFM.tiles import wms_layers
 from eo_floods.utils import get_centroid, get_dates_in_time_range
 
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from eo_floods.providers.GFM.tiles import TileProxy
+
 WMS_URL = "https://geoserver.gfm.eodc.eu/geoserver/gfm/wms"
 
 
@@ -20,13 +28,16 @@ class TimeWMSLayer(WMSLayer):
 class WMSMap:
     """Class for creating ipyleaflet WMS maps with a time slider."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         start_date: str,
         end_date: str,
         layers: str | list[str],
         bbox: list[float],
         wms_url: str = WMS_URL,
+        *,
+        tile_proxy: TileProxy | None = None,
+        times: Sequence[str | tuple[str, str]] | None = None,
     ) -> None:
         """Instantiate a WMSMap object.
 
@@ -42,12 +53,21 @@ class WMSMap:
             bounding box in [xmin, ymin, xmax, ymax] format
         wms_url : str, optional
             url of the WMS, by default WMS_URL
+        tile_proxy : TileProxy, optional
+            local proxy that caches and prefetches the tiles of the WMS, by default the
+            tiles are requested from the WMS directly
+        times : Sequence[str | tuple[str, str]], optional
+            times to offer in the time slider, either time stamps or (label, time stamp)
+            pairs, by default every day from start_date to end_date
 
         """
+        self.tile_proxy = tile_proxy
+        self.layers = wms_layers(layers)
+        self.times = list(times) if times is not None else None
         self.wms = TimeWMSLayer(
-            url=wms_url,
-            layers=layers,
-            time=start_date,
+            url=tile_proxy.url if tile_proxy is not None else wms_url,
+            layers=self.layers,
+            time=self._time_values()[0] if self.times else start_date,
             transparent=True,
             format="image/png",
         )
@@ -68,6 +88,8 @@ class WMSMap:
         m = Map(basemap=basemaps.OpenStreetMap.Mapnik, center=centroid)
         m.add(self.wms)
         self.slider = self._get_slider()
+        if self.tile_proxy is not None:
+            self.tile_proxy.set_times(self.layers, self._time_values())
         self.slider.observe(self._update_wms, "value")
         slider_cntrl = WidgetControl(widget=self.slider, position="bottomright")
         m.add(slider_cntrl)
@@ -82,8 +104,13 @@ class WMSMap:
         return m
 
     def _get_slider(self) -> SelectionSlider:
-        time_options = get_dates_in_time_range(self.start_date, self.end_date)
+        time_options = self.times or get_dates_in_time_range(self.start_date, self.end_date)
         return SelectionSlider(description="Time:", options=time_options)
 
+    def _time_values(self) -> list[str]:
+        if not self.times:
+            return get_dates_in_time_range(self.start_date, self.end_date)
+        return [time[1] if isinstance(time, tuple) else time for time in self.times]
+
     def _update_wms(self, value: int) -> None: #noqa: ARG002
         self.wms.time = self.slider.value
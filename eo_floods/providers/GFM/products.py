@@ -0,0 +1,313 @@
+"""Queries and a time index of the products of a GFM area of interest."""
+
+from __future__ import annotations
+
+import bisect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import TYPE_CHECKING, overload
+
+import requests
+
+from eo_floods import metrics
+from eo_floods.utils import date_parser
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from eo_floods.providers.GFM.client import GFMClient
+
+log = logging.getLogger(__name__)
+
+
+def time_slices(start_date: str, end_date: str, slice_days: int) -> list[tuple[str, str]]:
+    """Split a period in consecutive slices of at most slice_days days.
+
+    Parameters
+    ----------
+    start_date : str
+        first day of the period
+    end_date : str
+        last day of the period, inclusive
+    slice_days : int
+        maximum number of days per slice
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        start and end time of every slice in the format of the GFM API
+
+    """
+    start = date_parser(start_date).date()
+    end = date_parser(end_date).date()
+    slices = []
+    while start <= end:
+        slice_end = min(end, start + timedelta(days=slice_days - 1))
+        slices.append((_time(start, "00:00:00"), _time(slice_end, "23:59:59")))
+        start = slice_end + timedelta(days=1)
+    return slices
+
+
+def _time(day: date, clock: str) -> str:
+    return f"{day.isoformat()}T{clock}"
+
+
+class ProductQuery:
+    """Query the products of an AOI in time slices that are fetched concurrently.
+
+    Long periods are split in slices, so every request stays small and a failed slice is
+    retried on its own. Pages of a slice are followed through the `next` link of the
+    response. The products of all slices are merged, de-duplicated by product id and sorted
+    by product time.
+    """
+
+    def __init__(
+        self,
+        client: GFMClient,
+        *,
+        slice_days: int = 31,
+        max_workers: int = 4,
+        slice_retries: int = 2,
+    ) -> None:
+        """Instantiate a ProductQuery.
+
+        Parameters
+        ----------
+        client : GFMClient
+            client used for the requests
+        slice_days : int, optional
+            maximum number of days per request, by default 31
+        max_workers : int, optional
+            maximum number of slices fetched at the same time, by default 4
+        slice_retries : int, optional
+            number of times a failed slice is fetched again, on top of the retries of the
+            client, by default 2
+
+        """
+        self.client = client
+        self.slice_days = slice_days
+        self.max_workers = max_workers
+        self.slice_retries = slice_retries
+
+    def fetch(self, aoi_id: str, start_date: str, end_date: str) -> list[dict]:
+        """Fetch the products of an AOI within a period.
+
+        Parameters
+        ----------
+        aoi_id : str
+            id of the AOI
+        start_date : str
+            first day of the period
+        end_date : str
+            last day of the period, inclusive
+
+        Returns
+        -------
+        list[dict]
+            unique products sorted by product time
+
+        """
+        slices = time_slices(start_date, end_date, self.slice_days)
+        if len(slices) > 1:
+            log.info("Querying GFM products in %s slices", len(slices))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [
+                pool.submit(metrics.bind_context(self._fetch_slice), aoi_id, start, end)
+                for start, end in slices
+            ]
+            results = [future.result() for future in futures]
+        products = {product["product_id"]: product for result in results for product in result}
+        return sorted(products.values(), key=lambda product: product["product_time"])
+
+    def _fetch_slice(self, aoi_id: str, start: str, end: str) -> list[dict]:
+        for attempt in range(self.slice_retries + 1):
+            try:
+                return self._fetch_pages(aoi_id, start, end)
+            except requests.RequestException as e:
+                if attempt == self.slice_retries or not _is_transient(e):
+                    raise
+                log.warning("Query of GFM products from %s to %s failed, retrying", start, end)
+        return []
+
+    def _fetch_pages(self, aoi_id: str, start: str, end: str) -> list[dict]:
+        products = []
+        path = f"aoi/{aoi_id}/products"
+        params = {"time": "range", "from": start, "to": end}
+        while path:
+            r = self.client.get(path, params=params)
+            if r.status_code != 200:  # noqa: PLR2004
+                r.raise_for_status()
+            body = r.json()
+            products.extend(body["products"])
+            path = body.get("next")
+            if path:
+                # the next link already contains the query parameters
+                path = path.removeprefix(self.client.base_url)
+                params = None
+        return products
+
+
+def _is_transient(e: requests.RequestException) -> bool:
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code >= 500 or e.response.status_code == 429  # noqa: PLR2004
+    return True
+
+
+class ProductIndex:
+    """Products sorted by product time, with binary search queries on their time stamps.
+
+    The index holds the parsed time stamps, product ids and products in sorted lists. Queries
+    return new indexes that share the products with this index, so selections never modify
+    the index they were made from. The index behaves as a sequence of product dictionaries.
+    """
+
+    def __init__(self, products: list[dict]) -> None:
+        """Instantiate a ProductIndex.
+
+        Parameters
+        ----------
+        products : list[dict]
+            products as returned by the GFM API, with a product_id and a product_time
+
+        """
+        pairs = sorted(
+            ((_parse_time(product["product_time"]), product) for product in products),
+            key=lambda pair: pair[0],
+        )
+        self.times: list[datetime] = [time for time, _ in pairs]
+        self.ids: list[str] = [product["product_id"] for _, product in pairs]
+        self._products: list[dict] = [product for _, product in pairs]
+
+    @classmethod
+    def _from_sorted(cls, times: list[datetime], products: list[dict]) -> ProductIndex:
+        index = cls.__new__(cls)
+        index.times = times
+        index.ids = [product["product_id"] for product in products]
+        index._products = products  # noqa: SLF001
+        return index
+
+    def __len__(self) -> int:
+        """Return the number of products."""
+        return len(self._products)
+
+    def __iter__(self) -> Iterator[dict]:
+        """Iterate over the products in time order."""
+        return iter(self._products)
+
+    @overload
+    def __getitem__(self, item: int) -> dict: ...
+
+    @overload
+    def __getitem__(self, item: slice) -> ProductIndex: ...
+
+    def __getitem__(self, item: int | slice) -> dict | ProductIndex:
+        """Get a product by position, or a view of a slice of the products."""
+        if isinstance(item, slice):
+            return self._from_sorted(self.times[item], self._products[item])
+        return self._products[item]
+
+    def __repr__(self) -> str:
+        """Return a summary of the index."""
+        if not self:
+            return "ProductIndex([])"
+        return f"ProductIndex({len(self)} products, {self.times[0]} to {self.times[-1]})"
+
+    def to_list(self) -> list[dict]:
+        """Return the products as a list of dictionaries."""
+        return list(self._products)
+
+    def between(self, start: str | datetime, end: str | datetime) -> ProductIndex:
+        """Select the products from start up to and including end.
+
+        A date without a time as end includes the whole day.
+        """
+        end_time = _query_time(end)
+        if isinstance(end, str) and _is_day(end):
+            end_time += timedelta(days=1, microseconds=-1)
+        lo = bisect.bisect_left(self.times, _query_time(start))
+        hi = bisect.bisect_right(self.times, end_time)
+        return self[lo:hi]
+
+    def on_day(self, day: str | date) -> ProductIndex:
+        """Select the products of a single day."""
+        return self[slice(*self._day_bounds(day))]
+
+    def at(self, time: str | datetime) -> ProductIndex:
+        """Select the products with exactly the given time stamp."""
+        return self[slice(*self._time_bounds(time))]
+
+    def nearest(self, time: str | datetime) -> dict:
+        """Return the product closest in time to the given time stamp.
+
+        Raises
+        ------
+        ValueError
+            if the index is empty
+
+        """
+        if not self:
+            err_msg = "No products to select from"
+            raise ValueError(err_msg)
+        time = _query_time(time)
+        i = bisect.bisect_left(self.times, time)
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(self)]
+        return self._products[min(candidates, key=lambda j: abs(self.times[j] - time))]
+
+    def select(self, dates: list[str]) -> ProductIndex:
+        """Select the products matching any of the given time stamps or days.
+
+        A time stamp selects the products with that exact time, a date without a time selects
+        all products of that day.
+        """
+        positions: set[int] = set()
+        for value in dates:
+            bounds = self._day_bounds(value) if _is_day(value) else self._time_bounds(value)
+            positions.update(range(*bounds))
+        selection = sorted(positions)
+        return self._from_sorted(
+            [self.times[i] for i in selection],
+            [self._products[i] for i in selection],
+        )
+
+    def _day_bounds(self, day: str | date) -> tuple[int, int]:
+        day = date_parser(day).date() if isinstance(day, str) else day
+        start = datetime(day.year, day.month, day.day)  # noqa: DTZ001
+        return (
+            bisect.bisect_left(self.times, start),
+            bisect.bisect_left(self.times, start + timedelta(days=1)),
+        )
+
+    def _time_bounds(self, time: str | datetime) -> tuple[int, int]:
+        time = _query_time(time)
+        return bisect.bisect_left(self.times, time), bisect.bisect_right(self.times, time)
+
+    def by_day(self) -> dict[str, list[str]]:
+        """Group the product times by day."""
+        days: dict[str, list[str]] = {}
+        for time, product in zip(self.times, self._products, strict=True):
+            days.setdefault(time.date().isoformat(), []).append(product["product_time"])
+        return days
+
+
+def _parse_time(value: str) -> datetime:
+    """Parse a product time as a naive UTC datetime."""
+    try:
+        time = datetime.fromisoformat(value)
+    except ValueError:
+        time = date_parser(value)
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)  # noqa: UP017
+    return time
+
+
+def _query_time(value: str | datetime) -> datetime:
+    time = _parse_time(value) if isinstance(value, str) else value
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)  # noqa: UP017
+    return time
+
+
+def _is_day(value: str) -> bool:
+    """Check whether a date string has no time component."""
+    return ":" not in value
@@ -0,0 +1,288 @@
+"""Local caching proxy for the tiles of the GFM WMS."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from eo_floods.cache import DEFAULT_CACHE_DIR
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from typing import Self
+
+log = logging.getLogger(__name__)
+
+
+def wms_layers(layers: str | Sequence[str]) -> str:
+    """Return layers as the comma separated 'layers' parameter of a WMS request."""
+    return layers if isinstance(layers, str) else ",".join(layers)
+
+
+class TileCache:
+    """Disk cache of tiles with least recently used eviction."""
+
+    def __init__(self, path: str | Path | None = None, max_bytes: int = 500 * 2**20) -> None:
+        """Instantiate a TileCache.
+
+        Parameters
+        ----------
+        path : str or Path, optional
+            directory to store the tiles in, by default ~/.cache/eo_floods/tiles
+        max_bytes : int, optional
+            maximum total size of the tiles, the least recently used tiles are removed
+            first, by default 500 MiB
+
+        """
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "tiles"
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        files = sorted(self.path.glob("*.tile"), key=lambda file: file.stat().st_mtime)
+        self._sizes: OrderedDict[str, int] = OrderedDict(
+            (file.stem, file.stat().st_size) for file in files
+        )
+        self._size = sum(self._sizes.values())
+
+    def get(self, key: str) -> bytes | None:
+        """Get a tile, None if the tile is not cached."""
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            self._sizes.move_to_end(key)
+        try:
+            return self._file(key).read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self._size -= self._sizes.pop(key, 0)
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        """Store a tile and evict the least recently used tiles if the cache is full."""
+        tmp = self._file(key).with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(self._file(key))
+        with self._lock:
+            self._size += len(data) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(data)
+            while self._size > self.max_bytes and len(self._sizes) > 1:
+                old_key, size = self._sizes.popitem(last=False)
+                self._size -= size
+                self._file(old_key).unlink(missing_ok=True)
+
+    def __contains__(self, key: str) -> bool:
+        """Check whether a tile is cached."""
+        with self._lock:
+            return key in self._sizes
+
+    def __len__(self) -> int:
+        """Return the number of cached tiles."""
+        with self._lock:
+            return len(self._sizes)
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.tile"
+
+
+class TileProxy:
+    """Local HTTP server that serves WMS tiles from a TileCache.
+
+    The proxy forwards the query of every tile request to the upstream WMS and caches the
+    response. When the times of a layer are registered with `set_times`, a requested tile is
+    also prefetched in the background for the neighbouring times, so stepping through the
+    times of a map only has to wait for the first tile requests.
+
+    The map is loaded by the browser, so the proxy only works when the browser runs on the
+    same machine as the Python kernel.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        upstream: str,
+        cache: TileCache | None = None,
+        *,
+        prefetch_steps: int = 1,
+        max_workers: int = 4,
+        session: requests.Session | None = None,
+        timeout: float = 60,
+    ) -> None:
+        """Instantiate a TileProxy.
+
+        Parameters
+        ----------
+        upstream : str
+            url of the WMS
+        cache : TileCache, optional
+            cache to store the tiles in, by default a TileCache in the default location
+        prefetch_steps : int, optional
+            number of times before and after a requested time to prefetch, by default 1
+        max_workers : int, optional
+            maximum number of tiles prefetched at the same time, by default 4
+        session : requests.Session, optional
+            session for the upstream requests, by default a new session
+        timeout : float, optional
+            timeout in seconds of an upstream request, by default 60
+
+        """
+        self.upstream = upstream
+        self.cache = cache if cache is not None else TileCache()
+        self.prefetch_steps = prefetch_steps
+        self.session = session if session is not None else requests.Session()
+        self.timeout = timeout
+        self._times: dict[str, list[str]] = {}
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        """Url of the proxy, to use instead of the url of the WMS."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/wms"
+
+    def set_times(self, layers: str | Sequence[str], times: list[str]) -> None:
+        """Register the ordered times of a layer, enabling prefetching of its tiles.
+
+        Several layers shown together are given as a list or as a comma separated string.
+        """
+        with self._lock:
+            self._times[wms_layers(layers)] = list(times)
+
+    def get_tile(self, query: str, *, prefetch: bool = True) -> tuple[int, bytes, str]:
+        """Return a tile from the cache or the upstream WMS.
+
+        Parameters
+        ----------
+        query : str
+            query string of the WMS GetMap request
+        prefetch : bool, optional
+            prefetch the tile for the neighbouring times, by default True
+
+        Returns
+        -------
+        tuple[int, bytes, str]
+            the status code, content and content type of the response
+
+        """
+        params = parse_qsl(query, keep_blank_values=True)
+        key = _tile_key(params)
+        data = self.cache.get(key)
+        if data is not None:
+            status = 200
+            values = {name.lower(): value for name, value in params}
+            content_type = values.get("format", "image/png")
+        else:
+            status, data, content_type = self._fetch(params, key)
+        if prefetch:
+            self._prefetch(params)
+        return status, data, content_type
+
+    def close(self) -> None:
+        """Stop the server and the prefetching."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> Self:
+        """Use the proxy as a context manager that stops the server on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Stop the server."""
+        self.close()
+
+    def _fetch(self, params: list[tuple[str, str]], key: str) -> tuple[int, bytes, str]:
+        r = self.session.get(
+            f"{self.upstream}?{urlencode(params)}",
+            timeout=self.timeout,
+        )
+        content_type = r.headers.get("Content-Type", "application/octet-stream")
+        # WMS servers report errors as XML with status 200, those are not cached
+        if r.status_code == 200 and content_type.startswith("image/"):  # noqa: PLR2004
+            self.cache.set(key, r.content)
+        return r.status_code, r.content, content_type
+
+    def _prefetch(self, params: list[tuple[str, str]]) -> None:
+        values = {name.lower(): value for name, value in params}
+        with self._lock:
+            times = self._times.get(values.get("layers", ""))
+        if not times or values.get("time") not in times:
+            return
+        i = times.index(values["time"])
+        neighbours = [
+            times[j]
+            for step in range(1, self.prefetch_steps + 1)
+            for j in (i + step, i - step)
+            if 0 <= j < len(times)
+        ]
+        for time in neighbours:
+            tile = [
+                (name, time if name.lower() == "time" else value) for name, value in params
+            ]
+            key = _tile_key(tile)
+            with self._lock:
+                if key in self._pending or key in self.cache:
+                    continue
+                self._pending.add(key)
+            self._executor.submit(self._prefetch_tile, tile, key)
+
+    def _prefetch_tile(self, params: list[tuple[str, str]], key: str) -> None:
+        try:
+            self._fetch(params, key)
+        except requests.RequestException as e:
+            log.debug("Prefetching tile failed: %s", e)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                try:
+                    status, data, content_type = proxy.get_tile(urlsplit(self.path).query)
+                except requests.RequestException as e:
+                    log.warning("Fetching WMS tile failed: %s", e)
+                    status, data, content_type = 502, b"", "text/plain"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args: Any) -> None:  # noqa: ANN401
+                pass
+
+        return Handler
+
+
+def _tile_key(params: list[tuple[str, str]]) -> str:
+    query = urlencode(sorted((name.lower(), value) for name, value in params))
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+_proxies: dict[str, TileProxy] = {}
+_proxies_lock = threading.Lock()
+
+
+def get_tile_proxy(upstream: str) -> TileProxy:
+    """Return the tile proxy of a WMS, starting it on first use."""
+    with _proxies_lock:
+        if upstream not in _proxies:
+            _proxies[upstream] = TileProxy(upstream)
+        return _proxies[upstream]
@@ -0,0 +1,249 @@
+"""Cache of GFM access tokens shared between clients, threads and processes."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from eo_floods.cache import DEFAULT_CACHE_DIR
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+log = logging.getLogger(__name__)
+
+# lifetime assumed for tokens that do not state their expiry
+DEFAULT_TOKEN_TTL = 3600
+
+
+class Token(BaseModel):
+    """Login response of the GFM API and the time at which its access token expires."""
+
+    user: dict
+    expires_at: float
+
+    @property
+    def access_token(self) -> str:
+        """The bearer token to authenticate requests with."""
+        return self.user["access_token"]
+
+    def expires_within(self, seconds: float) -> bool:
+        """Check whether the token expires within the given number of seconds."""
+        return self.expires_at - seconds <= time.time()
+
+    @classmethod
+    def from_login(cls, user: dict) -> Token:
+        """Create a token from a login response, reading the expiry from the JWT if possible."""
+        return cls(user=user, expires_at=_token_expiry(user))
+
+
+def token_key(api_url: str, email: str) -> str:
+    """Create the key of an account in the token store, the email is not stored in clear."""
+    return hashlib.sha256(f"{api_url}\n{email.lower()}".encode()).hexdigest()
+
+
+class TokenStore:
+    """Store of GFM access tokens keyed by account.
+
+    Tokens are kept in memory and, when a path is given, in a JSON file that is only
+    readable by the current user. Logins are serialized with a lock file, so when many
+    processes need a token at the same time only one of them logs in and the others read
+    the token it stored.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        refresh_margin: float = 300,
+        lock_timeout: float = 180,
+    ) -> None:
+        """Instantiate a TokenStore.
+
+        Parameters
+        ----------
+        path : str or Path, optional
+            path of the JSON file to store the tokens in, by default the tokens are only
+            kept in memory
+        refresh_margin : float, optional
+            seconds before expiry at which a token is refreshed, by default 300
+        lock_timeout : float, optional
+            seconds to wait for the login of another process, by default 180
+
+        """
+        self.path = Path(path) if path is not None else None
+        self.refresh_margin = refresh_margin
+        self.lock_timeout = lock_timeout
+        self._tokens: dict[str, Token] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Token | None:
+        """Get a token that is valid for at least the refresh margin, None otherwise."""
+        with self._lock:
+            token = self._read(key)
+        if token is None or token.expires_within(self.refresh_margin):
+            return None
+        return token
+
+    def set(self, key: str, token: Token) -> None:
+        """Store a token."""
+        with self._lock, self._file_lock():
+            self._write(key, token)
+
+    def invalidate(self, key: str | None = None) -> None:
+        """Remove the token of an account, or all tokens when no key is given."""
+        with self._lock, self._file_lock():
+            self._write(key, None)
+
+    def get_or_login(
+        self,
+        key: str,
+        login: Callable[[], dict],
+        stale_token: str | None = None,
+    ) -> Token:
+        """Return a valid token from the store, logging in only when there is none.
+
+        Parameters
+        ----------
+        key : str
+            key of the account, see token_key
+        login : Callable[[], dict]
+            function that logs in and returns the login response
+        stale_token : str, optional
+            access token that was rejected by the API, it is not returned again even if it
+            has not expired yet, by default None
+
+        Returns
+        -------
+        Token
+            a token that is valid for at least the refresh margin
+
+        """
+        with self._lock, self._file_lock():
+            token = self._read(key)
+            if (
+                token is not None
+                and not token.expires_within(self.refresh_margin)
+                and token.access_token != stale_token
+            ):
+                return token
+            token = Token.from_login(login())
+            self._write(key, token)
+            return token
+
+    def _read(self, key: str) -> Token | None:
+        if self.path is not None:
+            self._tokens = self._load()
+        return self._tokens.get(key)
+
+    def _write(self, key: str | None, token: Token | None) -> None:
+        if self.path is not None:
+            self._tokens = self._load()
+        if key is None:
+            self._tokens.clear()
+        elif token is None:
+            self._tokens.pop(key, None)
+        else:
+            self._tokens[key] = token
+        now = time.time()
+        self._tokens = {k: v for k, v in self._tokens.items() if v.expires_at > now}
+        if self.path is not None:
+            self._dump()
+
+    def _load(self) -> dict[str, Token]:
+        try:
+            data = json.loads(self.path.read_text())
+            return {key: Token(**value) for key, value in data.items()}
+        except FileNotFoundError:
+            return {}
+        except (ValueError, TypeError):
+            log.warning("Ignoring corrupt GFM token store %s", self.path)
+            return {}
+
+    def _dump(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({key: token.model_dump() for key, token in self._tokens.items()}, f)
+        tmp.replace(self.path)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if self.path is None:
+            yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        lock = self.path.with_name(self.path.name + ".lock")
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                fd = os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                break
+            except FileExistsError:
+                if _is_stale(lock, self.lock_timeout):
+                    log.warning("Removing stale GFM token store lock %s", lock)
+                    lock.unlink(missing_ok=True)
+                    continue
+                if time.monotonic() > deadline:
+                    err_msg = f"Timed out waiting for the GFM token store lock {lock}"
+                    raise TimeoutError(err_msg) from None
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            lock.unlink(missing_ok=True)
+
+
+def _is_stale(lock: Path, timeout: float) -> bool:
+    try:
+        return time.time() - lock.stat().st_mtime > timeout
+    except FileNotFoundError:
+        return False
+
+
+def _token_expiry(user: dict) -> float:
+    """Read the expiry of the access token from its JWT claims or the login response."""
+    try:
+        payload = user["access_token"].split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+        pass
+    if "expires_in" in user:
+        return time.time() + float(user["expires_in"])
+    return time.time() + DEFAULT_TOKEN_TTL
+
+
+_store: TokenStore | None = None
+
+
+def get_token_store() -> TokenStore:
+    """Return the token store shared by the GFM clients.
+
+    Tokens are stored in ~/.cache/eo_floods/gfm_tokens.json, unless caching is disabled with
+    the environment variable EO_FLOODS_CACHE=0, in which case they are kept in memory.
+    """
+    global _store  # noqa: PLW0603
+    if _store is None:
+        path = None
+        if os.environ.get("EO_FLOODS_CACHE", "1") != "0":
+            path = DEFAULT_CACHE_DIR / "gfm_tokens.json"
+        _store = TokenStore(path)
+    return _store
+
+
+def set_token_store(store: TokenStore | None) -> None:
+    """Set the token store shared by the GFM clients, None restores the default store."""
+    global _store  # noqa: PLW0603
+    _store = store
@@ -1,7 +1,40 @@
 """Providers module."""
 
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+from typing import Any
+
 from .base import ProviderBase, Providers
-from .GFM.gfm import GFM
-from .hydrafloods.hydrafloods import HydraFloods
 
-__all___ = ["ProviderBase", "HydraFloods", "GFM", "Providers"]
+__all__ = ["GFM", "HydraFloods", "ProviderBase", "Providers"]
+
+_LAZY_IMPORTS = {
+    "GFM": "eo_floods.providers.GFM.gfm",
+    "HydraFloods": "eo_floods.providers.hydrafloods.hydrafloods",
+}
+
+
+class _ProvidersModule(types.ModuleType):
+    def __setattr__(self, name: str, value: Any) -> None:  # noqa: ANN401
+        # Importing the GFM subpackage binds it to this module, which would shadow the
+        # lazily imported GFM provider class, see __getattr__.
+        if name == "GFM" and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _ProvidersModule
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    err_msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(err_msg)
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_IMPORTS])
@@ -1,4 +1,24 @@
 """HydraFloods module."""
-from .hydrafloods import HydraFloods, HydraFloodsDataset
+
+from __future__ import annotations
+
+import importlib
+from typing import Any
 
 __all__ = ["HydraFloods", "HydraFloodsDataset"]
+
+_LAZY_IMPORTS = {
+    "HydraFloods": "eo_floods.providers.hydrafloods.hydrafloods",
+    "HydraFloodsDataset": "eo_floods.providers.hydrafloods.dataset",
+}
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    err_msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(err_msg)
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_IMPORTS])
@@ -2,15 +2,50 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+from datetime import date
 from enum import Enum
+from functools import partial
+from typing import TYPE_CHECKING
 
 import ee
-import hydrafloods as hf
 from pydantic import BaseModel
 
+from eo_floods.cache import cache_key
+from eo_floods.utils import date_parser
+
+if TYPE_CHECKING:
+    import hydrafloods as hf
+
 logger = logging.getLogger(__name__)
 
+DATE_FORMAT = "YYYY-MM-dd HH:mm:ss.SSS"
+
+
+class QualityScoreParams(BaseModel):
+    """Parameters for the reduction used to calculate quality scores.
+
+    Attributes
+    ----------
+    scale : float, optional
+        Scale in meters of the reduction, by default the native scale of the dataset.
+    target_pixels : float, optional
+        Maximum number of pixels to reduce per image. For large areas of interest the scale
+        is coarsened until the area fits in this budget. Set to None to always use the scale.
+    tile_scale : float
+        Earth Engine tileScale, increase to avoid memory errors on large reductions.
+    best_effort : bool
+        Let Earth Engine use a coarser scale when the reduction exceeds maxPixels.
+
+    """
+
+    scale: float | None = None
+    target_pixels: float | None = 1e7
+    tile_scale: float = 1
+    best_effort: bool = False
+
 
 class ImageryType(Enum):  # noqa: D101
     SAR = "SAR"
@@ -25,6 +60,31 @@ class Dataset(BaseModel):  # noqa: D101
     algorithm_params: dict
     visual_params: dict
     qa_band: str
+    native_scale: float
+    asset_id: str
+    coverage_start: date
+    coverage_end: date | None = None
+    orbit_property: str | None = None
+
+    def covers(self, start_date: str, end_date: str) -> bool:
+        """Whether the temporal coverage of the dataset intersects a time window.
+
+        Parameters
+        ----------
+        start_date : str
+            start date of the time window
+        end_date : str
+            end date of the time window, exclusive
+
+        Returns
+        -------
+        bool
+            False when the dataset has no images in the time window
+
+        """
+        if date_parser(end_date).date() <= self.coverage_start:
+            return False
+        return self.coverage_end is None or date_parser(start_date).date() <= self.coverage_end
 
 
 class Sentinel1(Dataset):  # noqa: D101
@@ -35,6 +95,10 @@ class Sentinel1(Dataset):  # noqa: D101
     algorithm_params: dict = {"edge_otsu": {"band": "VV", "invert": True, "initial_threshold": -16}}
     visual_params: dict = {"min": -25, "max": 0, "bands": ["VV"]}
     qa_band: str = "VV"
+    native_scale: float = 10
+    asset_id: str = "COPERNICUS/S1_GRD"
+    coverage_start: date = date(2014, 10, 3)
+    orbit_property: str | None = "relativeOrbitNumber_start"
     providers: list = ["GFM", "Hydrafloods"]
 
 
@@ -46,6 +110,10 @@ class Sentinel2(Dataset):  # noqa: D101
     algorithm_params: dict = {"edge_otsu": {"band": "mndwi"}}
     visual_params: dict = {}
     qa_band: str = "swir1"
+    native_scale: float = 20
+    asset_id: str = "COPERNICUS/S2_SR_HARMONIZED"
+    coverage_start: date = date(2017, 3, 28)
+    orbit_property: str | None = "SENSING_ORBIT_NUMBER"
     providers: list = ["Hydrafloods"]
 
 
@@ -57,6 +125,11 @@ class Landsat7(Dataset):  # noqa: D101
     algorithm_params: dict = {"edge_otsu": {"band": "mndwi"}}
     visual_params: dict = {"bands": ["swir1", "nir", "green"], "min": 0, "max": 0.5}
     qa_band: str = "swir1"
+    native_scale: float = 30
+    asset_id: str = "LANDSAT/LE07/C02/T1_L2"
+    coverage_start: date = date(1999, 5, 28)
+    coverage_end: date | None = date(2024, 1, 19)
+    orbit_property: str | None = "WRS_PATH"
     providers: list = ["Hydrafloods"]
 
 
@@ -68,6 +141,10 @@ class Landsat8(Dataset):  # noqa: D101
     algorithm_params: dict = {"edge_otsu": {"band": "mndwi"}}
     visual_params: dict = {"bands": ["swir1", "nir", "green"], "min": 0, "max": 0.5}
     qa_band: str = "swir1"
+    native_scale: float = 30
+    asset_id: str = "LANDSAT/LC08/C02/T1_L2"
+    coverage_start: date = date(2013, 3, 18)
+    orbit_property: str | None = "WRS_PATH"
     providers: list = ["Hydrafloods"]
 
 
@@ -79,6 +156,9 @@ class VIIRS(Dataset):  # noqa: D101
     algorithm_params: dict = {"edge_otsu": {"band": "mndwi"}}
     visual_params: dict = {}
     qa_band: str = "swir1"
+    native_scale: float = 500
+    asset_id: str = "NOAA/VIIRS/001/VNP09GA"
+    coverage_start: date = date(2012, 1, 19)
     providers: list = ["Hydrafloods"]
 
 
@@ -90,6 +170,10 @@ class MODIS(Dataset):  # noqa: D101
     algorithm_params: dict = {"edge_otsu": {"band": "mndwi"}}
     visual_params: dict = {}
     qa_band: str = "swir1"
+    native_scale: float = 500
+    asset_id: str = "MODIS/006/MOD09GA"
+    coverage_start: date = date(2000, 2, 24)
+    coverage_end: date | None = date(2023, 2, 24)
     providers: list = ["Hydrafloods"]
 
 
@@ -128,39 +212,80 @@ class HydraFloodsDataset:
         end_date : str
             End date of the time window of interest (YYY-mm-dd).
         kwargs: dict
-            key word arguments to pass to hydrafloods dataset intialization.
+            key word arguments to pass to hydrafloods dataset intialization. With an
+            'asset_id' the static metadata of the default asset, e.g. its native scale, is
+            not used.
 
         """
-        hf_datasets = {
-            "Sentinel-1": hf.Sentinel1,
-            "Sentinel-2": hf.Sentinel2,
-            "Landsat 7": hf.Landsat7,
-            "Landsat 8": hf.Landsat8,
-            "VIIRS": hf.Viirs,
-            "MODIS": hf.Modis,
-        }
         self.name: str = dataset.name
         self.short_name: str = dataset.short_name
         self.imagery_type: ImageryType = dataset.imagery_type
         self.default_flood_extent_algorithm: str = dataset.default_flood_extent_algorithm
         self.region = region
+        self.start_date = start_date
+        self.end_date = end_date
         self.qa_band = dataset.qa_band
+        self.asset_id: str = kwargs.get("asset_id", dataset.asset_id)
+        # the native scale of another collection is read from its images, see native_scale
+        self._native_scale: float | None = (
+            dataset.native_scale if self.asset_id == dataset.asset_id else None
+        )
         self.algorithm_params: dict = dataset.algorithm_params
         self.visual_params: dict = dataset.visual_params
         self.providers = dataset.providers
-        self.obj: hf.Dataset = hf_datasets[dataset.name](
-            region=region,
-            start_time=start_date,
-            end_time=end_date,
-            **kwargs,
-        )
-        logger.debug("Initialized hydrafloods dataset for %s", self.name)
-
-    def quality_score(self) -> list[float]:
+        self.orbit_property = dataset.orbit_property
+        self._kwargs = kwargs
+        self._obj: hf.Dataset | None = None
+
+    @property
+    def obj(self) -> hf.Dataset:
+        """The hydrafloods dataset, it is built on first use."""
+        if self._obj is None:
+            import hydrafloods as hf  # noqa: PLC0415
+
+            hf_datasets = {
+                "Sentinel-1": hf.Sentinel1,
+                "Sentinel-2": hf.Sentinel2,
+                "Landsat 7": hf.Landsat7,
+                "Landsat 8": hf.Landsat8,
+                "VIIRS": hf.Viirs,
+                "MODIS": hf.Modis,
+            }
+            self._obj = hf_datasets[self.name](
+                region=self.region,
+                start_time=self.start_date,
+                end_time=self.end_date,
+                **self._kwargs,
+            )
+            logger.debug("Initialized hydrafloods dataset for %s", self.name)
+        return self._obj
+
+    @obj.setter
+    def obj(self, obj: hf.Dataset) -> None:
+        self._obj = obj
+
+    @property
+    def native_scale(self) -> float | ee.Number:
+        """Native scale in meters, for another collection the scale of its first image."""
+        if self._native_scale is not None:
+            return self._native_scale
+        first = ee.Image(self.obj.collection.first()).select(self.qa_band)
+        return first.projection().nominalScale()
+
+    @property
+    def is_built(self) -> bool:
+        """Whether the hydrafloods dataset has been built."""
+        return self._obj is not None
+
+    def quality_score(self, params: QualityScoreParams | None = None) -> list[float]:
         """Calculate a quality score for satellite images.
 
         Quality score is the percentage of unmasked pixels present in the whole image.
 
+        Parameters
+        ----------
+        params : QualityScoreParams, optional
+            parameters of the reduction, by default QualityScoreParams()
 
         Returns
         -------
@@ -168,28 +293,133 @@ class HydraFloodsDataset:
            list of quality scores for every image in the dataset.
 
         """
+        self.obj.collection = self._quality_score_collection(params)
+        q_score = self.obj.collection.aggregate_array("q_score").getInfo()
+        return [round(score, 2) for score in q_score]
+
+    def metadata(self, params: QualityScoreParams | None = None) -> ee.Dictionary:
+        """Build a server-side dictionary describing the images in the dataset.
+
+        The dictionary contains the number of images, the image timestamps and the quality
+        scores. Nothing is evaluated here, so the dictionaries of several datasets can be
+        combined and fetched with a single request.
+
+        Parameters
+        ----------
+        params : QualityScoreParams, optional
+            parameters of the quality score reduction, by default QualityScoreParams()
+
+        Returns
+        -------
+        ee.Dictionary
+            dictionary with the keys 'n_images', 'dates' and 'q_scores'.
+
+        """
+        collection = self._quality_score_collection(params)
+        dates = collection.aggregate_array("system:time_start").map(
+            lambda x: ee.Date(x).format(DATE_FORMAT),
+        )
+        return ee.Dictionary(
+            {
+                "n_images": collection.size(),
+                "dates": dates,
+                "q_scores": collection.aggregate_array("q_score"),
+            },
+        )
+
+    def metadata_cache_key(self, params: QualityScoreParams | None = None) -> str:
+        """Cache key of the metadata of the dataset.
+
+        Besides the dataset name, region and dates, the key contains a hash of the
+        serialized collection, so filters applied to the collection give a new key. A
+        dataset that has not been built yet is keyed by its initialization arguments, so a
+        cache hit does not build it.
+        """
+        if params is None:
+            params = QualityScoreParams()
+        if self.is_built:
+            collection = self.obj.collection.serialize()
+        else:
+            collection = json.dumps(self._kwargs, sort_keys=True, default=str)
+        collection_hash = hashlib.sha256(collection.encode()).hexdigest()
+        return cache_key(
+            "Hydrafloods",
+            self.name,
+            self.region.serialize(),
+            self.start_date,
+            self.end_date,
+            filters={
+                "asset_id": self.asset_id,
+                "collection": collection_hash,
+                "quality_params": params.model_dump(),
+            },
+        )
+
+    def quality_score_scale(self, params: QualityScoreParams | None = None) -> ee.Number:
+        """Scale in meters used for calculating the quality scores.
+
+        The scale is the native scale of the dataset, unless a scale is given in the
+        parameters. When a pixel budget is set the scale is coarsened so that the area of
+        interest contains at most `target_pixels` pixels.
+
+        Parameters
+        ----------
+        params : QualityScoreParams, optional
+            parameters of the quality score reduction, by default QualityScoreParams()
+
+        Returns
+        -------
+        ee.Number
+            scale in meters
+
+        """
+        if params is None:
+            params = QualityScoreParams()
+        scale = ee.Number(params.scale if params.scale is not None else self.native_scale)
+        if params.target_pixels is None:
+            return scale
+        budget_scale = self.region.area(maxError=1).divide(params.target_pixels).sqrt()
+        return scale.max(budget_scale)
+
+    def _quality_score_collection(
+        self,
+        params: QualityScoreParams | None = None,
+    ) -> ee.ImageCollection:
+        """Return the dataset collection with a 'q_score' property set on every image."""
+        if params is None:
+            params = QualityScoreParams()
+        collection = self.obj.collection
         if self.name in [
             "VIIRS",
             "MODIS",
         ]:  # these datasets consist of global images, need to be clipped first before reducing
-            self.obj.apply_func(func=lambda x: x.clip(self.region), inplace=True)
-        self.obj.apply_func(
-            func=self._calculate_quality_score,
-            inplace=True,
-            band=self.qa_band,
-            geom=self.region,
+            collection = collection.map(lambda x: x.clip(self.region))
+        return collection.map(
+            partial(
+                self._calculate_quality_score,
+                band=self.qa_band,
+                geom=self.region,
+                scale=self.quality_score_scale(params),
+                tile_scale=params.tile_scale,
+                best_effort=params.best_effort,
+            ),
         )
-        q_score = self.obj.collection.aggregate_array("q_score").getInfo()
-        return [round(score, 2) for score in q_score]
 
     @staticmethod
-    def _calculate_quality_score(
+    def _calculate_quality_score(  # noqa: PLR0913
         image: ee.Image,
         band: str,
         geom: ee.Geometry | None = None,
+        scale: float | ee.Number = 30,
+        tile_scale: float = 1,
+        *,
+        best_effort: bool = False,
     ) -> ee.Image:
         """Calculate a quality score for an ee.Image.
 
+        The masked and the unmasked pixels are counted in a single reduction over a two
+        band image.
+
         Parameters
         ----------
         image : ee.Image
@@ -198,6 +428,12 @@ class HydraFloodsDataset:
             band name of the image
         geom : Optional[ee.Geometry], optional
             Earth engine geometry to reduce by, by default None
+        scale : float or ee.Number, optional
+            scale in meters of the reduction, by default 30
+        tile_scale : float, optional
+            Earth Engine tileScale of the reduction, by default 1
+        best_effort : bool, optional
+            use a coarser scale if the reduction exceeds maxPixels, by default False
 
         Returns
         -------
@@ -207,26 +443,22 @@ class HydraFloodsDataset:
         """
         if not geom:
             geom = ee.Geometry(ee.Image(image).select(band).geometry())
-        masked_pixel_count = (
-            image.select(band)
+        band_img = image.select([band])
+        pixel_counts = (
+            band_img.rename("masked")
+            .addBands(band_img.unmask().rename("total"))
             .reduceRegion(
                 reducer=ee.Reducer.count(),
                 geometry=geom,
-                scale=30,
+                scale=scale,
                 maxPixels=1e10,
+                tileScale=tile_scale,
+                bestEffort=best_effort,
             )
-            .get(band)
         )
-        total_pixel_count = (
-            image.select(band)
-            .unmask()
-            .reduceRegion(
-                reducer=ee.Reducer.count(),
-                geometry=geom,
-                scale=30,
-                maxPixels=1e10,
-            )
-            .get(band)
+        q_score = (
+            ee.Number(pixel_counts.get("masked"))
+            .divide(pixel_counts.get("total"))
+            .multiply(100)
         )
-        q_score = ee.Number(masked_pixel_count).divide(total_pixel_count).multiply(100)
         return image.set({"q_score": q_score})
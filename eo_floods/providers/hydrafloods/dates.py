@@ -0,0 +1,182 @@
+"""Compile date selections to Earth Engine filters."""
+
+from __future__ import annotations
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+import ee
+from pydantic import BaseModel
+
+from eo_floods.utils import date_parser
+
+if TYPE_CHECKING:
+    import hydrafloods as hf
+
+log = logging.getLogger(__name__)
+
+DAY_PROPERTY = "eo_floods:date"
+SECOND_PROPERTY = "eo_floods:second"
+EPOCH = datetime(1970, 1, 1)  # noqa: DTZ001
+# clock time in a date string, e.g. the "01:25" of "2022-10-05 01:25:51.000"
+CLOCK_TIME = re.compile(r"\d{1,2}:\d{2}")
+# intervals up to this number of seconds are selected by the inList filter on seconds
+MAX_LISTED_SECONDS = 60
+
+
+class DateInterval(BaseModel):
+    """Time interval with an inclusive start and exclusive end."""
+
+    start: datetime
+    end: datetime
+
+    @property
+    def whole_days(self) -> bool:
+        """Whether the interval starts and ends at midnight."""
+        return self.start.time() == datetime.min.time() and self.end.time() == datetime.min.time()
+
+    def to_filter(self) -> ee.Filter:
+        """Return an Earth Engine date filter for the interval."""
+        return ee.Filter.date(_to_millis(self.start), _to_millis(self.end))
+
+
+def parse_date_interval(date: str) -> DateInterval:
+    """Parse a date string to the interval it selects.
+
+    Dates without a time select the whole day, dates with a time select that second.
+
+    Parameters
+    ----------
+    date : str
+        date string, e.g. "2022-10-05" or "2022-10-05 01:25:51.000"
+
+    Returns
+    -------
+    DateInterval
+        the selected interval
+
+    """
+    try:
+        start = datetime.fromisoformat(date)
+    except ValueError:
+        start = date_parser(date)
+    start = start.replace(tzinfo=None)
+    if not CLOCK_TIME.search(date) and start.time() == datetime.min.time():
+        return DateInterval(start=start, end=start + timedelta(days=1))
+    start = start.replace(microsecond=0)
+    return DateInterval(start=start, end=start + timedelta(seconds=1))
+
+
+def merge_intervals(intervals: list[DateInterval]) -> list[DateInterval]:
+    """Merge overlapping and adjacent intervals.
+
+    Parameters
+    ----------
+    intervals : list[DateInterval]
+        intervals in any order
+
+    Returns
+    -------
+    list[DateInterval]
+        the minimal set of intervals covering the same time, sorted by start
+
+    """
+    merged: list[DateInterval] = []
+    for interval in sorted(intervals, key=lambda x: x.start):
+        if merged and interval.start <= merged[-1].end:
+            merged[-1] = DateInterval(
+                start=merged[-1].start,
+                end=max(merged[-1].end, interval.end),
+            )
+        else:
+            merged.append(interval)
+    return merged
+
+
+class DateSelection:
+    """Selection of images by a list of dates.
+
+    The dates are merged into the minimal set of intervals. Up to `max_intervals`
+    intervals are selected with date filters, larger selections are selected with a single
+    inList filter on a date property added to the images. Merged intervals that are longer
+    than a minute but do not cover whole days are still selected with a date filter.
+    """
+
+    def __init__(self, dates: list[str] | str, max_intervals: int = 10) -> None:
+        """Instantiate a DateSelection.
+
+        Parameters
+        ----------
+        dates : list[str] or str
+            dates to select, dates without a time select the whole day
+        max_intervals : int, optional
+            maximum number of date filters combined, by default 10
+
+        """
+        if isinstance(dates, str):
+            dates = [dates]
+        self.intervals = merge_intervals([parse_date_interval(date) for date in dates])
+        self.max_intervals = max_intervals
+
+    def to_filter(self) -> ee.Filter:
+        """Return a filter combining the date filters of all intervals."""
+        filters = [interval.to_filter() for interval in self.intervals]
+        if len(filters) == 1:
+            return filters[0]
+        return ee.Filter.Or(*filters)
+
+    def apply(self, dataset: hf.Dataset) -> None:
+        """Filter the collection of a hydrafloods dataset in place.
+
+        Parameters
+        ----------
+        dataset : hf.Dataset
+            dataset to filter
+
+        """
+        if len(self.intervals) <= self.max_intervals:
+            dataset.filter(self.to_filter(), inplace=True)
+            return
+        log.debug("Selecting %s date intervals with an inList filter", len(self.intervals))
+        days, seconds, ranges = self._expand()
+        filters = [interval.to_filter() for interval in ranges]
+        if days:
+            dataset.apply_func(_add_day_property, inplace=True)
+            filters.append(ee.Filter.inList(DAY_PROPERTY, days))
+        if seconds:
+            dataset.apply_func(_add_second_property, inplace=True)
+            filters.append(ee.Filter.inList(SECOND_PROPERTY, seconds))
+        dataset.filter(filters[0] if len(filters) == 1 else ee.Filter.Or(*filters), inplace=True)
+
+    def _expand(self) -> tuple[list[str], list[int], list[DateInterval]]:
+        """Split the intervals in listed days, listed seconds and remaining date ranges."""
+        days = []
+        seconds = []
+        ranges = []
+        for interval in self.intervals:
+            if interval.whole_days:
+                n_days = (interval.end - interval.start).days
+                days += [
+                    (interval.start + timedelta(days=i)).strftime("%Y-%m-%d")
+                    for i in range(n_days)
+                ]
+            elif interval.end - interval.start <= timedelta(seconds=MAX_LISTED_SECONDS):
+                start = _to_millis(interval.start) // 1000
+                seconds += list(range(start, _to_millis(interval.end) // 1000))
+            else:
+                ranges.append(interval)
+        return days, seconds, ranges
+
+
+def _to_millis(date: datetime) -> int:
+    return (date - EPOCH) // timedelta(milliseconds=1)
+
+
+def _add_day_property(image: ee.Image) -> ee.Image:
+    return image.set(DAY_PROPERTY, image.date().format("YYYY-MM-dd"))
+
+
+def _add_second_property(image: ee.Image) -> ee.Image:
+    return image.set(SECOND_PROPERTY, image.date().millis().divide(1000).floor().toLong())
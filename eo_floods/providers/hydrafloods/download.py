@@ -0,0 +1,325 @@
+"""Tiled download of Earth Engine images to local files."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import ee
+import requests
+from pydantic import BaseModel
+
+from eo_floods import metrics
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+log = logging.getLogger(__name__)
+
+METERS_PER_DEGREE = 111_320
+
+
+class Tile(BaseModel):
+    """Pixel grid of a single tile in EPSG:4326."""
+
+    row: int
+    col: int
+    x: float
+    y: float
+    width: int
+    height: int
+    pixel_size: float
+
+    @property
+    def bbox(self) -> list[float]:
+        """Bounding box of the tile in [xmin, ymin, xmax, ymax] format."""
+        return [
+            self.x,
+            self.y - self.height * self.pixel_size,
+            self.x + self.width * self.pixel_size,
+            self.y,
+        ]
+
+    def to_grid(self) -> dict:
+        """Return the tile as an Earth Engine PixelGrid dictionary."""
+        return {
+            "dimensions": {"width": self.width, "height": self.height},
+            "affineTransform": {
+                "scaleX": self.pixel_size,
+                "shearX": 0,
+                "translateX": self.x,
+                "shearY": 0,
+                "scaleY": -self.pixel_size,
+                "translateY": self.y,
+            },
+            "crsCode": "EPSG:4326",
+        }
+
+
+def tile_grid(bbox: list[float], scale: float, max_tile_pixels: int = 2**20) -> list[Tile]:
+    """Split a bounding box in tiles that each contain at most max_tile_pixels pixels.
+
+    Parameters
+    ----------
+    bbox : list[float]
+        bounding box in [xmin, ymin, xmax, ymax] format, in wgs84 coordinates
+    scale : float
+        pixel size in meters, converted to degrees at the equator
+    max_tile_pixels : int, optional
+        maximum number of pixels per tile, by default 2**20
+
+    Returns
+    -------
+    list[Tile]
+        tiles covering the bounding box, row by row starting at the top left
+
+    """
+    xmin, ymin, xmax, ymax = bbox
+    pixel_size = scale / METERS_PER_DEGREE
+    width = math.ceil((xmax - xmin) / pixel_size)
+    height = math.ceil((ymax - ymin) / pixel_size)
+    tile_size = math.isqrt(max_tile_pixels)
+    return [
+        Tile(
+            row=row,
+            col=col,
+            x=xmin + col * tile_size * pixel_size,
+            y=ymax - row * tile_size * pixel_size,
+            width=min(tile_size, width - col * tile_size),
+            height=min(tile_size, height - row * tile_size),
+            pixel_size=pixel_size,
+        )
+        for row in range(math.ceil(height / tile_size))
+        for col in range(math.ceil(width / tile_size))
+    ]
+
+
+class Transport(ABC):
+    """Transport that fetches the pixels of a tile as GeoTIFF bytes."""
+
+    @abstractmethod
+    def fetch(self, image: ee.Image, tile: Tile) -> bytes:
+        """Fetch the pixels of an image within a tile as a GeoTIFF."""
+
+
+class ComputePixelsTransport(Transport):
+    """Fetch tiles with ee.data.computePixels."""
+
+    def fetch(self, image: ee.Image, tile: Tile) -> bytes:  # noqa: D102
+        return ee.data.computePixels(
+            {
+                "expression": image,
+                "fileFormat": "GEO_TIFF",
+                "grid": tile.to_grid(),
+            },
+        )
+
+
+class DownloadURLTransport(Transport):
+    """Fetch tiles from the URL returned by ee.Image.getDownloadURL.
+
+    The URL is created by `get_url`, which can be overridden to point to another server.
+    """
+
+    def __init__(self, session: requests.Session | None = None, timeout: float = 300) -> None:
+        """Instantiate a DownloadURLTransport.
+
+        Parameters
+        ----------
+        session : requests.Session, optional
+            session used for the downloads, by default a new session
+        timeout : float, optional
+            timeout in seconds of a download, by default 300
+
+        """
+        self.session = session if session is not None else requests.Session()
+        self.timeout = timeout
+
+    def get_url(self, image: ee.Image, tile: Tile) -> str:
+        """Return the download URL of a tile."""
+        grid = tile.to_grid()
+        transform = grid["affineTransform"]
+        return image.getDownloadURL(
+            {
+                "format": "GEO_TIFF",
+                "crs": grid["crsCode"],
+                "crs_transform": [
+                    transform["scaleX"],
+                    transform["shearX"],
+                    transform["translateX"],
+                    transform["shearY"],
+                    transform["scaleY"],
+                    transform["translateY"],
+                ],
+                "dimensions": f"{tile.width}x{tile.height}",
+            },
+        )
+
+    def fetch(self, image: ee.Image, tile: Tile) -> bytes:  # noqa: D102
+        r = self.session.get(self.get_url(image, tile), timeout=self.timeout)
+        if r.status_code != 200:  # noqa: PLR2004
+            r.raise_for_status()
+        return r.content
+
+
+class TiledDownloader:
+    """Download images to local GeoTIFF files by fetching tiles concurrently."""
+
+    def __init__(
+        self,
+        transport: Transport | None = None,
+        max_workers: int = 8,
+        max_tile_pixels: int = 2**20,
+    ) -> None:
+        """Instantiate a TiledDownloader.
+
+        Parameters
+        ----------
+        transport : Transport, optional
+            transport used for fetching tiles, by default ComputePixelsTransport()
+        max_workers : int, optional
+            maximum number of tiles fetched at the same time, by default 8
+        max_tile_pixels : int, optional
+            maximum number of pixels per tile, by default 2**20
+
+        """
+        self.transport = transport if transport is not None else ComputePixelsTransport()
+        self.max_workers = max_workers
+        self.max_tile_pixels = max_tile_pixels
+
+    def download(
+        self,
+        images: Mapping[str, ee.Image],
+        bbox: list[float],
+        scale: float,
+        out_dir: str | Path,
+    ) -> dict[str, Path]:
+        """Download images to a local directory.
+
+        The tiles of all images are fetched by one thread pool and written to disk as they
+        arrive, so memory use is bounded by the number of workers. When rasterio is
+        installed the tiles of every image are merged in a single GeoTIFF, otherwise the
+        tiles are kept in a directory per image.
+
+        Parameters
+        ----------
+        images : Mapping[str, ee.Image]
+            images to download by name
+        bbox : list[float]
+            bounding box in [xmin, ymin, xmax, ymax] format to download
+        scale : float
+            pixel size in meters
+        out_dir : str or Path
+            directory to write the files to
+
+        Returns
+        -------
+        dict[str, Path]
+            path of the GeoTIFF or the tile directory of every image
+
+        """
+        out_dir = Path(out_dir)
+        tiles = tile_grid(bbox, scale, self.max_tile_pixels)
+        tile_dirs = {
+            name: _tile_dir(out_dir, name, bbox, scale, self.max_tile_pixels) for name in images
+        }
+        log.info("Downloading %s images in %s tiles each", len(images), len(tiles))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(
+                    metrics.bind_context(self._download_tile),
+                    image,
+                    tile,
+                    tile_dirs[name],
+                ): name
+                for name, image in images.items()
+                for tile in tiles
+            }
+            remaining = {name: len(tiles) for name in images}
+            for future in as_completed(futures):
+                future.result()
+                name = futures[future]
+                remaining[name] -= 1
+                if remaining[name] == 0:
+                    log.info("Downloaded %s", name)
+        return {name: _merge_tiles(tile_dirs[name], out_dir / f"{name}.tif") for name in images}
+
+    def _download_tile(self, image: ee.Image, tile: Tile, tile_dir: Path) -> Path:
+        tile_dir.mkdir(parents=True, exist_ok=True)
+        path = tile_dir / f"tile_{tile.row}_{tile.col}.tif"
+        if path.exists():
+            return path
+        content = self.transport.fetch(image, tile)
+        tmp_path = path.with_suffix(".part")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)  # noqa: PTH105
+        return path
+
+
+def _tile_dir(
+    out_dir: Path,
+    name: str,
+    bbox: list[float],
+    scale: float,
+    max_tile_pixels: int,
+) -> Path:
+    """Directory of the tiles of an image, unique per tile grid.
+
+    Tiles left by an interrupted download are reused, the grid is part of the directory name
+    so tiles of another area, scale or tile size are never merged into the image.
+    """
+    grid = json.dumps({"bbox": bbox, "scale": scale, "max_tile_pixels": max_tile_pixels})
+    digest = hashlib.sha256(grid.encode()).hexdigest()[:12]
+    return out_dir / f"{name}.tiles-{digest}"
+
+
+def _merge_tiles(tile_dir: Path, out_path: Path) -> Path:
+    """Merge the tiles of an image into one GeoTIFF, writing every tile into its own window.
+
+    Only one tile is held in memory at a time, the mosaic is never loaded as a whole.
+    """
+    try:
+        import rasterio  # noqa: PLC0415
+        from rasterio.transform import from_origin  # noqa: PLC0415
+        from rasterio.windows import from_bounds  # noqa: PLC0415
+    except ImportError:
+        log.info("rasterio is not installed, tiles of %s are not merged", tile_dir.name)
+        return tile_dir
+    tile_paths = sorted(tile_dir.glob("tile_*.tif"))
+    bounds = []
+    for path in tile_paths:
+        with rasterio.open(path) as src:
+            bounds.append(src.bounds)
+            if len(bounds) == 1:
+                profile = src.profile
+                x_res, y_res = src.res
+    left = min(b.left for b in bounds)
+    bottom = min(b.bottom for b in bounds)
+    right = max(b.right for b in bounds)
+    top = max(b.top for b in bounds)
+    transform = from_origin(left, top, x_res, y_res)
+    for key in ["blockxsize", "blockysize", "tiled"]:
+        profile.pop(key, None)
+    profile.update(
+        driver="GTiff",
+        height=round((top - bottom) / y_res),
+        width=round((right - left) / x_res),
+        transform=transform,
+    )
+    with rasterio.open(out_path, "w", **profile) as dst:
+        for path, tile_bounds in zip(tile_paths, bounds, strict=True):
+            window = from_bounds(*tile_bounds, transform=transform)
+            window = window.round_offsets().round_lengths()
+            with rasterio.open(path) as src:
+                dst.write(src.read(), window=window)
+    for path in tile_paths:
+        path.unlink()
+    tile_dir.rmdir()
+    return out_path
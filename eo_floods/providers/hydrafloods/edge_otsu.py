@@ -0,0 +1,362 @@
+"""Edge Otsu flood classification of local rasters with NumPy.
+
+The algorithm follows hydrafloods.edge_otsu (https://doi.org/10.3390/rs12152469): edges of
+an initial water/land classification are detected, the image is sampled in a buffer around
+long edges, and the Otsu threshold of the sampled histogram separates water from land.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from eo_floods.providers.hydrafloods.dataset import Dataset
+
+log = logging.getLogger(__name__)
+
+NODATA = 255
+
+
+class EdgeOtsuParams(BaseModel):
+    """Parameters of the edge Otsu algorithm, named as in hydrafloods.edge_otsu.
+
+    Attributes
+    ----------
+    band : str, optional
+        band the parameters apply to, e.g. "VV" or "mndwi", only used for reference
+    invert : bool
+        water has values below the threshold, e.g. for SAR backscatter, by default False
+    initial_threshold : float
+        initial estimate of the water/land threshold used to find the edges, by default 0
+    thresh_no_data : float, optional
+        threshold used when no edges are found, by default the initial threshold
+    canny_threshold : float
+        minimum gradient magnitude of an edge, by default 0.05
+    canny_sigma : float
+        sigma in pixels of the gaussian smoothing before the edge detection, by default 0
+    edge_length : int
+        minimum number of connected pixels of an edge, by default 50
+    connected_pixels : int
+        maximum number of connected pixels that are counted, by default 200
+    edge_buffer : float
+        distance in meters around the edges to sample the histogram in, by default 100
+    max_buckets : int
+        number of histogram buckets, by default 255
+
+    """
+
+    band: str | None = None
+    invert: bool = False
+    initial_threshold: float = 0
+    thresh_no_data: float | None = None
+    canny_threshold: float = 0.05
+    canny_sigma: float = 0
+    edge_length: int = 50
+    connected_pixels: int = 200
+    edge_buffer: float = 100
+    max_buckets: int = 255
+
+    @classmethod
+    def from_dataset(cls, dataset: Dataset) -> EdgeOtsuParams:
+        """Create the parameters from the edge_otsu algorithm parameters of a dataset."""
+        return cls(**dataset.algorithm_params["edge_otsu"])
+
+
+def mndwi(green: np.ndarray, swir1: np.ndarray) -> np.ndarray:
+    """Calculate the modified normalized difference water index."""
+    green = np.asarray(green, dtype=np.float32)
+    swir1 = np.asarray(swir1, dtype=np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (green - swir1) / (green + swir1)
+
+
+def otsu_threshold(values: np.ndarray, bins: int = 255) -> float | None:
+    """Return the value that maximizes the between class variance of a histogram.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        sample values, NaN values are ignored
+    bins : int, optional
+        number of histogram buckets, by default 255
+
+    Returns
+    -------
+    float | None
+        the mean value of the bucket with the maximum between class variance, None if there
+        are less than two distinct values. When buckets without values separate the
+        classes, the middle bucket of the gap is used.
+
+    """
+    values = values[np.isfinite(values)]
+    if values.size == 0 or values.min() == values.max():
+        return None
+    counts, edges = np.histogram(values, bins=bins)
+    sums, _ = np.histogram(values, bins=edges, weights=values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.where(counts > 0, sums / counts, (edges[:-1] + edges[1:]) / 2)
+    total = counts.sum()
+    mean = sums.sum() / total
+    counts_below = np.cumsum(counts)[:-1]
+    sums_below = np.cumsum(sums)[:-1]
+    counts_above = total - counts_below
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_below = sums_below / counts_below
+        mean_above = (sums.sum() - sums_below) / counts_above
+        between = counts_below * (mean_below - mean) ** 2 + counts_above * (mean_above - mean) ** 2
+    between = np.nan_to_num(between, nan=-1)
+    # empty buckets between the classes give a plateau of maxima, take its middle
+    best = np.flatnonzero(np.isclose(between, between.max(), rtol=1e-9, atol=0))
+    return float(means[best[len(best) // 2]])
+
+
+def edge_buffer_mask(image: np.ndarray, params: EdgeOtsuParams, pixel_size: float) -> np.ndarray:
+    """Return the pixels within the buffer around the long edges of the initial classification.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        2d image, NaN for missing values
+    params : EdgeOtsuParams
+        parameters of the algorithm
+    pixel_size : float
+        pixel size in meters
+
+    Returns
+    -------
+    np.ndarray
+        boolean mask of the pixels to sample the histogram from
+
+    """
+    valid = np.isfinite(image)
+    binary = ((image < params.initial_threshold) & valid).astype(np.float32)
+    if params.canny_sigma > 0:
+        binary = _gaussian(binary, params.canny_sigma)
+    padded = np.pad(binary, 1, mode="edge")
+    # sobel gradients
+    gx = (
+        padded[:-2, 2:] + 2 * padded[1:-1, 2:] + padded[2:, 2:]
+        - padded[:-2, :-2] - 2 * padded[1:-1, :-2] - padded[2:, :-2]
+    ) / 8
+    gy = (
+        padded[2:, :-2] + 2 * padded[2:, 1:-1] + padded[2:, 2:]
+        - padded[:-2, :-2] - 2 * padded[:-2, 1:-1] - padded[:-2, 2:]
+    ) / 8
+    # edges are kept on the water side only, so they are a single pixel wide
+    edges = (np.hypot(gx, gy) > params.canny_threshold) & (binary >= 0.5) & valid  # noqa: PLR2004
+    edges &= np.minimum(_component_sizes(edges), params.connected_pixels) >= params.edge_length
+    radius = round(params.edge_buffer / pixel_size)
+    return _dilate(edges, radius) & valid
+
+
+def edge_otsu(
+    image: np.ndarray,
+    params: EdgeOtsuParams,
+    pixel_size: float,
+) -> tuple[np.ndarray, float]:
+    """Classify the flooded pixels of an image with the edge Otsu algorithm.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        2d image of the thresholded band, e.g. VV backscatter or MNDWI, NaN for missing
+        values
+    params : EdgeOtsuParams
+        parameters of the algorithm
+    pixel_size : float
+        pixel size in meters
+
+    Returns
+    -------
+    tuple[np.ndarray, float]
+        the flood extent with 1 for water, 0 for land and NODATA for missing values, and
+        the threshold
+
+    """
+    image = np.asarray(image, dtype=np.float32)
+    sample = image[edge_buffer_mask(image, params, pixel_size)]
+    threshold = otsu_threshold(sample, params.max_buckets)
+    if threshold is None:
+        threshold = (
+            params.thresh_no_data
+            if params.thresh_no_data is not None
+            else params.initial_threshold
+        )
+        log.debug("No edges found, using threshold %s", threshold)
+    return apply_threshold(image, threshold, invert=params.invert), threshold
+
+
+def apply_threshold(image: np.ndarray, threshold: float, *, invert: bool) -> np.ndarray:
+    """Classify water as the pixels below (invert) or above the threshold."""
+    water = image <= threshold if invert else image >= threshold
+    flood = water.astype(np.uint8)
+    flood[~np.isfinite(image)] = NODATA
+    return flood
+
+
+class EdgeOtsuEngine:
+    """Classify stacks of images with the edge Otsu algorithm on multiple cores.
+
+    The scenes of a stack are split in chunks that are processed by a thread pool, NumPy
+    releases the GIL for the heavy operations. Only the chunks that are being processed are
+    converted to float32, so a stack can be a memory mapped array that does not fit in
+    memory, and the flood extents can be written to a memory mapped output array.
+    """
+
+    def __init__(
+        self,
+        params: EdgeOtsuParams,
+        pixel_size: float,
+        *,
+        max_workers: int | None = None,
+        chunk_size: int = 8,
+    ) -> None:
+        """Instantiate an EdgeOtsuEngine.
+
+        Parameters
+        ----------
+        params : EdgeOtsuParams
+            parameters of the algorithm
+        pixel_size : float
+            pixel size in meters of the images
+        max_workers : int, optional
+            number of threads, by default the number of cores
+        chunk_size : int, optional
+            number of scenes per chunk, by default 8
+
+        """
+        self.params = params
+        self.pixel_size = pixel_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_dataset(cls, dataset: Dataset, pixel_size: float | None = None) -> EdgeOtsuEngine:
+        """Create an engine with the parameters of a dataset, at its native scale by default."""
+        return cls(
+            EdgeOtsuParams.from_dataset(dataset),
+            pixel_size if pixel_size is not None else dataset.native_scale,
+        )
+
+    def classify(
+        self,
+        stack: np.ndarray,
+        out: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Classify the flooded pixels of a stack of images.
+
+        Parameters
+        ----------
+        stack : np.ndarray
+            images with shape (scenes, rows, columns), or a single image
+        out : np.ndarray, optional
+            uint8 array with the shape of the stack to write the flood extents to, by
+            default a new array
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            the flood extents and the threshold of every scene
+
+        """
+        single = np.ndim(stack) == 2  # noqa: PLR2004
+        if single:
+            stack = np.asarray(stack)[np.newaxis]
+        if out is None:
+            out = np.empty(stack.shape, dtype=np.uint8)
+        thresholds = np.empty(len(stack), dtype=np.float64)
+
+        def process(start: int) -> None:
+            for i in range(start, min(start + self.chunk_size, len(stack))):
+                out[i], thresholds[i] = edge_otsu(stack[i], self.params, self.pixel_size)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(process, range(0, len(stack), self.chunk_size)))
+        if single:
+            return out[0], thresholds
+        return out, thresholds
+
+    def thresholds(self, stack: np.ndarray) -> np.ndarray:
+        """Compute only the threshold of every scene of a stack, e.g. for parameter sweeps."""
+        thresholds = np.empty(len(stack), dtype=np.float64)
+
+        def process(start: int) -> None:
+            for i in range(start, min(start + self.chunk_size, len(stack))):
+                image = np.asarray(stack[i], dtype=np.float32)
+                sample = image[edge_buffer_mask(image, self.params, self.pixel_size)]
+                threshold = otsu_threshold(sample, self.params.max_buckets)
+                thresholds[i] = np.nan if threshold is None else threshold
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(process, range(0, len(stack), self.chunk_size)))
+        return thresholds
+
+
+def _gaussian(image: np.ndarray, sigma: float) -> np.ndarray:
+    radius = max(1, round(3 * sigma))
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-(x**2) / (2 * sigma**2))
+    kernel /= kernel.sum()
+    for axis in (0, 1):
+        padded = np.pad(image, [(radius, radius) if a == axis else (0, 0) for a in (0, 1)], "edge")
+        windows = np.lib.stride_tricks.sliding_window_view(padded, len(kernel), axis=axis)
+        image = windows @ kernel
+    return image
+
+
+def _dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """Dilate a mask with a square of 2 * radius + 1 pixels, with running sums per axis."""
+    if radius <= 0:
+        return mask.copy()
+    result = mask
+    for axis in (0, 1):
+        n = result.shape[axis]
+        counts = np.cumsum(result, axis=axis, dtype=np.int32)
+        counts = np.concatenate([np.zeros_like(counts.take([0], axis=axis)), counts], axis=axis)
+        upper = np.minimum(np.arange(n) + radius + 1, n)
+        lower = np.maximum(np.arange(n) - radius, 0)
+        result = (counts.take(upper, axis=axis) - counts.take(lower, axis=axis)) > 0
+    return result
+
+
+def _component_sizes(mask: np.ndarray) -> np.ndarray:
+    """Return the size of the 8-connected component of every pixel, 0 outside the mask."""
+    try:
+        from scipy import ndimage  # noqa: PLC0415
+    except ImportError:
+        labels = _label(mask)
+    else:
+        labels, _ = ndimage.label(mask, structure=np.ones((3, 3), dtype=bool))
+        labels = np.where(mask, labels, -1)
+    sizes = np.zeros(mask.shape, dtype=np.int64)
+    if mask.any():
+        _, inverse, counts = np.unique(labels[mask], return_inverse=True, return_counts=True)
+        sizes[mask] = counts[inverse]
+    return sizes
+
+
+def _label(mask: np.ndarray) -> np.ndarray:
+    """Label 8-connected components by propagating the minimum index with pointer jumping."""
+    rows, cols = mask.shape
+    background = mask.size
+    labels = np.where(mask, np.arange(mask.size).reshape(mask.shape), background)
+    while True:
+        padded = np.pad(labels, 1, constant_values=background)
+        neighbours = labels.copy()
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                np.minimum(neighbours, padded[dy : dy + rows, dx : dx + cols], out=neighbours)
+        new = np.where(mask, neighbours, background).ravel()
+        inside = new < background
+        # every label is the index of a pixel of the same component, jump to its label
+        new[inside] = new[new[inside]]
+        new = new.reshape(mask.shape)
+        if np.array_equal(new, labels):
+            return np.where(mask, labels, -1)
+        labels = new
@@ -0,0 +1,324 @@
+"""Scheduler for Earth Engine export tasks."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import ee
+from pydantic import BaseModel
+
+from eo_floods import metrics
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+FINISHED_TASK_STATES = ["COMPLETED"]
+FAILED_TASK_STATES = ["FAILED", "CANCELLED", "CANCEL_REQUESTED"]
+# a task that is not known to the server yet, e.g. right after it was started
+UNKNOWN_TASK_STATE = "UNKNOWN"
+# states of Earth Engine operations as task states
+OPERATION_STATES = {
+    "PENDING": "READY",
+    "RUNNING": "RUNNING",
+    "CANCELLING": "CANCEL_REQUESTED",
+    "SUCCEEDED": "COMPLETED",
+    "CANCELLED": "CANCELLED",
+    "FAILED": "FAILED",
+}
+
+
+class ExportState(Enum):  # noqa: D101
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+class ExportJob(BaseModel):
+    """State of a single export, as stored in the manifest."""
+
+    description: str
+    state: ExportState = ExportState.PENDING
+    task_id: str | None = None
+    attempts: int = 0
+    next_attempt: float = 0
+    unknown_since: float | None = None
+    error: str | None = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the job reached a final state."""
+        return self.state in [ExportState.COMPLETED, ExportState.FAILED, ExportState.SKIPPED]
+
+
+class TaskBackend(ABC):
+    """Backend that starts export tasks and reports their status."""
+
+    @abstractmethod
+    def start(self, create_task: Callable[[], ee.batch.Task]) -> str:
+        """Create and start a task and return its id."""
+
+    @abstractmethod
+    def status(self, task_ids: list[str]) -> dict[str, dict]:
+        """Return the status dictionaries of the given tasks by task id.
+
+        Every status dictionary has a 'state' key with an Earth Engine task state and,
+        for failed tasks, an 'error_message' key. Tasks that are not known to the server
+        may be left out.
+        """
+
+
+class EETaskBackend(TaskBackend):
+    """Task backend for Earth Engine batch tasks, identified by their operation name."""
+
+    def start(self, create_task: Callable[[], ee.batch.Task]) -> str:  # noqa: D102
+        task = create_task()
+        task.start()
+        return task.operation_name
+
+    def status(self, task_ids: list[str]) -> dict[str, dict]:  # noqa: D102
+        statuses = {}
+        for name in task_ids:
+            try:
+                operation = ee.data.getOperation(name)
+            except ee.EEException as e:
+                log.debug("No status of task %s: %s", name, e)
+                continue
+            state = operation.get("metadata", {}).get("state")
+            status = {"id": name, "state": OPERATION_STATES.get(state, UNKNOWN_TASK_STATE)}
+            if "error" in operation:
+                status["error_message"] = operation["error"].get("message", status["state"])
+            statuses[name] = status
+        return statuses
+
+
+class ExportScheduler:
+    """Queue export tasks and run a limited number of them at the same time.
+
+    Tasks are polled in a background thread. Failed tasks are retried with an exponential
+    backoff. When a manifest path is given the state of all jobs is written to disk after
+    every change, so an interrupted export can be resumed without resubmitting images that
+    were already exported or are still running.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        backend: TaskBackend | None = None,
+        manifest_path: str | Path | None = None,
+        *,
+        max_running: int = 3,
+        poll_interval: float = 10,
+        max_retries: int = 3,
+        backoff: float = 30,
+        unknown_timeout: float = 600,
+    ) -> None:
+        """Instantiate an ExportScheduler.
+
+        Parameters
+        ----------
+        backend : TaskBackend, optional
+            backend used to start and poll tasks, by default EETaskBackend()
+        manifest_path : str or Path, optional
+            path of the json file to persist the jobs to, by default None
+        max_running : int, optional
+            maximum number of tasks running at the same time, by default 3
+        poll_interval : float, optional
+            seconds between status requests, by default 10
+        max_retries : int, optional
+            number of times a failed task is resubmitted, by default 3
+        backoff : float, optional
+            seconds to wait before the first retry, doubled for every next retry,
+            by default 30
+        unknown_timeout : float, optional
+            seconds a started task may be unknown to the server before it is considered
+            failed, by default 600. Until then the task is treated as running, so it is not
+            submitted twice
+
+        """
+        self.backend = backend if backend is not None else EETaskBackend()
+        self.manifest_path = Path(manifest_path) if manifest_path is not None else None
+        self.max_running = max_running
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.unknown_timeout = unknown_timeout
+        self.jobs: dict[str, ExportJob] = self._load_manifest()
+        self._task_factories: dict[str, Callable[[], ee.batch.Task]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, description: str, create_task: Callable[[], ee.batch.Task]) -> ExportJob:
+        """Add an export to the queue.
+
+        Exports that are already in the manifest are not resubmitted, running exports are
+        polled and completed exports are skipped.
+
+        Parameters
+        ----------
+        description : str
+            unique description of the export task
+        create_task : Callable[[], ee.batch.Task]
+            function that creates the (unstarted) export task
+
+        Returns
+        -------
+        ExportJob
+            the job of the export
+
+        """
+        with self._lock:
+            self._task_factories[description] = create_task
+            job = self.jobs.get(description)
+            if job is None:
+                job = ExportJob(description=description)
+                self.jobs[description] = job
+            elif job.state in [ExportState.FAILED, ExportState.SKIPPED]:
+                # A failed or skipped job from a previous run gets a new set of retries
+                job.state = ExportState.PENDING
+                job.attempts = 0
+            elif job.state == ExportState.COMPLETED:
+                log.info("Skipping %s, already exported", description)
+            self._save_manifest()
+        return job
+
+    def start(self) -> None:
+        """Start submitting and polling tasks in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=metrics.bind_context(self._run), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread, tasks that are running on the server keep running."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def wait(self, timeout: float | None = None) -> dict[str, ExportJob]:
+        """Block until all jobs are finished.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            maximum number of seconds to wait, by default None
+
+        Returns
+        -------
+        dict[str, ExportJob]
+            the jobs by description
+
+        """
+        self.start()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            err_msg = "Export tasks did not finish within the given timeout"
+            raise TimeoutError(err_msg)
+        return self.jobs
+
+    @property
+    def finished(self) -> bool:
+        """Whether all jobs reached a final state."""
+        return all(job.done for job in self.jobs.values())
+
+    def step(self) -> None:
+        """Poll the running tasks once and submit pending tasks if there is capacity."""
+        with self._lock:
+            self._poll()
+            self._submit()
+            self._save_manifest()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.step()
+            if self.finished:
+                break
+            self._stop.wait(self.poll_interval)
+        n_failed = sum(job.state == ExportState.FAILED for job in self.jobs.values())
+        log.info("Export finished, %s of %s tasks failed", n_failed, len(self.jobs))
+
+    def _poll(self) -> None:
+        running = {
+            job.task_id: job for job in self.jobs.values() if job.state == ExportState.RUNNING
+        }
+        if not running:
+            return
+        statuses = self.backend.status(list(running))
+        now = time.time()
+        for task_id, job in running.items():
+            status = statuses.get(task_id, {"state": UNKNOWN_TASK_STATE})
+            if status["state"] == UNKNOWN_TASK_STATE:
+                if job.unknown_since is None:
+                    job.unknown_since = now
+                elif now - job.unknown_since > self.unknown_timeout:
+                    job.unknown_since = None
+                    self._retry_or_fail(job, f"Task {task_id} is unknown to the server")
+                continue
+            job.unknown_since = None
+            if status["state"] in FINISHED_TASK_STATES:
+                job.state = ExportState.COMPLETED
+                log.info("Export %s completed", job.description)
+            elif status["state"] in FAILED_TASK_STATES:
+                self._retry_or_fail(job, status.get("error_message", status["state"]))
+
+    def _submit(self) -> None:
+        n_running = sum(job.state == ExportState.RUNNING for job in self.jobs.values())
+        now = time.time()
+        for job in self.jobs.values():
+            if job.state == ExportState.PENDING and job.description not in self._task_factories:
+                # a pending job of a previous run whose export was not added again
+                job.state = ExportState.SKIPPED
+                log.info("Skipping %s, it is not part of this export", job.description)
+                continue
+            if n_running >= self.max_running:
+                break
+            if job.state != ExportState.PENDING or job.next_attempt > now:
+                continue
+            job.attempts += 1
+            try:
+                job.task_id = self.backend.start(self._task_factories[job.description])
+            except Exception as e:  # noqa: BLE001
+                self._retry_or_fail(job, str(e))
+                continue
+            job.state = ExportState.RUNNING
+            n_running += 1
+            log.info("Started export %s (attempt %s)", job.description, job.attempts)
+
+    def _retry_or_fail(self, job: ExportJob, error: str) -> None:
+        job.error = error
+        if job.attempts > self.max_retries:
+            job.state = ExportState.FAILED
+            log.warning("Export %s failed: %s", job.description, error)
+            return
+        job.state = ExportState.PENDING
+        job.next_attempt = time.time() + self.backoff * 2 ** (job.attempts - 1)
+        log.warning("Export %s failed, retrying: %s", job.description, error)
+
+    def _load_manifest(self) -> dict[str, ExportJob]:
+        if self.manifest_path is None or not self.manifest_path.exists():
+            return {}
+        with self.manifest_path.open() as f:
+            jobs = [ExportJob(**job) for job in json.load(f)]
+        log.info("Resuming %s export jobs from %s", len(jobs), self.manifest_path)
+        return {job.description: job for job in jobs}
+
+    def _save_manifest(self) -> None:
+        if self.manifest_path is None:
+            return
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(self.manifest_path.suffix + ".tmp")
+        with tmp_path.open("w") as f:
+            json.dump([job.model_dump(mode="json") for job in self.jobs.values()], f, indent=2)
+        os.replace(tmp_path, self.manifest_path)  # noqa: PTH105
@@ -2,30 +2,53 @@
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import logging
 import multiprocessing.pool
 import re
+from functools import partial
+from typing import TYPE_CHECKING
 
 import ee
 import ee.batch
-import geemap.foliumap as geemap
-import hydrafloods as hf
-from tabulate import tabulate
 
+from eo_floods import metrics
 from eo_floods.providers import ProviderBase
 from eo_floods.providers.hydrafloods.dataset import (
     Dataset,
     HydraFloodsDataset,
     ImageryType,
+    QualityScoreParams,
 )
+from eo_floods.providers.hydrafloods.dates import DateSelection
+from eo_floods.providers.hydrafloods.download import TiledDownloader
+from eo_floods.providers.hydrafloods.export import ExportScheduler, ExportState
+from eo_floods.providers.hydrafloods.images import CollectionImages
+from eo_floods.providers.hydrafloods.landmask import LandMask
+from eo_floods.providers.hydrafloods.metadata import AvailableData, fetch_metadata
+from eo_floods.providers.hydrafloods.monitor import (
+    Watermark,
+    WatermarkStore,
+    aggregate_flood_extents,
+    watermark_key,
+)
+from eo_floods.providers.hydrafloods.thresholds import THRESHOLD_MODES, CollectionThresholds
 from eo_floods.utils import (
     coords_to_ee_geom,
-    date_parser,
     get_centroid,
 )
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import geemap.foliumap as geemap
+
 log = logging.getLogger(__name__)
 
+# maximum length of the description of an Earth Engine export task
+MAX_DESCRIPTION_LENGTH = 100
+
 
 class HydraFloods(ProviderBase):
     """HydraFloods provider class."""
@@ -61,43 +84,36 @@ class HydraFloods(ProviderBase):
         self.initial_datasets = datasets
         self.datasets = [
             HydraFloodsDataset(dataset, self.ee_geometry, start_date, end_date)
-            for dataset in datasets
+            for dataset in _covering_datasets(datasets, start_date, end_date)
         ]
+        self._land_masks: dict[tuple[str, float], LandMask] = {}
 
-    def available_data(self) -> None:
+    def available_data(
+        self,
+        quality_params: QualityScoreParams | dict | None = None,
+    ) -> AvailableData:
         """Information on the given datasets for the given temporal and spatial resolution.
 
+        The image counts, timestamps and quality scores of all datasets are retrieved
+        with a single Earth Engine request.
+
+        Parameters
+        ----------
+        quality_params : QualityScoreParams or dict, optional
+            Parameters for the quality score reduction, e.g. {"tile_scale": 4}. By default
+            the native scale of each dataset is used within a budget of 1e7 pixels.
+
         Returns
         -------
-        List[dict]
-            List of dictionaries containing information on the datasets.
+        AvailableData
+            Object containing the metadata of every dataset.
 
         """
-        line0 = f"{'=' * 70}\n"
-        output = ""
-        for dataset in self.datasets:
-            n_images = dataset.obj.n_images
-            output += line0
-            output += f"Dataset name: {dataset.name}\n"
-
-            output += f"Number of images: {n_images}\n"
-            output += f"Dataset ID: {dataset.obj.asset_id}\n"
-            output += f"Providers: {', '.join(dataset.providers)}\n\n"
-
-            if n_images > 0:
-                dates = dataset.obj.dates
-                q_scores = dataset.quality_score()
-                table_list = [[x, y] for x, y in zip(dates, q_scores)]
-                table = tabulate(
-                    table_list,
-                    headers=["Timestamp", "Quality score (%)"],
-                    tablefmt="orgtbl",
-                )
-                output += table + "\n\n"
-            else:
-                output += "No images where found for the set time period.\n\n"
-
-        log.info(output)
+        if isinstance(quality_params, dict):
+            quality_params = QualityScoreParams(**quality_params)
+        available_data = fetch_metadata(self.datasets, quality_params)
+        log.info(available_data.to_table())
+        return available_data
 
     def view_data(
         self,
@@ -131,6 +147,8 @@ class HydraFloods(ProviderBase):
             a geemap.Map instance to visualize in a jupyter notebook
 
         """
+        import geemap.foliumap as geemap  # noqa: PLC0415
+
         m = geemap.Map(center=self.centroid, zoom=zoom)
         if isinstance(dates, str):
             dates = [dates]
@@ -140,7 +158,7 @@ class HydraFloods(ProviderBase):
             if dates is None:
                 dates = dataset.obj.dates
             for date in dates:
-                img = _filter_collection_by_dates(date, dataset)
+                img = dataset.obj.collection.filter(DateSelection(date).to_filter())
                 m.add_layer(
                     img,
                     vis_params=vis_params.get(
@@ -172,17 +190,22 @@ class HydraFloods(ProviderBase):
         if datasets:
             self.datasets = [dataset for dataset in self.datasets if dataset.name in datasets]
         if dates:
+            date_selection = DateSelection(dates)
             for dataset in self.datasets:
                 # Filter the dataset on dates
-                f = _multiple_dates_filter(dates) if len(dates) > 1 else _date_filter(dates[0])
-                dataset.obj.filter(f, inplace=True)
+                date_selection.apply(dataset.obj)
 
-    def _generate_flood_extents(
+    def _generate_flood_extents(  # noqa: PLR0913
         self,
         dates: list[str] | None = None,
         *,
         clip_ocean: bool = True,
         mask_permanent_water: bool = True,
+        land_mask_method: str = "vector",
+        land_mask_tolerance: float = 100,
+        threshold_mode: str = "image",
+        cache_thresholds: bool = False,
+        watermarks: dict[str, int] | None = None,
     ) -> None:
         """Generate flood extents for the given temporal and spatial resolution.
 
@@ -192,22 +215,51 @@ class HydraFloods(ProviderBase):
             list of date strings for making a subselection of images.
         clip_ocean : bool, optional
             Option for clipping ocean pixels from the images. Ocean pixels can negatively
-            influence the edge otsu algorithm. The clipping is done by using country
-            borders, so be aware when your region of interest is across country
-            boundaries. By default True.
+            influence the edge otsu algorithm. The clipping is done by using the borders of
+            all countries that intersect the region of interest. By default True.
         mask_permanent_water : bool, if set to True this will mask permanent water. Permanent water
             is defined as 75% occurrence in JRC Global Surface water. By default True
+        land_mask_method : str, optional
+            "vector" clips the images by the land geometry, "raster" masks the images with
+            a rasterized land mask which is cheaper for large collections. By default "vector"
+        land_mask_tolerance : float, optional
+            error margin in meters for simplifying the land geometry, by default 100
+        threshold_mode : str, optional
+            "image" computes an edge Otsu threshold for every image, "collection", "orbit"
+            and "week" compute one threshold for all images, per relative orbit or per week
+            from the summed histograms of the images. By default "image"
+        cache_thresholds : bool, optional
+            store the thresholds of the "collection", "orbit" and "week" modes in the
+            metadata cache and reuse them in later runs, by default False
+        watermarks : dict[str, int], optional
+            system:time_start in milliseconds of the latest processed scene by dataset name,
+            only the scenes after it are processed, the datasets of the provider are not
+            filtered. By default all scenes are processed
 
         Returns
         -------
             None
 
         """
+        import hydrafloods as hf  # noqa: PLC0415
+
+        if threshold_mode not in THRESHOLD_MODES:
+            err_msg = f"Threshold mode '{threshold_mode}' not supported, choose from: " + ", ".join(
+                THRESHOLD_MODES,
+            )
+            raise ValueError(err_msg)
+
         flood_extents = {}
         jrc_water_occurrence = ee.image.Image("JRC/GSW1_4/GlobalSurfaceWater")
         permanent_water_mask = jrc_water_occurrence.select(["occurrence"]).gte(50).eq(0)
         for dataset in self.datasets:
             log.info("Generating flood extents for %s dataset", dataset.name)
+            if watermarks and dataset.name in watermarks:
+                # the watermark only applies to this run, self.datasets keep all scenes
+                dataset = copy.copy(dataset)  # noqa: PLW2901
+                dataset.obj = dataset.obj.filter(
+                    ee.Filter.gt("system:time_start", watermarks[dataset.name]),
+                )
             if dataset.obj.n_images < 1:
                 warn_msg = (
                     f"{dataset.name} has no images for date range{self.start_date}/{self.end_date}."
@@ -218,21 +270,13 @@ class HydraFloods(ProviderBase):
                 continue
             if dates:
                 # Filter the dataset on dates
-                f = _multiple_dates_filter(dates) if len(dates) > 1 else _date_filter(dates[0])
-                dataset.obj.filter(f, inplace=True)
+                DateSelection(dates).apply(dataset.obj)
 
             # Clip
             if clip_ocean:
                 log.info("Clipping image to country boundaries")
-                country_boundary = (
-                    ee.FeatureCollection("FAO/GAUL_SIMPLIFIED_500m/2015/level0")
-                    .filterBounds(self.ee_geometry)
-                    .first()
-                    .geometry()
-                )
-
-                clipped_data = dataset.obj.collection.map(lambda img: img.clip(country_boundary))  # noqa: B023
-                dataset.obj = hf.Dataset.from_imgcollection(clipped_data)
+                land_mask = self._get_land_mask(land_mask_method, land_mask_tolerance)
+                dataset.obj.apply_func(land_mask.apply, inplace=True)
             if dataset.imagery_type == ImageryType.OPTICAL:
                 log.debug("Calculating MNDWI for %s", dataset.name)
                 dataset.obj.apply_func(
@@ -241,11 +285,18 @@ class HydraFloods(ProviderBase):
                     inplace=True,
                 )
                 dataset.obj.apply_func(lambda x: x.cast({"mndwi": "double"}), inplace=True)
-            log.info("Applying edge-otsu thresholding")
-            flood_extent = dataset.obj.apply_func(
-                hf.edge_otsu,
-                **dataset.algorithm_params["edge_otsu"],
-            )
+            if threshold_mode == "image":
+                log.info("Applying edge-otsu thresholding")
+                flood_extent = dataset.obj.apply_func(
+                    hf.edge_otsu,
+                    **dataset.algorithm_params["edge_otsu"],
+                )
+            else:
+                log.info("Applying edge-otsu thresholding, one threshold per %s", threshold_mode)
+                flood_extent = CollectionThresholds(
+                    threshold_mode,
+                    cache_thresholds=cache_thresholds,
+                ).apply(dataset)
 
             # Invert values of flood extent so that water=1, land=0
             flood_extent = flood_extent.apply_func(
@@ -258,19 +309,22 @@ class HydraFloods(ProviderBase):
 
             flood_extents[dataset.name] = flood_extent
         self.flood_extents = flood_extents
+        self._flood_extent_images = {}
 
     def generate_flood_depths(self) -> None:
         """Generate flood depths."""
         raise NotImplementedError
 
-    def view_flood_extents(
+    def view_flood_extents(  # noqa: PLR0913
         self,
         dates: list[str] | None = None,
         zoom: int = 8,
-        timeout: int = 60,
+        timeout: float | None = 60,
         *,
         clip_ocean: bool = False,
         mask_permanent_water: bool = True,
+        threshold_mode: str = "image",
+        cache_thresholds: bool = False,
     ) -> geemap.Map:
         """View the flood extents on a geemap.Map object.
 
@@ -280,13 +334,19 @@ class HydraFloods(ProviderBase):
             list of dates to view the data for
         zoom : int, optional
             Zoom level of the map window, by default 8
-        timeout: int
+        timeout: float, optional
             timeout in seconds, this function can take a long time to process all the data
-            and can thus be given an timeout.
+            and can thus be given an timeout. With None the map is plotted in the calling
+            thread without a timeout, by default 60
         clip_ocean: bool
             Images will be clipped by country and ocean borders
         mask_permanent_water: boolIf set to True this will mask permanent water. Permanent water
             is defined as 75% occurrence in JRC Global Surface water. By default True
+        threshold_mode : str, optional
+            "image", "collection", "orbit" or "week", see _generate_flood_extents. By
+            default "image"
+        cache_thresholds : bool, optional
+            reuse the thresholds of earlier runs from the metadata cache, by default False
 
         Returns
         -------
@@ -296,17 +356,23 @@ class HydraFloods(ProviderBase):
 
         """
         if not hasattr(self, "flood_extents"):
-            self._generate_flood_extents(
-                dates=dates,
-                clip_ocean=clip_ocean,
-                mask_permanent_water=mask_permanent_water,
-            )
+            with metrics.stage("generate"):
+                self._generate_flood_extents(
+                    dates=dates,
+                    clip_ocean=clip_ocean,
+                    mask_permanent_water=mask_permanent_water,
+                    threshold_mode=threshold_mode,
+                    cache_thresholds=cache_thresholds,
+                )
 
+        if timeout is None:
+            return self._plot_flood_extents(zoom)
         try:
             with multiprocessing.pool.ThreadPool() as pool:
-                return_value = pool.apply_async(self._plot_flood_extents, (zoom,)).get(
-                    timeout=timeout,
-                )
+                return_value = pool.apply_async(
+                    metrics.bind_context(self._plot_flood_extents),
+                    (zoom,),
+                ).get(timeout=timeout)
         except multiprocessing.TimeoutError as exc:
             err_msg = (
                 "Plotting flood extents has timed out, increase the time out"
@@ -325,19 +391,35 @@ class HydraFloods(ProviderBase):
         clip_ocean: bool = True,
         dates: list[str] | None = None,
         scale: float = 30,
+        scheduler: ExportScheduler | None = None,
+        manifest_path: str | None = None,
+        max_running: int = 3,
+        wait: bool = False,
+        downloader: TiledDownloader | None = None,
+        threshold_mode: str = "image",
+        cache_thresholds: bool = False,
         **kwargs: dict,
-    ) -> None:
-        """Export the generated data to a Google Drive or as Earth Engine asset.
+    ) -> ExportScheduler | dict[str, Path]:
+        """Export the generated data to a Google Drive, as Earth Engine asset or to local files.
+
+        The Drive and asset export tasks are queued in an ExportScheduler that keeps at most
+        `max_running` tasks running and polls their status. By default the tasks are submitted
+        in a background thread and the scheduler is returned right away, the Python process
+        has to stay alive until the export is done, e.g. with scheduler.wait(). With
+        `wait=True` the call blocks until all tasks are finished. Local exports are downloaded
+        directly in tiles, without going through the Earth Engine task queue.
 
         Parameters
         ----------
         export_type : str, optional
-            Two options for exporting data: "toAsset", "toDrive", by default "toDrive"
+            Three options for exporting data: "toAsset", "toDrive", "toLocal", by default
+            "toDrive"
         include_base_data : bool, optional
             The base data can be exported as well. Be aware that this data is often
             of a large size and takes a long time to export, by default False.
         folder : str, optional
-            Name of folder on Google Drive to export the data to, by default None
+            Name of folder on Google Drive to export the data to, or the local directory
+            for "toLocal", by default "EO_Floods"
         ee_asset_path : str, optional
             Earth Engine path to export the data to, by default ""
         clip_ocean: bool
@@ -347,25 +429,63 @@ class HydraFloods(ProviderBase):
         scale : int or float, optional
             Scale (resolution) in meters at which the image is exported, by default
             the scale of the flood extent image.
+        scheduler : ExportScheduler, optional
+            scheduler to queue the export tasks in, by default a new ExportScheduler
+        manifest_path : str, optional
+            path of a json file in which the state of the export tasks is kept. Exporting
+            again with the same manifest resumes an interrupted export, by default None
+        max_running : int, optional
+            maximum number of export tasks running at the same time, by default 3
+        wait : bool, optional
+            block until all export tasks are finished, by default False. Otherwise the queued
+            tasks are only submitted while the Python process keeps running
+        downloader : TiledDownloader, optional
+            downloader for "toLocal" exports, by default TiledDownloader()
+        threshold_mode : str, optional
+            "image", "collection", "orbit" or "week", see _generate_flood_extents. By
+            default "image"
+        cache_thresholds : bool, optional
+            reuse the thresholds of earlier runs from the metadata cache, by default False
+
+        Returns
+        -------
+        ExportScheduler or dict[str, Path]
+            the scheduler that runs the export tasks, or for "toLocal" the paths of the
+            downloaded files by image name
 
         """
         if export_type == "toDrive":
             folder = "EO_Floods"
 
         if not hasattr(self, "flood_extents"):
-            self._generate_flood_extents(dates, clip_ocean=clip_ocean)
+            self._generate_flood_extents(
+                dates,
+                clip_ocean=clip_ocean,
+                threshold_mode=threshold_mode,
+                cache_thresholds=cache_thresholds,
+            )
+        if export_type == "toLocal":
+            return self._export_local(
+                downloader=downloader if downloader is not None else TiledDownloader(),
+                out_dir=folder if folder is not None else "EO_Floods",
+                scale=scale,
+                include_base_data=include_base_data,
+            )
+        if scheduler is None:
+            scheduler = ExportScheduler(manifest_path=manifest_path, max_running=max_running)
         for ds in self.flood_extents:
             log_msg = f"Exporting {ds} flood extents {export_type[:2] + ' ' + export_type[2:]}"
             log.info(log_msg)
 
             _export_ee_collection(
-                collection=self.flood_extents[ds].collection,
+                images=self._get_flood_extent_images(ds),
                 region=self.ee_geometry,
                 description=f"{ds.replace(' ', '_')}_flood_extent",
                 scale=scale,
                 export_type=export_type,
                 folder=folder,
                 ee_asset_path=ee_asset_path,
+                scheduler=scheduler,
             )
 
         if include_base_data:
@@ -373,14 +493,146 @@ class HydraFloods(ProviderBase):
                 log_msg = f"Exporting {dataset.name} {export_type[:2] + ' ' + export_type[2:]}"
                 log.info(log_msg)
                 _export_ee_collection(
-                    collection=dataset.obj.collection,
+                    images=CollectionImages(dataset.obj.collection),
                     region=self.ee_geometry,
                     description=f"{dataset.short_name}_EO_Floodmap",
                     export_type=export_type,
                     ee_asset_path=ee_asset_path,
                     folder=folder,
                     scale=scale,
+                    scheduler=scheduler,
+                )
+        scheduler.start()
+        if wait:
+            scheduler.wait()
+        else:
+            log.info(
+                "Export tasks are submitted in the background, at most %s at a time. Keep the"
+                " Python process running until the export is finished, e.g. with"
+                " scheduler.wait()",
+                scheduler.max_running,
+            )
+        return scheduler
+
+    def update_monitor(
+        self,
+        asset_root: str,
+        *,
+        store: WatermarkStore | None = None,
+        scale: float = 30,
+        scheduler: ExportScheduler | None = None,
+        timeout: float | None = None,
+        **kwargs: dict,
+    ) -> dict[str, Watermark]:
+        """Process the scenes ingested since the previous run and update the aggregates.
+
+        Only the scenes after the watermark of every dataset are classified. Their flood
+        extents are combined with the aggregates of the previous runs into a new Earth Engine
+        asset with the maximum flood extent and the flood and observation counts, see
+        aggregate_flood_extents and flood_frequency. The watermark of a dataset is only
+        advanced when the export of its aggregates completed, so a failed run is repeated
+        by the next run.
+
+        Parameters
+        ----------
+        asset_root : str
+            Earth Engine folder to export the aggregates to, e.g.
+            "projects/my-project/assets/monitor"
+        store : WatermarkStore, optional
+            store of the watermarks, by default WatermarkStore()
+        scale : float, optional
+            scale in meters of the aggregates, by default 30
+        scheduler : ExportScheduler, optional
+            scheduler to run the export tasks in, by default a new ExportScheduler
+        timeout : float, optional
+            maximum number of seconds to wait for the exports, by default None
+        kwargs : dict
+            keyword arguments passed to _generate_flood_extents, e.g. clip_ocean
+
+        Returns
+        -------
+        dict[str, Watermark]
+            the watermarks after the run by dataset name, for datasets that were processed
+            in this or an earlier run
+
+        """
+        if store is None:
+            store = WatermarkStore()
+        keys = {dataset.name: watermark_key(dataset.name, self.bbox) for dataset in self.datasets}
+        previous = {name: store.get(key) for name, key in keys.items()}
+        self._generate_flood_extents(
+            watermarks={name: mark.time_start for name, mark in previous.items() if mark},
+            **kwargs,
+        )
+        if scheduler is None:
+            scheduler = ExportScheduler()
+        short_names = {dataset.name: dataset.short_name for dataset in self.datasets}
+        updates = {}
+        for ds, flood_extent in self.flood_extents.items():
+            refs = self._get_flood_extent_images(ds).refs
+            if not refs:
+                log.info("No new %s scenes since the previous run", ds)
+                continue
+            mark = previous[ds]
+            time_start = refs[-1].time_start
+            aggregates = aggregate_flood_extents(
+                flood_extent.collection,
+                ee.Image(mark.aggregates) if mark and mark.aggregates else None,
+            )
+            description = f"{short_names[ds]}_flood_aggregates_{time_start}"
+            log.info("Aggregating %s new %s scenes into %s", len(refs), ds, description)
+            scheduler.add(
+                description,
+                partial(
+                    ee.batch.Export.image.toAsset,
+                    aggregates,
+                    description=description,
+                    assetId=f"{asset_root.rstrip('/')}/{description}",
+                    region=self.ee_geometry,
+                    scale=scale,
+                    maxPixels=1e13,
+                ),
+            )
+            updates[ds] = (
+                description,
+                Watermark(
+                    time_start=time_start,
+                    n_scenes=len(refs) + (mark.n_scenes if mark else 0),
+                    aggregates=f"{asset_root.rstrip('/')}/{description}",
+                ),
+            )
+        jobs = scheduler.wait(timeout=timeout) if updates else {}
+        for ds, (description, mark) in updates.items():
+            if jobs[description].state == ExportState.COMPLETED:
+                store.set(keys[ds], mark)
+            else:
+                log.warning(
+                    "Exporting the %s aggregates failed (%s), the watermark is not advanced",
+                    ds,
+                    jobs[description].error,
                 )
+        watermarks = {name: store.get(key) for name, key in keys.items()}
+        return {name: mark for name, mark in watermarks.items() if mark is not None}
+
+    def _export_local(
+        self,
+        downloader: TiledDownloader,
+        out_dir: str,
+        scale: float,
+        *,
+        include_base_data: bool,
+    ) -> dict[str, Path]:
+        images = {}
+        for ds in self.flood_extents:
+            log.info("Exporting %s flood extents to %s", ds, out_dir)
+            for ref, img in self._get_flood_extent_images(ds):
+                images[_task_description(f"{ds}_flood_extent", ref.index)] = img
+        if include_base_data:
+            for dataset in self.datasets:
+                log.info("Exporting %s to %s", dataset.name, out_dir)
+                for ref, img in CollectionImages(dataset.obj.collection):
+                    images[_task_description(f"{dataset.short_name}_EO_Floodmap", ref.index)] = img
+        return downloader.download(images, bbox=self.bbox, scale=scale, out_dir=out_dir)
 
     def _plot_flood_extents(self, zoom: int) -> geemap.Map:
         flood_extent_vis_params = {
@@ -391,12 +643,9 @@ class HydraFloods(ProviderBase):
         }
         m = self.view_data(zoom=zoom, add_aoi=False)
         for ds_name in self.flood_extents:
-            img_col = self.flood_extents[ds_name].collection
-            n_images = img_col.size().getInfo()
-            for n in range(n_images):
-                img = ee.Image(img_col.toList(n_images).get(n)).selfMask()
+            for _, img in self._get_flood_extent_images(ds_name):
                 m.addLayer(
-                    img,
+                    img.selfMask(),
                     vis_params=flood_extent_vis_params,
                     name=f"{ds_name}  flood extent",
                 )
@@ -420,6 +669,24 @@ class HydraFloods(ProviderBase):
         )
         return _add_aoi_and_zoom_to_bounds(m, ee_geom=self.ee_geometry, bbox=self.bbox)
 
+    def _get_land_mask(self, method: str, tolerance: float) -> LandMask:
+        """Land mask of the region of interest, created once per method and tolerance."""
+        if (method, tolerance) not in self._land_masks:
+            self._land_masks[(method, tolerance)] = LandMask(
+                self.ee_geometry,
+                tolerance=tolerance,
+                method=method,
+            )
+        return self._land_masks[(method, tolerance)]
+
+    def _get_flood_extent_images(self, dataset_name: str) -> CollectionImages:
+        """Per-image access to the flood extents of a dataset, shared by plotting and export."""
+        if dataset_name not in self._flood_extent_images:
+            self._flood_extent_images[dataset_name] = CollectionImages(
+                self.flood_extents[dataset_name].collection,
+            )
+        return self._flood_extent_images[dataset_name]
+
 
 def _add_aoi_and_zoom_to_bounds(
     m: geemap.Map,
@@ -434,54 +701,73 @@ def _add_aoi_and_zoom_to_bounds(
     return m
 
 
-def _date_filter(date: str) -> ee.Filter:
-    d = ee.Date(date_parser(date))
-    # If timestamp contains h:m:s filter on seconds
-    if re.findall(r"(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})", date):
-        return ee.Filter.date(d, d.advance(1, "second"))
-    # else by day
-    return ee.Filter.date(d, d.advance(1, "day"))
-
-
-def _multiple_dates_filter(dates: list[str]) -> ee.Filter:
-    filters = [_date_filter(date) for date in dates]
-    return ee.Filter.Or(*filters)
-
-
-def _filter_collection_by_dates(date: str, dataset: Dataset) -> ee.ImageCollection:
-    return dataset.obj.collection.filter(_date_filter(date))
+def _covering_datasets(datasets: list[Dataset], start_date: str, end_date: str) -> list[Dataset]:
+    """Remove the datasets whose temporal coverage does not intersect the time window."""
+    covering = []
+    for dataset in datasets:
+        if dataset.covers(start_date, end_date):
+            covering.append(dataset)
+        else:
+            log.warning(
+                "Skipping %s, the dataset has no images between %s and %s",
+                dataset.name,
+                start_date,
+                end_date,
+            )
+    if not covering:
+        err_msg = (
+            f"None of the datasets ({', '.join(d.name for d in datasets)}) have images between"
+            f" {start_date} and {end_date}"
+        )
+        raise ValueError(err_msg)
+    return covering
 
 
-def _export_ee_collection(
-    collection: ee.ImageCollection,
+def _export_ee_collection(  # noqa: PLR0913
+    images: CollectionImages,
     region: ee.geometry,
     description: str,
+    scheduler: ExportScheduler,
     folder: str | None = None,
     scale: int = 30,
     ee_asset_path: str | None = None,
     export_type: str = "toDrive",
 ) -> None:
-    n_images = collection.size().getInfo()
-    for i in range(n_images):
-        description = description + f"_{i}"
-        img = ee.Image(collection.toList(n_images).get(i))
+    for ref, img in images:
+        image_description = _task_description(description, ref.index)
         if export_type == "toDrive":
-            task = ee.batch.Export.image.toDrive(
+            create_task = partial(
+                ee.batch.Export.image.toDrive,
                 img,
-                description=description,
+                description=image_description,
                 folder=folder,
                 scale=scale,
                 region=region,
                 maxPixels=1e13,
             )
         elif export_type == "toAsset":
-            asset_id = ee_asset_path + description
-            task = ee.batch.Export.image.toAsset(
+            asset_id = ee_asset_path + image_description
+            create_task = partial(
+                ee.batch.Export.image.toAsset,
                 img,
-                description=description,
+                description=image_description,
                 region=region,
                 assetId=asset_id,
                 scale=scale,
                 maxPixels=1e13,
             )
-        task.start()
+        scheduler.add(image_description, create_task)
+
+
+def _task_description(description: str, index: str) -> str:
+    """Return the description of the export task of an image, unique per 'system:index'.
+
+    The manifest of the scheduler is keyed by description, so exports are resumed per image
+    even when images are added to or removed from the collection between runs. Local exports
+    use the description as file name for the same reason.
+    """
+    image_description = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{description}_{index}")
+    if len(image_description) > MAX_DESCRIPTION_LENGTH:
+        digest = hashlib.sha256(index.encode()).hexdigest()[:16]
+        image_description = f"{image_description[: MAX_DESCRIPTION_LENGTH - 17]}_{digest}"
+    return image_description
@@ -0,0 +1,88 @@
+"""Per-image access to Earth Engine image collections."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import ee
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+log = logging.getLogger(__name__)
+
+
+class ImageRef(BaseModel):
+    """Reference to a single image in an image collection."""
+
+    index: str
+    time_start: int
+
+
+class CollectionImages:
+    """Iterate over the images of an image collection.
+
+    The 'system:index' and 'system:time_start' properties of all images are retrieved once
+    with a single request. Images are then addressed directly by filtering on their
+    'system:index', so the collection is never converted to a list on the server.
+    """
+
+    def __init__(self, collection: ee.ImageCollection) -> None:
+        """Instantiate a CollectionImages object.
+
+        Parameters
+        ----------
+        collection : ee.ImageCollection
+            the image collection to iterate over
+
+        """
+        self.collection = collection
+        self._refs: list[ImageRef] | None = None
+
+    @property
+    def refs(self) -> list[ImageRef]:
+        """References to the images of the collection, sorted by time."""
+        if self._refs is None:
+            self._refs = self._fetch_refs()
+        return self._refs
+
+    def __len__(self) -> int:
+        """Return the number of images in the collection."""
+        return len(self.refs)
+
+    def __iter__(self) -> Iterator[tuple[ImageRef, ee.Image]]:
+        """Yield the reference and the ee.Image of every image in the collection."""
+        for ref in self.refs:
+            yield ref, self.image(ref)
+
+    def image(self, ref: ImageRef | str) -> ee.Image:
+        """Get a single image from the collection.
+
+        Parameters
+        ----------
+        ref : ImageRef or str
+            reference or 'system:index' of the image
+
+        Returns
+        -------
+        ee.Image
+            the image
+
+        """
+        index = ref.index if isinstance(ref, ImageRef) else ref
+        return ee.Image(self.collection.filter(ee.Filter.eq("system:index", index)).first())
+
+    def _fetch_refs(self) -> list[ImageRef]:
+        rows = (
+            self.collection.reduceColumns(
+                reducer=ee.Reducer.toList(2),
+                selectors=["system:index", "system:time_start"],
+            )
+            .get("list")
+            .getInfo()
+        )
+        refs = [ImageRef(index=index, time_start=time_start) for index, time_start in rows]
+        log.debug("Retrieved references of %s images", len(refs))
+        return sorted(refs, key=lambda ref: ref.time_start)
@@ -0,0 +1,92 @@
+"""Land mask for removing ocean pixels from the area of interest."""
+
+from __future__ import annotations
+
+import logging
+
+import ee
+
+log = logging.getLogger(__name__)
+
+COUNTRY_BOUNDARIES = "FAO/GAUL_SIMPLIFIED_500m/2015/level0"
+LAND_MASK_METHODS = ["vector", "raster"]
+
+
+class LandMask:
+    """Mask that removes the pixels outside of the country boundaries within a region.
+
+    All countries that intersect the region are used, so regions crossing country borders
+    are supported. The mask can be applied as a vector clip, or as a raster mask with
+    updateMask, which is cheaper to evaluate on large collections.
+    """
+
+    def __init__(
+        self,
+        region: ee.Geometry,
+        tolerance: float = 100,
+        method: str = "vector",
+    ) -> None:
+        """Instantiate a LandMask.
+
+        Parameters
+        ----------
+        region : ee.Geometry
+            the area of interest
+        tolerance : float, optional
+            error margin in meters for simplifying the land geometry, by default 100
+        method : str, optional
+            "vector" to clip images by the land geometry, "raster" to mask images with a
+            rasterized land mask, by default "vector"
+
+        """
+        if method not in LAND_MASK_METHODS:
+            err_msg = f"Land mask method '{method}' not supported, choose from: " + ", ".join(
+                LAND_MASK_METHODS,
+            )
+            raise ValueError(err_msg)
+        self.region = region
+        self.tolerance = tolerance
+        self.method = method
+        self._geometry: ee.Geometry | None = None
+        self._image: ee.Image | None = None
+
+    @property
+    def countries(self) -> ee.FeatureCollection:
+        """Country boundaries that intersect the region."""
+        return ee.FeatureCollection(COUNTRY_BOUNDARIES).filterBounds(self.region)
+
+    @property
+    def geometry(self) -> ee.Geometry:
+        """Union of the countries intersected with the region, simplified to the tolerance."""
+        if self._geometry is None:
+            self._geometry = (
+                self.countries.geometry(maxError=self.tolerance)
+                .intersection(self.region, maxError=self.tolerance)
+                .simplify(maxError=self.tolerance)
+            )
+        return self._geometry
+
+    @property
+    def image(self) -> ee.Image:
+        """Raster land mask, 1 on land and 0 elsewhere."""
+        if self._image is None:
+            self._image = ee.Image(0).byte().paint(self.countries, 1)
+        return self._image
+
+    def apply(self, image: ee.Image) -> ee.Image:
+        """Remove the pixels outside of the land area from an image.
+
+        Parameters
+        ----------
+        image : ee.Image
+            image to mask
+
+        Returns
+        -------
+        ee.Image
+            masked image, with the properties of the input image
+
+        """
+        if self.method == "vector":
+            return image.clip(self.geometry)
+        return image.clip(self.region).updateMask(self.image)
@@ -0,0 +1,156 @@
+"""Batched metadata retrieval for hydrafloods datasets."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import ee
+from pydantic import BaseModel
+
+from eo_floods.cache import get_cache, query_max_age
+
+if TYPE_CHECKING:
+    from eo_floods.providers.hydrafloods.dataset import HydraFloodsDataset, QualityScoreParams
+
+log = logging.getLogger(__name__)
+
+
+class DatasetMetadata(BaseModel):
+    """Metadata of the images of a single dataset."""
+
+    name: str
+    short_name: str
+    asset_id: str
+    providers: list[str]
+    n_images: int
+    dates: list[str]
+    q_scores: list[float | None]
+
+    def to_table(self) -> str:
+        """Format the metadata as the text block used by available_data."""
+        output = f"{'=' * 70}\n"
+        output += f"Dataset name: {self.name}\n"
+        output += f"Number of images: {self.n_images}\n"
+        output += f"Dataset ID: {self.asset_id}\n"
+        output += f"Providers: {', '.join(self.providers)}\n\n"
+        if self.n_images > 0:
+            from tabulate import tabulate  # noqa: PLC0415
+
+            table = tabulate(
+                list(zip(self.dates, self.q_scores, strict=True)),
+                headers=["Timestamp", "Quality score (%)"],
+                tablefmt="orgtbl",
+            )
+            output += table + "\n\n"
+        else:
+            output += "No images where found for the set time period.\n\n"
+        return output
+
+
+class AvailableData(BaseModel):
+    """Metadata of all the datasets of a provider."""
+
+    datasets: list[DatasetMetadata]
+
+    def __getitem__(self, name: str) -> DatasetMetadata:
+        """Get the metadata of a dataset by its name."""
+        for dataset in self.datasets:
+            if dataset.name == name:
+                return dataset
+        err_msg = f"No metadata for dataset '{name}'"
+        raise KeyError(err_msg)
+
+    def to_table(self) -> str:
+        """Format the metadata of all datasets as text."""
+        return "".join(dataset.to_table() for dataset in self.datasets)
+
+
+def fetch_metadata(
+    datasets: list[HydraFloodsDataset],
+    quality_params: QualityScoreParams | None = None,
+) -> AvailableData:
+    """Retrieve the metadata of multiple datasets in a single Earth Engine request.
+
+    The per-dataset ee.Dictionary objects are nested in one ee.Dictionary that is
+    evaluated with one getInfo call. Metadata found in the metadata cache is not requested.
+
+    Parameters
+    ----------
+    datasets : list[HydraFloodsDataset]
+        datasets to retrieve the metadata for.
+    quality_params : QualityScoreParams, optional
+        parameters of the quality score reduction, by default QualityScoreParams()
+
+    Returns
+    -------
+    AvailableData
+        the metadata of the datasets, in the same order as the given datasets.
+
+    """
+    return fetch_metadata_batch([datasets], quality_params)[0]
+
+
+def fetch_metadata_batch(
+    groups: list[list[HydraFloodsDataset]],
+    quality_params: QualityScoreParams | None = None,
+) -> list[AvailableData]:
+    """Retrieve the metadata of groups of datasets, e.g. of multiple events, in one request.
+
+    Parameters
+    ----------
+    groups : list[list[HydraFloodsDataset]]
+        groups of datasets to retrieve the metadata for.
+    quality_params : QualityScoreParams, optional
+        parameters of the quality score reduction, by default QualityScoreParams()
+
+    Returns
+    -------
+    list[AvailableData]
+        the metadata of every group, in the same order as the given groups.
+
+    """
+    datasets = {
+        f"{i}/{dataset.name}": dataset for i, group in enumerate(groups) for dataset in group
+    }
+    cache = get_cache()
+    info = {}
+    if cache is not None:
+        keys = {
+            key: dataset.metadata_cache_key(quality_params) for key, dataset in datasets.items()
+        }
+        for key, metadata_key in keys.items():
+            cached = cache.get(metadata_key, max_age=query_max_age(datasets[key].end_date))
+            if cached is not None:
+                info[key] = cached
+    missing = {key: dataset for key, dataset in datasets.items() if key not in info}
+    if missing:
+        request = ee.Dictionary(
+            {key: dataset.metadata(quality_params) for key, dataset in missing.items()},
+        )
+        log.debug("Fetching metadata for %s", ", ".join(missing))
+        fetched = request.getInfo()
+        info.update(fetched)
+        if cache is not None:
+            for key, value in fetched.items():
+                cache.set(keys[key], value)
+    return [
+        AvailableData(
+            datasets=[
+                _parse_metadata(dataset, info[f"{i}/{dataset.name}"]) for dataset in group
+            ],
+        )
+        for i, group in enumerate(groups)
+    ]
+
+
+def _parse_metadata(dataset: HydraFloodsDataset, info: dict) -> DatasetMetadata:
+    return DatasetMetadata(
+        name=dataset.name,
+        short_name=dataset.short_name,
+        asset_id=dataset.asset_id,
+        providers=dataset.providers,
+        n_images=info["n_images"],
+        dates=info["dates"],
+        q_scores=[round(score, 2) if score is not None else None for score in info["q_scores"]],
+    )
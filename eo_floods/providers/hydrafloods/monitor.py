@@ -0,0 +1,159 @@
+"""Watermarks and running aggregates for incremental flood monitoring.
+
+A monitor that reruns regularly only has to classify the scenes that were ingested since
+the previous run. The time of the latest processed scene is kept per dataset and area of
+interest in a watermark. The maximum flood extent and the counts needed for the flood
+frequency are kept in an Earth Engine asset, which is combined with the flood extents of the
+new scenes and exported as a new asset on every run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+import ee
+from pydantic import BaseModel
+
+from eo_floods.cache import DEFAULT_CACHE_DIR
+
+log = logging.getLogger(__name__)
+
+AGGREGATE_BANDS = ["max_extent", "flood_count", "observation_count"]
+
+
+class Watermark(BaseModel):
+    """State of the monitoring of a dataset in an area of interest.
+
+    Attributes
+    ----------
+    time_start : int
+        system:time_start in milliseconds of the latest processed scene
+    n_scenes : int
+        number of scenes processed over all runs
+    aggregates : str, optional
+        asset id of the running aggregates, see aggregate_flood_extents
+
+    """
+
+    time_start: int
+    n_scenes: int = 0
+    aggregates: str | None = None
+
+
+def watermark_key(dataset: str, geometry: Any) -> str:  # noqa: ANN401
+    """Create the key of a dataset and json serializable area of interest in a WatermarkStore."""
+    query = {"dataset": dataset, "geometry": geometry}
+    return hashlib.sha256(json.dumps(query, sort_keys=True).encode()).hexdigest()
+
+
+class WatermarkStore:
+    """Watermarks stored in a JSON file.
+
+    The file is rewritten atomically after every change, so an interrupted run never leaves
+    a partial file behind and the watermarks of the previous run stay valid.
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        """Instantiate a WatermarkStore.
+
+        Parameters
+        ----------
+        path : str or Path, optional
+            path of the JSON file, by default ~/.cache/eo_floods/watermarks.json
+
+        """
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "watermarks.json"
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Watermark | None:
+        """Get a watermark, None if the dataset was not processed before."""
+        with self._lock:
+            watermark = self._read().get(key)
+        return Watermark(**watermark) if watermark is not None else None
+
+    def set(self, key: str, watermark: Watermark) -> None:
+        """Store a watermark."""
+        with self._lock:
+            watermarks = self._read()
+            watermarks[key] = watermark.model_dump()
+            self._write(watermarks)
+
+    def invalidate(self, key: str | None = None) -> None:
+        """Remove a watermark, or all watermarks if no key is given."""
+        with self._lock:
+            watermarks = self._read() if key is not None else {}
+            watermarks.pop(key, None)
+            self._write(watermarks)
+
+    def _read(self) -> dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            log.warning("Ignoring corrupt watermark file %s", self.path)
+            return {}
+
+    def _write(self, watermarks: dict[str, dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(watermarks, indent=2, sort_keys=True))
+        tmp.replace(self.path)
+
+
+def aggregate_flood_extents(
+    flood_extents: ee.ImageCollection,
+    previous: ee.Image | None = None,
+) -> ee.Image:
+    """Combine flood extents into the running aggregates.
+
+    Parameters
+    ----------
+    flood_extents : ee.ImageCollection
+        flood extents with a "water" band, water=1 and land=0
+    previous : ee.Image, optional
+        aggregates of the previous runs, by default None
+
+    Returns
+    -------
+    ee.Image
+        image with the bands "max_extent", whether a pixel was flooded in any scene,
+        "flood_count", the number of scenes in which the pixel was flooded, and
+        "observation_count", the number of scenes in which the pixel was observed
+
+    """
+    water = flood_extents.select("water")
+    aggregates = ee.Image.cat(
+        water.max().unmask(0).rename("max_extent"),
+        water.sum().unmask(0).rename("flood_count"),
+        water.count().unmask(0).rename("observation_count"),
+    )
+    if previous is not None:
+        previous = previous.select(AGGREGATE_BANDS)
+        aggregates = ee.Image.cat(
+            previous.select("max_extent").max(aggregates.select("max_extent")),
+            previous.select(["flood_count", "observation_count"]).add(
+                aggregates.select(["flood_count", "observation_count"]),
+            ),
+        )
+    return ee.Image.cat(
+        aggregates.select("max_extent").uint8(),
+        aggregates.select(["flood_count", "observation_count"]).uint16(),
+    )
+
+
+def flood_frequency(aggregates: ee.Image) -> ee.Image:
+    """Calculate the fraction of the observations in which a pixel was flooded."""
+    observations = aggregates.select("observation_count")
+    return (
+        aggregates.select("flood_count")
+        .divide(observations)
+        .updateMask(observations.gt(0))
+        .rename("flood_frequency")
+    )
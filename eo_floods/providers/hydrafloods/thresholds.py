@@ -0,0 +1,298 @@
+"""Edge Otsu thresholds computed once per collection, orbit or week.
+
+hydrafloods.edge_otsu computes the edges, the histogram and the Otsu threshold for every
+image on its own. For sensors with a stable separation between water and land during an
+event, e.g. Sentinel-1, the histograms of the edge buffers of all images can be summed and a
+single threshold applied to every image. This saves the threshold computation per image and
+gives consistent flood extents across dates.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import ee
+
+from eo_floods.cache import cache_key, get_cache
+from eo_floods.providers.hydrafloods.edge_otsu import EdgeOtsuParams
+
+if TYPE_CHECKING:
+    import hydrafloods as hf
+
+    from eo_floods.providers.hydrafloods.dataset import HydraFloodsDataset
+
+log = logging.getLogger(__name__)
+
+THRESHOLD_MODES = ["image", "collection", "orbit", "week"]
+# fixed histogram ranges of the thresholded bands, values outside are clamped
+HISTOGRAM_RANGES = {"VV": (-40.0, 10.0), "VH": (-45.0, 5.0), "mndwi": (-1.0, 1.0)}
+GROUP_PROPERTY = "eo_floods_threshold_group"
+# parameters of hydrafloods.edge_otsu that are not in EdgeOtsuParams
+CANNY_LT = 0.05
+DEFAULT_SCALE = 90
+
+
+class CollectionThresholds:
+    """Edge Otsu thresholding with one threshold per group of images.
+
+    The images are grouped by mode:
+
+    - "collection": all images share one threshold
+    - "orbit": one threshold per relative orbit, given by the orbit property of the dataset
+    - "week": one threshold per ISO week of the image acquisition
+
+    The edge buffer of every image is computed as in hydrafloods.edge_otsu, but the
+    histogram is a fixed histogram over the range of the band, so the histograms of a group
+    can be summed on the server. The Otsu threshold of the summed histogram is applied to
+    every image of the group.
+
+    Thresholds can be stored in the metadata cache per area of interest, dataset, mode and
+    algorithm parameters. Cached thresholds are reused in later runs, also for other time
+    windows, and only the thresholds of new groups are computed.
+    """
+
+    def __init__(
+        self,
+        mode: str = "collection",
+        *,
+        scale: float | None = None,
+        histogram_range: tuple[float, float] | None = None,
+        cache_thresholds: bool = False,
+    ) -> None:
+        """Instantiate CollectionThresholds.
+
+        Parameters
+        ----------
+        mode : str, optional
+            "collection", "orbit" or "week", by default "collection"
+        scale : float, optional
+            scale in meters of the histogram reduction, by default the scale of the edge_otsu
+            parameters of the dataset or 90 as in hydrafloods.edge_otsu
+        histogram_range : tuple[float, float], optional
+            minimum and maximum of the histogram, by default the range in HISTOGRAM_RANGES of
+            the thresholded band
+        cache_thresholds : bool, optional
+            store the thresholds in the metadata cache and reuse them, by default False
+
+        """
+        if mode not in THRESHOLD_MODES[1:]:
+            err_msg = f"Threshold mode '{mode}' not supported, choose from: " + ", ".join(
+                THRESHOLD_MODES[1:],
+            )
+            raise ValueError(err_msg)
+        self.mode = mode
+        self.scale = scale
+        self.histogram_range = histogram_range
+        self.cache_thresholds = cache_thresholds
+
+    def apply(self, dataset: HydraFloodsDataset) -> hf.Dataset:
+        """Threshold the images of a dataset.
+
+        Parameters
+        ----------
+        dataset : HydraFloodsDataset
+            dataset with the band to threshold, e.g. with the mndwi band added
+
+        Returns
+        -------
+        hf.Dataset
+            new dataset with a "water" band as returned by hydrafloods.edge_otsu, and the
+            applied threshold in the "edge_otsu_threshold" property of every image
+
+        """
+        params = EdgeOtsuParams.from_dataset(dataset)
+        grouped = dataset.obj.apply_func(
+            lambda img: img.set(GROUP_PROPERTY, self.group(img, dataset)),
+        )
+        thresholds = self.thresholds(grouped.collection, dataset)
+        if self.cache_thresholds:
+            thresholds = self._cached_thresholds(grouped.collection, dataset, thresholds)
+
+        def threshold_image(img: ee.Image) -> ee.Image:
+            threshold = ee.Number(thresholds.get(img.get(GROUP_PROPERTY)))
+            band = img.select(params.band)
+            water = band.gt(threshold) if params.invert else band.lt(threshold)
+            return (
+                ee.Image(water.rename("water").uint8().copyProperties(img))
+                .set("system:time_start", img.get("system:time_start"))
+                .set("edge_otsu_threshold", threshold)
+            )
+
+        return grouped.apply_func(threshold_image)
+
+    def group(self, img: ee.Image, dataset: HydraFloodsDataset) -> ee.String:
+        """Return the key of the threshold group of an image."""
+        if self.mode == "orbit":
+            if dataset.orbit_property is None:
+                err_msg = f"{dataset.name} has no orbit property to group the thresholds by"
+                raise ValueError(err_msg)
+            return ee.Algorithms.String(img.get(dataset.orbit_property))
+        if self.mode == "week":
+            return ee.Date(img.get("system:time_start")).format("xxxx-'W'ww")
+        return ee.String("all")
+
+    def thresholds(
+        self,
+        collection: ee.ImageCollection,
+        dataset: HydraFloodsDataset,
+    ) -> ee.Dictionary:
+        """Build a server-side dictionary with the threshold of every group.
+
+        Parameters
+        ----------
+        collection : ee.ImageCollection
+            images with the group key in the GROUP_PROPERTY property
+        dataset : HydraFloodsDataset
+            dataset the images belong to
+
+        Returns
+        -------
+        ee.Dictionary
+            thresholds by group key
+
+        """
+        params = EdgeOtsuParams.from_dataset(dataset)
+        lo, hi = self._range(params)
+        histograms = ee.FeatureCollection(
+            collection.map(lambda img: self._histogram(img, dataset, params)),
+        )
+        width = (hi - lo) / params.max_buckets
+        bucket_means = ee.Array([lo + (i + 0.5) * width for i in range(params.max_buckets)])
+        no_data = (
+            params.thresh_no_data if params.thresh_no_data is not None else params.initial_threshold
+        )
+
+        def group_threshold(group: ee.String) -> ee.Number:
+            counts = (
+                ee.Array(
+                    histograms.filter(ee.Filter.eq(GROUP_PROPERTY, group)).aggregate_array(
+                        "histogram",
+                    ),
+                )
+                .reduce(ee.Reducer.sum(), [0])
+                .project([1])
+            )
+            total = ee.Number(counts.reduce(ee.Reducer.sum(), [0]).get([0]))
+            return ee.Number(
+                ee.Algorithms.If(
+                    total.gt(0),
+                    _otsu(ee.Dictionary({"histogram": counts, "bucketMeans": bucket_means})),
+                    no_data,
+                ),
+            )
+
+        groups = histograms.aggregate_array(GROUP_PROPERTY).distinct()
+        return ee.Dictionary.fromLists(groups, groups.map(group_threshold))
+
+    def cache_key(self, dataset: HydraFloodsDataset) -> str:
+        """Cache key of the thresholds of a dataset in its area of interest.
+
+        The thresholds are reused for other time windows, so the dates are not in the key.
+        """
+        params = EdgeOtsuParams.from_dataset(dataset)
+        return cache_key(
+            "Hydrafloods",
+            dataset.name,
+            dataset.region.serialize(),
+            "",
+            "",
+            filters={
+                "thresholds": self.mode,
+                "params": params.model_dump(),
+                "scale": self._scale(dataset),
+                "histogram_range": self._range(params),
+            },
+        )
+
+    def _cached_thresholds(
+        self,
+        collection: ee.ImageCollection,
+        dataset: HydraFloodsDataset,
+        thresholds: ee.Dictionary,
+    ) -> ee.Dictionary:
+        cache = get_cache()
+        if cache is None:
+            log.warning("The metadata cache is disabled, thresholds are not cached")
+            return thresholds
+        key = self.cache_key(dataset)
+        cached = cache.get(key) or {}
+        if self.mode == "collection":
+            groups = ["all"]
+        else:
+            groups = collection.aggregate_array(GROUP_PROPERTY).distinct().getInfo()
+        missing = [group for group in groups if group not in cached]
+        if missing:
+            log.info("Computing %s thresholds for %s", len(missing), dataset.name)
+            cached.update(thresholds.select(missing).getInfo())
+            cache.set(key, cached)
+        else:
+            log.info("Using cached thresholds for %s", dataset.name)
+        return ee.Dictionary({group: cached[group] for group in groups})
+
+    def _histogram(
+        self,
+        img: ee.Image,
+        dataset: HydraFloodsDataset,
+        params: EdgeOtsuParams,
+    ) -> ee.Feature:
+        """Compute the fixed histogram of the edge buffer of an image, as edge_otsu does."""
+        lo, hi = self._range(params)
+        band = img.select(params.band)
+        binary = band.lt(params.initial_threshold).rename("binary")
+        canny = ee.Algorithms.CannyEdgeDetector(
+            binary,
+            params.canny_threshold,
+            params.canny_sigma,
+        )
+        connected = (
+            canny.mask(canny)
+            .lt(CANNY_LT)
+            .connectedPixelCount(
+                params.connected_pixels,
+                True,  # noqa: FBT003
+            )
+        )
+        edge_buffer = connected.gte(params.edge_length).focal_max(
+            params.edge_buffer,
+            "square",
+            "meters",
+        )
+        histogram = (
+            band.clamp(lo, hi)
+            .updateMask(edge_buffer)
+            .reduceRegion(
+                ee.Reducer.fixedHistogram(lo, hi, params.max_buckets),
+                dataset.region,
+                self._scale(dataset),
+                bestEffort=True,
+                tileScale=16,
+            )
+            .get(params.band)
+        )
+        # images without edges have no histogram, they do not add to the group histogram
+        counts = ee.Algorithms.If(
+            histogram,
+            ee.Array(histogram).slice(1, 1, 2).project([0]),
+            ee.Array(ee.List.repeat(0, params.max_buckets)),
+        )
+        return ee.Feature(None, {GROUP_PROPERTY: img.get(GROUP_PROPERTY), "histogram": counts})
+
+    def _range(self, params: EdgeOtsuParams) -> tuple[float, float]:
+        if self.histogram_range is not None:
+            return self.histogram_range
+        if params.band not in HISTOGRAM_RANGES:
+            err_msg = f"No histogram range known for band '{params.band}', set the histogram_range"
+            raise ValueError(err_msg)
+        return HISTOGRAM_RANGES[params.band]
+
+    def _scale(self, dataset: HydraFloodsDataset) -> float:
+        if self.scale is not None:
+            return self.scale
+        return dataset.algorithm_params["edge_otsu"].get("scale", DEFAULT_SCALE)
+
+
+def _otsu(histogram: ee.Dictionary) -> ee.Number:
+    import hydrafloods as hf  # noqa: PLC0415
+
+    return hf.thresholding.otsu(histogram)
@@ -1,4 +1,5 @@
 import pytest
+from eo_floods.cache import MetadataCache, set_cache
 from eo_floods.providers.hydrafloods.auth import ee_initialize
 from eo_floods.floodmap import FloodMap
 
@@ -13,3 +14,11 @@ def flood_map() -> FloodMap:
         geometry=[67.740187, 27.712453, 68.104933, 28.000935],
         provider="Hydrafloods"
     )
+
+
+@pytest.fixture(autouse=True)
+def metadata_cache(tmp_path) -> MetadataCache:
+    cache = MetadataCache(path=tmp_path / "metadata.sqlite")
+    set_cache(cache)
+    yield cache
+    set_cache(None)
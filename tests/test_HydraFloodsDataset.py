@@ -1,5 +1,9 @@
 import hydrafloods as hf
-from eo_floods.providers.hydrafloods.dataset import HydraFloodsDataset
+from eo_floods.providers.hydrafloods.dataset import (
+    DATASETS,
+    HydraFloodsDataset,
+    QualityScoreParams,
+)
 from eo_floods.utils import coords_to_ee_geom
 
 class TestCalcQualityScore:
@@ -40,3 +44,37 @@ class TestCalcQualityScore:
         viirs.apply_func(HydraFloodsDataset._calculate_quality_score, inplace=True, band="swir1")
         q_scores = viirs.collection.aggregate_array("q_score").getInfo()
         assert len(q_scores) == viirs.n_images
+
+    def test_quality_score_scale(self):
+        s1 = HydraFloodsDataset(DATASETS["Sentinel-1"], self.REGION, self.STARTDATE, self.ENDDATE)
+        assert s1.quality_score_scale(QualityScoreParams(target_pixels=None)).getInfo() == 10
+        assert s1.quality_score_scale(QualityScoreParams(target_pixels=1000)).getInfo() > 10
+        modis = HydraFloodsDataset(DATASETS["MODIS"], self.REGION, self.STARTDATE, self.ENDDATE)
+        assert modis.quality_score_scale().getInfo() == 500
+
+    def test_quality_score_params(self):
+        s1 = HydraFloodsDataset(DATASETS["Sentinel-1"], self.REGION, self.STARTDATE, self.ENDDATE)
+        q_scores = s1.quality_score(QualityScoreParams(tile_scale=2, best_effort=True))
+        assert len(q_scores) == s1.obj.n_images
+        assert all(0 <= score <= 100 for score in q_scores)
+
+
+def test_dataset_covers():
+    assert DATASETS["Landsat 7"].covers("2022-10-01", "2022-10-30")
+    assert not DATASETS["Landsat 7"].covers("2024-06-01", "2024-06-30")
+    assert DATASETS["Sentinel-1"].covers("2024-06-01", "2024-06-30")
+    assert not DATASETS["Sentinel-1"].covers("2014-09-01", "2014-10-03")
+    assert DATASETS["Sentinel-1"].covers("2014-09-01", "2014-10-04")
+
+
+def test_collection_override():
+    region = coords_to_ee_geom([67.740187, 27.712453, 68.104933, 28.000935])
+    s1 = HydraFloodsDataset(DATASETS["Sentinel-1"], region, "2022-10-01", "2022-10-30")
+    s1_float = HydraFloodsDataset(
+        DATASETS["Sentinel-1"], region, "2022-10-01", "2022-10-30", asset_id="COPERNICUS/S1_GRD_FLOAT"
+    )
+    assert s1.asset_id == "COPERNICUS/S1_GRD"
+    assert s1_float.asset_id == "COPERNICUS/S1_GRD_FLOAT"
+    assert s1.native_scale == 10
+    assert s1_float.native_scale.getInfo() == 10
+    assert s1_float.metadata_cache_key() != s1.metadata_cache_key()
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import ee
+import pytest
+
+from eo_floods.aio import AsyncFloodMap, evaluate, run_blocking
+
+
+def test_run_blocking_concurrent():
+    async def main():
+        return await asyncio.gather(*(run_blocking(time.sleep, 0.2) for _ in range(20)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    assert time.perf_counter() - start < 2
+
+
+def test_run_blocking_timeout():
+    with pytest.raises(TimeoutError, match="sleep did not finish within 0.1 seconds"):
+        asyncio.run(run_blocking(time.sleep, 1, deadline=0.1))
+
+
+def test_evaluate():
+    async def main():
+        return await asyncio.gather(*(evaluate(ee.Number(i).add(1)) for i in range(5)))
+
+    assert asyncio.run(main()) == [1, 2, 3, 4, 5]
+
+
+def test_async_flood_map(caplog):
+    async def main():
+        floodmap = await AsyncFloodMap.create(
+            start_date="2022-10-01",
+            end_date="2022-10-15",
+            geometry=[67.740187, 27.712453, 68.104933, 28.000935],
+            provider="Hydrafloods",
+            datasets="Sentinel-1",
+            deadline=300,
+        )
+        return await floodmap.available_data()
+
+    available_data = asyncio.run(main())
+    assert available_data["Sentinel-1"].n_images > 0
+
+
+def test_async_view_flood_extents_deadline(mocker):
+    floodmap = mocker.Mock(provider_name="Hydrafloods")
+    floodmap.view_flood_extents.side_effect = lambda **kwargs: time.sleep(0.5)
+    with pytest.raises(TimeoutError, match="Plotting flood extents has timed out"):
+        asyncio.run(AsyncFloodMap(floodmap, deadline=0.1).view_flood_extents(zoom=6))
+    # the deadline is applied once, by the event loop
+    floodmap.view_flood_extents.assert_called_once_with(timeout=None, zoom=6)
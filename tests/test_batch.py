@@ -0,0 +1,56 @@
+from eo_floods.batch import Event, FloodMapBatch
+from eo_floods.floodmap import FloodMap
+from eo_floods.providers.hydrafloods.metadata import AvailableData
+
+EVENTS = [
+    {
+        "name": "Pakistan",
+        "start_date": "2022-10-01",
+        "end_date": "2022-10-15",
+        "geometry": [67.740187, 27.712453, 68.104933, 28.000935],
+        "datasets": "Sentinel-1",
+    },
+    {
+        "name": "Mozambique",
+        "start_date": "2022-10-01",
+        "end_date": "2022-10-05",
+        "geometry": [35.0, -20.0, 35.1, -19.9],
+        "datasets": "Sentinel-1",
+    },
+]
+
+
+def test_batch_bad_event():
+    bad_event = Event(
+        name="bad",
+        start_date="2022-10-01",
+        end_date="2022-10-05",
+        geometry=[35.0, -20.0, 35.1, -19.9],
+        provider="unknown",
+    )
+    result = FloodMapBatch([*EVENTS, bad_event]).run()
+    assert len(result.succeeded) == 2
+    assert [r.event.name for r in result.failed] == ["bad"]
+    assert "Provider not given or recognized" in result.failed[0].error
+    assert isinstance(result.succeeded[0].floodmap, FloodMap)
+
+
+def test_batch_available_data_single_request(mocker):
+    get_info = mocker.patch(
+        "ee.Dictionary.getInfo",
+        return_value={
+            f"{i}/Sentinel-1": {"n_images": 1, "dates": ["2022-10-01"], "q_scores": [99.0]}
+            for i in range(2)
+        },
+    )
+    result = FloodMapBatch(EVENTS).available_data()
+    assert get_info.call_count == 1
+    assert all(isinstance(r.value, AvailableData) for r in result.results)
+    assert result.results[0].value["Sentinel-1"].n_images == 1
+
+
+def test_batch_map():
+    result = FloodMap.from_events(EVENTS)
+    assert len(result.results) == 2
+    mapped = FloodMapBatch(EVENTS).map(lambda floodmap: floodmap.geometry)
+    assert [r.value for r in mapped.results] == [e["geometry"] for e in EVENTS]
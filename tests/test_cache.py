@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+from eo_floods.cache import NEAR_REAL_TIME_MAX_AGE, MetadataCache, cache_key, query_max_age
+
+
+def test_cache_key():
+    key = cache_key("GFM", "GFM", [1, 2, 3, 4], "2022-10-01", "2022-10-15")
+    assert key == cache_key("GFM", "GFM", [1, 2, 3, 4], "2022-10-01", "2022-10-15")
+    assert key != cache_key("GFM", "GFM", [1, 2, 3, 5], "2022-10-01", "2022-10-15")
+    assert key != cache_key(
+        "GFM", "GFM", [1, 2, 3, 4], "2022-10-01", "2022-10-15", filters={"dates": ["2022-10-02"]}
+    )
+
+
+def test_metadata_cache(tmp_path):
+    cache = MetadataCache(path=tmp_path / "cache.sqlite")
+    assert cache.get("a") is None
+    cache.set("a", {"n_images": 2, "dates": ["2022-10-01", "2022-10-02"]})
+    assert cache.get("a") == {"n_images": 2, "dates": ["2022-10-01", "2022-10-02"]}
+    # entries persist on disk
+    assert MetadataCache(path=tmp_path / "cache.sqlite").get("a")["n_images"] == 2
+    cache.invalidate("a")
+    assert cache.get("a") is None
+
+
+def test_metadata_cache_ttl(tmp_path, mocker):
+    cache = MetadataCache(path=tmp_path / "cache.sqlite", ttl=10)
+    mock_time = mocker.patch("eo_floods.cache.time.time", return_value=1000)
+    cache.set("a", 1)
+    mock_time.return_value = 1005
+    assert cache.get("a") == 1
+    mock_time.return_value = 1011
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_metadata_cache_max_age(tmp_path, mocker):
+    cache = MetadataCache(path=tmp_path / "cache.sqlite", ttl=100)
+    mock_time = mocker.patch("eo_floods.cache.time.time", return_value=1000)
+    cache.set("a", 1)
+    mock_time.return_value = 1011
+    assert cache.get("a", max_age=10) is None
+    assert cache.get("a") == 1
+
+
+def test_query_max_age():
+    assert query_max_age("2022-10-15") is None
+    assert query_max_age(date.today().isoformat()) == NEAR_REAL_TIME_MAX_AGE
+    assert query_max_age((date.today() + timedelta(days=7)).isoformat()) == NEAR_REAL_TIME_MAX_AGE
+
+
+def test_metadata_cache_lru(tmp_path, mocker):
+    cache = MetadataCache(path=tmp_path / "cache.sqlite", max_entries=2)
+    mock_time = mocker.patch("eo_floods.cache.time.time", return_value=1000)
+    cache.set("a", 1)
+    mock_time.return_value = 1001
+    cache.set("b", 2)
+    mock_time.return_value = 1002
+    cache.get("a")
+    mock_time.return_value = 1003
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    cache.invalidate()
+    assert len(cache) == 0
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import ee
+import hydrafloods as hf
+
+from eo_floods.providers.hydrafloods.dates import (
+    DateSelection,
+    merge_intervals,
+    parse_date_interval,
+)
+from eo_floods.utils import coords_to_ee_geom, get_dates_in_time_range
+
+
+def test_parse_date_interval():
+    day = parse_date_interval("2022-10-05")
+    assert day.start == datetime(2022, 10, 5)
+    assert day.end == datetime(2022, 10, 6)
+    assert day.whole_days
+    timestamp = parse_date_interval("2022-10-05 01:25:51.000")
+    assert timestamp.start == datetime(2022, 10, 5, 1, 25, 51)
+    assert timestamp.end == datetime(2022, 10, 5, 1, 25, 52)
+    assert not timestamp.whole_days
+    assert parse_date_interval("5 October 2022") == day
+    midnight = parse_date_interval("2022-10-05 00:00:00")
+    assert midnight.end == datetime(2022, 10, 5, 0, 0, 1)
+
+
+def test_merge_intervals():
+    dates = get_dates_in_time_range("2022-10-01", "2022-12-29")
+    assert len(dates) == 90
+    intervals = merge_intervals([parse_date_interval(date) for date in dates])
+    assert len(intervals) == 1
+    assert intervals[0].start == datetime(2022, 10, 1)
+    assert intervals[0].end == datetime(2022, 12, 30)
+
+    intervals = merge_intervals(
+        [
+            parse_date_interval(date)
+            for date in ["2022-10-05", "2022-10-03", "2022-10-05 01:25:51", "2022-10-04"]
+        ]
+    )
+    assert len(intervals) == 1
+    intervals = merge_intervals(
+        [parse_date_interval(date) for date in ["2022-10-05 01:25:51", "2022-10-05 01:25:26"]]
+    )
+    assert len(intervals) == 2
+
+
+def test_date_selection():
+    selection = DateSelection(["2022-10-01", "2022-10-03", "2022-10-05 01:25:51.000"], max_intervals=2)
+    assert len(selection.intervals) == 3
+    assert selection._expand() == (["2022-10-01", "2022-10-03"], [1664933151], [])
+
+    # a merged interval that does not cover whole days is selected as a date range
+    selection = DateSelection(["2022-10-04 23:59:59", "2022-10-05", "2022-10-07"], max_intervals=1)
+    days, seconds, ranges = selection._expand()
+    assert (days, seconds) == (["2022-10-07"], [])
+    assert ranges == [parse_date_interval("2022-10-04 23:59:59").model_copy(
+        update={"end": datetime(2022, 10, 6)}
+    )]
+
+
+def test_date_selection_apply():
+    region = coords_to_ee_geom([67.740187, 27.712453, 68.104933, 28.000935])
+    dates = ["2022-10-05 01:25:51.000", "2022-10-05 01:25:26.000", "2022-10-14"]
+    s1 = hf.Sentinel1(region, "2022-10-01", "2022-10-15")
+    DateSelection(dates).apply(s1)
+    s1_in_list = hf.Sentinel1(region, "2022-10-01", "2022-10-15")
+    DateSelection(dates, max_intervals=1).apply(s1_in_list)
+    assert s1.dates == s1_in_list.dates
+    assert len(s1.dates) > 2
@@ -0,0 +1,85 @@
+import pytest
+
+from eo_floods.providers.hydrafloods.download import (
+    TiledDownloader,
+    Transport,
+    _merge_tiles,
+    tile_grid,
+)
+
+
+class FakeTransport(Transport):
+    def __init__(self):
+        self.fetched = []
+
+    def fetch(self, image, tile):
+        self.fetched.append((image, tile.row, tile.col))
+        return f"{image}_{tile.row}_{tile.col}".encode()
+
+
+def test_tile_grid():
+    bbox = [4.0, 52.0, 4.5, 52.2]
+    tiles = tile_grid(bbox, scale=30, max_tile_pixels=256 * 256)
+    assert all(tile.width * tile.height <= 256 * 256 for tile in tiles)
+    assert tiles[0].bbox[0] == pytest.approx(bbox[0])
+    assert tiles[0].bbox[3] == pytest.approx(bbox[3])
+    assert max(tile.bbox[2] for tile in tiles) == pytest.approx(bbox[2], abs=tiles[0].pixel_size)
+    assert min(tile.bbox[1] for tile in tiles) == pytest.approx(bbox[1], abs=tiles[0].pixel_size)
+    grid = tiles[0].to_grid()
+    assert grid["dimensions"] == {"width": 256, "height": 256}
+
+
+def test_tiled_download(tmp_path, mocker):
+    mocker.patch(
+        "eo_floods.providers.hydrafloods.download._merge_tiles", side_effect=lambda d, _: d
+    )
+    transport = FakeTransport()
+    downloader = TiledDownloader(transport=transport, max_workers=4, max_tile_pixels=256 * 256)
+    bbox = [4.0, 52.0, 4.5, 52.2]
+    n_tiles = len(tile_grid(bbox, scale=30, max_tile_pixels=256 * 256))
+    paths = downloader.download({"a": "img_a", "b": "img_b"}, bbox=bbox, scale=30, out_dir=tmp_path)
+    assert len(transport.fetched) == 2 * n_tiles
+    assert len(list(paths["a"].glob("tile_*.tif"))) == n_tiles
+    assert (paths["b"] / "tile_0_0.tif").read_bytes() == b"img_b_0_0"
+
+    # tiles that are already on disk are not fetched again
+    downloader.download({"a": "img_a"}, bbox=bbox, scale=30, out_dir=tmp_path)
+    assert len(transport.fetched) == 2 * n_tiles
+
+    # tiles of another grid are not reused
+    n_tiles_60 = len(tile_grid(bbox, scale=60, max_tile_pixels=256 * 256))
+    paths_60 = downloader.download({"a": "img_a"}, bbox=bbox, scale=60, out_dir=tmp_path)
+    assert paths_60["a"] != paths["a"]
+    assert len(transport.fetched) == 2 * n_tiles + n_tiles_60
+
+
+def test_merge_tiles(tmp_path):
+    rasterio = pytest.importorskip("rasterio")
+    np = pytest.importorskip("numpy")
+    from rasterio.transform import from_origin
+
+    tile_dir = tmp_path / "image"
+    tile_dir.mkdir()
+    mosaic = np.arange(6 * 5, dtype="uint8").reshape(1, 6, 5)
+    pixel_size = 0.001
+    # tiles of 4x3 pixels, the last row and column are smaller
+    for row, (y0, y1) in enumerate([(0, 4), (4, 6)]):
+        for col, (x0, x1) in enumerate([(0, 3), (3, 5)]):
+            profile = {
+                "driver": "GTiff",
+                "width": x1 - x0,
+                "height": y1 - y0,
+                "count": 1,
+                "dtype": "uint8",
+                "crs": "EPSG:4326",
+                "transform": from_origin(4.0 + x0 * pixel_size, 52.0 - y0 * pixel_size, pixel_size, pixel_size),
+            }
+            with rasterio.open(tile_dir / f"tile_{row}_{col}.tif", "w", **profile) as dst:
+                dst.write(mosaic[:, y0:y1, x0:x1])
+    out_path = _merge_tiles(tile_dir, tmp_path / "image.tif")
+    assert out_path == tmp_path / "image.tif"
+    assert not tile_dir.exists()
+    with rasterio.open(out_path) as src:
+        assert src.bounds.left == pytest.approx(4.0)
+        assert src.bounds.top == pytest.approx(52.0)
+        np.testing.assert_array_equal(src.read(), mosaic)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from eo_floods.providers.hydrafloods.dataset import DATASETS
+from eo_floods.providers.hydrafloods.edge_otsu import (
+    NODATA,
+    EdgeOtsuEngine,
+    EdgeOtsuParams,
+    _component_sizes,
+    _dilate,
+    _label,
+    edge_otsu,
+    mndwi,
+    otsu_threshold,
+)
+
+
+def sar_image(seed=0, water=-22.0):
+    rng = np.random.default_rng(seed)
+    image = -8 + rng.normal(0, 1.5, (200, 200))
+    image[50:150, 20:120] = water + rng.normal(0, 1.5, (100, 100))
+    image[:3] = np.nan
+    return image.astype(np.float32)
+
+
+def test_otsu_threshold():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.normal(-22, 1, 1000), rng.normal(-8, 1, 1000), [np.nan]])
+    assert -18 < otsu_threshold(values) < -12
+    assert otsu_threshold(np.array([1.0, 1.0])) is None
+
+
+def test_edge_otsu_sar():
+    params = EdgeOtsuParams.from_dataset(DATASETS["Sentinel-1"])
+    assert params.invert
+    flood, threshold = edge_otsu(sar_image(), params, pixel_size=10)
+    assert -18 < threshold < -12
+    assert (flood[:3] == NODATA).all()
+    assert flood[50:150, 20:120].mean() > 0.99
+    assert flood[3:50].mean() < 0.01
+
+
+def test_edge_otsu_optical():
+    green = np.full((100, 100), 0.1)
+    swir = np.full((100, 100), 0.3)
+    swir[20:80, 20:80] = 0.02
+    params = EdgeOtsuParams(band="mndwi", edge_length=10)
+    flood, threshold = edge_otsu(mndwi(green, swir), params, pixel_size=30)
+    assert -0.5 < threshold <= 0.67
+    assert flood[20:80, 20:80].all()
+    assert flood.sum() == 60 * 60
+
+
+def test_components_and_dilation():
+    mask = np.zeros((6, 6), dtype=bool)
+    mask[0, :3] = mask[1, 3] = mask[2, 2] = mask[5, 5] = True
+    sizes = _component_sizes(mask)
+    assert sizes[0, 0] == 5
+    assert sizes[5, 5] == 1
+    assert sizes[3, 3] == 0
+    labels = _label(mask)
+    assert len(np.unique(labels[mask])) == 2
+    assert _dilate(mask, 1)[4, 4]
+    assert not _dilate(mask, 1)[3, 0]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3])
+def test_engine_classifies_stacks(chunk_size):
+    stack = np.stack([sar_image(seed, water) for seed, water in enumerate([-22, -20, -24, -21])])
+    engine = EdgeOtsuEngine(
+        EdgeOtsuParams(invert=True, initial_threshold=-16),
+        pixel_size=10,
+        max_workers=2,
+        chunk_size=chunk_size,
+    )
+    out = np.zeros(stack.shape, dtype=np.uint8)
+    flood, thresholds = engine.classify(stack, out=out)
+    assert flood is out
+    for image, extent, threshold in zip(stack, flood, thresholds):
+        expected, expected_threshold = edge_otsu(image, engine.params, 10)
+        assert threshold == expected_threshold
+        np.testing.assert_array_equal(extent, expected)
+    np.testing.assert_array_equal(engine.thresholds(stack), thresholds)
+
+    single, single_thresholds = engine.classify(stack[0])
+    np.testing.assert_array_equal(single, flood[0])
@@ -0,0 +1,175 @@
+import json
+
+import ee
+import pytest
+
+from eo_floods.providers.hydrafloods.export import (
+    EETaskBackend,
+    ExportScheduler,
+    ExportState,
+    TaskBackend,
+)
+from eo_floods.providers.hydrafloods.hydrafloods import _task_description
+
+
+class FakeTaskBackend(TaskBackend):
+    def __init__(self, states: dict[str, list[str]] | None = None):
+        self.states = states or {}
+        self.started = []
+        self.status_calls = 0
+
+    def start(self, create_task):
+        description = create_task()
+        task_id = f"{description}_{len(self.started)}"
+        self.started.append(description)
+        return task_id
+
+    def status(self, task_ids):
+        self.status_calls += 1
+        statuses = {}
+        for task_id in task_ids:
+            description = task_id.rsplit("_", 1)[0]
+            states = self.states.get(description, ["COMPLETED"])
+            state = states.pop(0) if len(states) > 1 else states[0]
+            statuses[task_id] = {"id": task_id, "state": state, "error_message": "error"}
+        return statuses
+
+
+def n_running(scheduler):
+    return sum(job.state == ExportState.RUNNING for job in scheduler.jobs.values())
+
+
+def test_max_running():
+    backend = FakeTaskBackend(states={f"img_{i}": ["RUNNING", "COMPLETED"] for i in range(5)})
+    scheduler = ExportScheduler(backend=backend, max_running=2, poll_interval=0)
+    for i in range(5):
+        scheduler.add(f"img_{i}", lambda i=i: f"img_{i}")
+    scheduler.step()
+    assert backend.started == ["img_0", "img_1"]
+    assert n_running(scheduler) == 2
+    scheduler.wait(timeout=5)
+    assert scheduler.finished
+    assert all(job.state == ExportState.COMPLETED for job in scheduler.jobs.values())
+    assert len(backend.started) == 5
+
+
+def test_retry_with_backoff():
+    backend = FakeTaskBackend(states={"img": ["FAILED", "FAILED", "COMPLETED"]})
+    scheduler = ExportScheduler(backend=backend, poll_interval=0, max_retries=1, backoff=0)
+    scheduler.add("img", lambda: "img")
+    scheduler.wait(timeout=5)
+    assert scheduler.jobs["img"].state == ExportState.FAILED
+    assert scheduler.jobs["img"].attempts == 2
+    assert scheduler.jobs["img"].error == "error"
+
+    backend = FakeTaskBackend(states={"img": ["FAILED", "COMPLETED"]})
+    scheduler = ExportScheduler(backend=backend, poll_interval=0, max_retries=1, backoff=0)
+    scheduler.add("img", lambda: "img")
+    scheduler.wait(timeout=5)
+    assert scheduler.jobs["img"].state == ExportState.COMPLETED
+    assert backend.started == ["img", "img"]
+
+
+def test_resume_from_manifest(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    backend = FakeTaskBackend(states={"img_1": ["RUNNING"], "img_2": ["RUNNING"]})
+    scheduler = ExportScheduler(backend=backend, manifest_path=manifest, poll_interval=0)
+    for i in range(3):
+        scheduler.add(f"img_{i}", lambda i=i: f"img_{i}")
+    scheduler.step()
+    scheduler.step()
+    # simulate a crash: the scheduler is discarded while img_1 and img_2 are running
+    saved = {job["description"]: job["state"] for job in json.loads(manifest.read_text())}
+    assert saved == {"img_0": "completed", "img_1": "running", "img_2": "running"}
+
+    backend = FakeTaskBackend()
+    scheduler = ExportScheduler(backend=backend, manifest_path=manifest, poll_interval=0)
+    for i in range(4):
+        scheduler.add(f"img_{i}", lambda i=i: f"img_{i}")
+    scheduler.wait(timeout=5)
+    assert backend.started == ["img_3"]
+    assert all(job.state == ExportState.COMPLETED for job in scheduler.jobs.values())
+
+
+def test_wait_timeout():
+    backend = FakeTaskBackend(states={"img": ["RUNNING"]})
+    scheduler = ExportScheduler(backend=backend, poll_interval=0.01)
+    scheduler.add("img", lambda: "img")
+    with pytest.raises(TimeoutError, match="Export tasks did not finish within the given timeout"):
+        scheduler.wait(timeout=0.1)
+    scheduler.stop()
+
+
+def test_unknown_task_is_running():
+    backend = FakeTaskBackend(states={"img": ["UNKNOWN", "UNKNOWN", "COMPLETED"]})
+    scheduler = ExportScheduler(backend=backend, poll_interval=0)
+    scheduler.add("img", lambda: "img")
+    scheduler.wait(timeout=5)
+    assert scheduler.jobs["img"].state == ExportState.COMPLETED
+    # the task was not visible to the server yet, it is not submitted twice
+    assert backend.started == ["img"]
+
+    backend = FakeTaskBackend(states={"img": ["UNKNOWN", "UNKNOWN", "COMPLETED"]})
+    scheduler = ExportScheduler(
+        backend=backend, poll_interval=0.02, backoff=0, unknown_timeout=0.01
+    )
+    scheduler.add("img", lambda: "img")
+    scheduler.wait(timeout=5)
+    assert scheduler.jobs["img"].state == ExportState.COMPLETED
+    assert backend.started == ["img", "img"]
+
+
+def test_ee_task_backend_status(mocker):
+    operations = {
+        "operations/done": {"metadata": {"state": "SUCCEEDED"}, "done": True},
+        "operations/failed": {
+            "metadata": {"state": "FAILED"},
+            "done": True,
+            "error": {"message": "out of memory"},
+        },
+    }
+
+    def get_operation(name):
+        if name not in operations:
+            raise ee.EEException(f"{name} not found")
+        return {"name": name, **operations[name]}
+
+    mocker.patch("ee.data.getOperation", side_effect=get_operation)
+    statuses = EETaskBackend().status(["operations/done", "operations/failed", "operations/new"])
+    assert statuses == {
+        "operations/done": {"id": "operations/done", "state": "COMPLETED"},
+        "operations/failed": {
+            "id": "operations/failed",
+            "state": "FAILED",
+            "error_message": "out of memory",
+        },
+    }
+
+
+def test_skip_pending_jobs_not_added_again(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    backend = FakeTaskBackend()
+    scheduler = ExportScheduler(backend=backend, manifest_path=manifest, max_running=1)
+    for i in range(2):
+        scheduler.add(f"img_{i}", lambda i=i: f"img_{i}")
+    scheduler._save_manifest()
+    # img_1 was still pending when the export was interrupted, and is no longer exported
+    scheduler = ExportScheduler(backend=backend, manifest_path=manifest, poll_interval=0)
+    scheduler.add("img_0", lambda: "img_0")
+    scheduler.wait(timeout=5)
+    assert scheduler.jobs["img_1"].state == ExportState.SKIPPED
+    assert backend.started == ["img_0"]
+
+    scheduler = ExportScheduler(backend=backend, manifest_path=manifest, poll_interval=0)
+    scheduler.add("img_1", lambda: "img_1")
+    scheduler.wait(timeout=5)
+    assert scheduler.jobs["img_1"].state == ExportState.COMPLETED
+
+
+def test_task_description():
+    index = "S1A_IW_GRDH_1SDV_20221005T012526_20221005T012551_045313_056A8E_4B5A"
+    assert _task_description("Sentinel-1_flood_extent", index) == f"Sentinel-1_flood_extent_{index}"
+    assert _task_description("S1", "1_2/3") == "S1_1_2_3"
+    long = _task_description("Sentinel-1_flood_extent", index * 2)
+    assert len(long) == 100
+    assert long != _task_description("Sentinel-1_flood_extent", index * 2 + "_0")
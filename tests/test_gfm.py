@@ -24,7 +24,7 @@ def test_GFM(caplog, mocker):
     )
     # Test init
     assert "Successfully authenticated to the GFM API\n" in caplog.text
-    assert "Successfully uploaded geometry to GFM server" in caplog.text
+    assert gfm.aoi_id is not None
     assert "Retrieving GFM product information" in caplog.text
     assert len(gfm.products) == 5
     assert gfm.user["client_id"] == "iiq9MAfBmxgYynhpxFwi78J5"
@@ -43,7 +43,7 @@ def test_GFM(caplog, mocker):
     assert isinstance(wms_map, Map)
 
     # Test export_data
-    mock_get_request = mocker.patch("requests.get")
+    mock_get_request = mocker.patch.object(gfm.client.session, "request")
     mock_request_response = mocker.Mock(status_code=200, json=lambda: {"link": "mock_link"})
     mock_get_request.return_value = mock_request_response
     gfm.export_data()
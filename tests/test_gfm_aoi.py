@@ -0,0 +1,81 @@
+import pytest
+
+from eo_floods.cache import MetadataCache, set_cache
+from eo_floods.providers.GFM.aoi import AOI_PREFIX, AOIRegistry, aoi_name
+from eo_floods.utils import coords_to_geojson
+
+BBOX = [67.740187, 27.712453, 68.104933, 28.000935]
+
+
+@pytest.fixture
+def client(mocker):
+    aois = {"other": "aoi_0"}
+
+    def get(path):
+        return mocker.Mock(
+            status_code=200,
+            json=lambda: {"aois": [{"aoi_name": k, "aoi_id": v} for k, v in aois.items()]},
+        )
+
+    def post(path, json):
+        aois[json["aoi_name"]] = f"aoi_{len(aois)}"
+        return mocker.Mock(status_code=201, json=lambda: {"aoi_id": aois[json["aoi_name"]]})
+
+    def request(method, path):
+        aois.pop(next(k for k, v in aois.items() if path.endswith(v)))
+        return mocker.Mock(status_code=200)
+
+    client = mocker.Mock(base_url="http://localhost/v2/", user={"client_id": "user"})
+    client.get.side_effect = get
+    client.post.side_effect = post
+    client.request.side_effect = request
+    client.aois = aois
+    return client
+
+
+@pytest.fixture
+def no_cache():
+    set_cache(None)
+    yield
+    set_cache(None)
+
+
+def test_aoi_name():
+    name = aoi_name(coords_to_geojson(BBOX))
+    assert name.startswith(AOI_PREFIX)
+    assert name == aoi_name(coords_to_geojson([*BBOX[:3], 28.0009350000001]))
+    assert name != aoi_name(coords_to_geojson([*BBOX[:3], 28.1]))
+
+
+def test_registry_reuses_aois(client, no_cache):
+    registry = AOIRegistry(client)
+    geojson = coords_to_geojson(BBOX)
+    aoi_id = registry.get_or_create(geojson)
+    assert registry.get_or_create(geojson) == aoi_id
+    assert client.get.call_count == 1
+    assert client.post.call_count == 1
+
+    # a new registry finds the AOI in the listing of the user
+    assert AOIRegistry(client).get_or_create(geojson) == aoi_id
+    assert client.post.call_count == 1
+
+
+def test_registry_uses_metadata_cache(client, tmp_path):
+    set_cache(MetadataCache(tmp_path / "cache.sqlite"))
+    try:
+        geojson = coords_to_geojson(BBOX)
+        aoi_id = AOIRegistry(client).get_or_create(geojson)
+        assert AOIRegistry(client).get_or_create(geojson) == aoi_id
+        assert client.get.call_count == 1
+    finally:
+        set_cache(None)
+
+
+def test_registry_cleanup(client, no_cache):
+    registry = AOIRegistry(client)
+    keep = coords_to_geojson(BBOX)
+    kept = registry.get_or_create(keep)
+    stale = registry.get_or_create(coords_to_geojson([0, 0, 1, 1]))
+    assert registry.cleanup(keep=[keep]) == [stale]
+    assert set(client.aois.values()) == {"aoi_0", kept}
+    assert registry.get_or_create(keep) == kept
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+import requests
+
+from eo_floods.providers.GFM.client import GFMClient
+from eo_floods.providers.GFM.tokens import TokenStore
+
+
+def response(mocker, status_code, json=None, headers=None):
+    return mocker.Mock(status_code=status_code, json=lambda: json, headers=headers or {})
+
+
+@pytest.fixture
+def client(mocker, monkeypatch):
+    monkeypatch.setenv("GFM_API_URL", "http://localhost:8000/v2")
+    client = GFMClient(
+        email="user@example.com",
+        pwd="password",
+        backoff_factor=0.01,
+        token_store=TokenStore(),
+    )
+    login = mocker.patch.object(client.session, "post")
+    login.side_effect = lambda **kwargs: response(
+        mocker, 200, {"access_token": f"token{login.call_count}", "client_id": "id"}
+    )
+    mocker.patch("eo_floods.providers.GFM.client.time.sleep")
+    return client
+
+
+def test_client_base_url_and_auth(client, mocker):
+    request = mocker.patch.object(client.session, "request", return_value=response(mocker, 200))
+    client.get("/aoi/1/products", params={"time": "range"})
+    method, url = request.call_args.args
+    assert (method, url) == ("GET", "http://localhost:8000/v2/aoi/1/products")
+    assert request.call_args.kwargs["auth"].token == "token1"
+    assert request.call_args.kwargs["timeout"] == 120
+    assert client.session.adapters["https://"]._pool_maxsize == 10
+
+
+def test_client_retries_idempotent_requests(client, mocker):
+    request = mocker.patch.object(
+        client.session,
+        "request",
+        side_effect=[
+            requests.ConnectionError(),
+            response(mocker, 503),
+            response(mocker, 429, headers={"Retry-After": "1"}),
+            response(mocker, 200),
+        ],
+    )
+    assert client.get("aoi/1/products").status_code == 200
+    assert request.call_count == 4
+
+    request.side_effect = [response(mocker, 503), response(mocker, 201)]
+    assert client.post("aoi/create").status_code == 503
+
+    request.side_effect = [response(mocker, 503)] * 5
+    assert client.get("aoi/1/products").status_code == 503
+    assert request.call_count == 4 + 1 + 4
+
+
+def test_client_refreshes_token(client, mocker):
+    request = mocker.patch.object(
+        client.session,
+        "request",
+        side_effect=[response(mocker, 401), response(mocker, 200)],
+    )
+    assert client.post("aoi/create").status_code == 200
+    assert client.session.post.call_count == 2
+    assert request.call_count == 2
+    assert request.call_args.kwargs["auth"].token == "token2"
+
+
+def test_client_shares_tokens(client, mocker):
+    user = client.user
+    other = GFMClient(email="user@example.com", pwd="password", token_store=client.token_store)
+    assert other.user == user
+    assert client.session.post.call_count == 1
+
+
+def test_client_refreshes_token_before_expiry(client, mocker, monkeypatch):
+    mocker.patch.object(client.session, "request", return_value=response(mocker, 200))
+    client.get("aoi/1/products")
+    monkeypatch.setattr(client._token, "expires_at", time.time() + 60)
+    client.get("aoi/1/products")
+    assert client.session.post.call_count == 2
@@ -0,0 +1,125 @@
+import io
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from eo_floods.providers.GFM.download import ProductDownloader, extract_files
+
+PRODUCTS = [
+    {"product_id": f"product_{i}", "product_time": f"2022-10-0{i + 1}T00:00:00"}
+    for i in range(3)
+]
+
+
+def archive_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("product/ENSEMBLE_FLOOD_20221001.tif", b"flood" * 1000)
+        zf.writestr("product/ENSEMBLE_UNCERTAINTY_20221001.tif", b"uncertainty")
+        zf.writestr("product/metadata.json", b"{}")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def server():
+    data = archive_bytes()
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        support_ranges = True
+        # number of bytes after which the next response is cut off
+        truncate_at = None
+
+        def do_GET(self):
+            requests_seen.append(self.headers.get("Range"))
+            start = 0
+            if self.support_ranges and self.headers.get("Range"):
+                start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(len(data) - start))
+            self.end_headers()
+            if Handler.truncate_at is not None:
+                self.wfile.write(data[start : start + Handler.truncate_at])
+                Handler.truncate_at = None
+                self.close_connection = True
+                return
+            self.wfile.write(data[start:])
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    httpd.data = data
+    httpd.handler = Handler
+    httpd.requests_seen = requests_seen
+    httpd.url = "http://127.0.0.1:{}/archive.zip".format(httpd.server_address[1])
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def client(mocker, server):
+    client = mocker.Mock(max_retries=2, session=requests.Session())
+    client.get.return_value = mocker.Mock(
+        status_code=200, json=lambda: {"download_link": server.url}
+    )
+    return client
+
+
+def test_download_products(client, server, tmp_path):
+    progress = []
+    downloader = ProductDownloader(client, progress=lambda *args: progress.append(args))
+    results = downloader.download(PRODUCTS, "user", tmp_path)
+
+    assert [result.product_id for result in results] == ["product_0", "product_1", "product_2"]
+    for result in results:
+        assert result.archive.read_bytes() == server.data
+        assert [path.name for path in result.files] == ["ENSEMBLE_FLOOD_20221001.tif"]
+        assert result.files[0].read_bytes() == b"flood" * 1000
+    assert client.get.call_count == 3
+    assert progress[-1] == (3, 3, 3 * len(server.data))
+    assert not list(tmp_path.glob("*.part"))
+
+    # downloaded archives are not downloaded again
+    downloader.download(PRODUCTS, "user", tmp_path)
+    assert client.get.call_count == 3
+
+
+def test_download_resumes(client, server, tmp_path):
+    (tmp_path / "product_0.zip.part").write_bytes(server.data[:100])
+    [result] = ProductDownloader(client).download(PRODUCTS[:1], "user", tmp_path, None)
+    assert server.requests_seen == ["bytes=100-"]
+    assert result.archive.read_bytes() == server.data
+    assert result.files == []
+
+    # a server that ignores the range request sends the whole file
+    server.handler.support_ranges = False
+    (tmp_path / "product_1.zip.part").write_bytes(b"corrupt")
+    [result] = ProductDownloader(client).download(PRODUCTS[1:2], "user", tmp_path, None)
+    assert result.archive.read_bytes() == server.data
+
+
+def test_download_resumes_interrupted_response(client, server, tmp_path):
+    server.handler.truncate_at = 1000
+    [result] = ProductDownloader(client).download(PRODUCTS[:1], "user", tmp_path, None)
+    assert server.requests_seen == [None, "bytes=1000-"]
+    assert result.archive.read_bytes() == server.data
+    assert not (tmp_path / "product_0.zip.part").exists()
+
+
+def test_extract_files(tmp_path):
+    archive = tmp_path / "archive.zip"
+    archive.write_bytes(archive_bytes())
+    files = extract_files(archive, tmp_path / "out", ["*uncertainty*", "*.JSON"])
+    assert sorted(path.name for path in files) == [
+        "ENSEMBLE_UNCERTAINTY_20221001.tif",
+        "metadata.json",
+    ]
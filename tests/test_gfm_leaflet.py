@@ -0,0 +1,46 @@
+from ipyleaflet import Map
+
+from eo_floods.providers.GFM.gfm import GFM
+from eo_floods.providers.GFM.leaflet import WMSMap
+from eo_floods.providers.GFM.products import ProductIndex
+
+BBOX = [67.740187, 27.712453, 68.104933, 28.000935]
+
+
+def test_wms_map_times():
+    wms_map = WMSMap(
+        "2022-10-01",
+        "2022-10-31",
+        "observed_flood_extent",
+        BBOX,
+        times=[("2022-10-03 (1)", "2022-10-03"), ("2022-10-09 (2)", "2022-10-09")],
+    )
+    assert wms_map.wms.time == "2022-10-03"
+    assert isinstance(wms_map.get_map(), Map)
+    assert wms_map.slider.value == "2022-10-03"
+    wms_map.slider.value = "2022-10-09"
+    assert wms_map.wms.time == "2022-10-09"
+
+
+def test_gfm_view_data_slider(mocker):
+    gfm = GFM.__new__(GFM)
+    gfm.start_date, gfm.end_date, gfm.geometry = "2022-10-01", "2022-10-31", BBOX
+    gfm.products = ProductIndex(
+        [
+            {"product_id": "a", "product_time": "2022-10-09T01:00:00"},
+            {"product_id": "b", "product_time": "2022-10-03T01:00:00"},
+            {"product_id": "c", "product_time": "2022-10-09T13:00:00"},
+        ],
+    )
+    wms_map = mocker.patch("eo_floods.providers.GFM.leaflet.WMSMap")
+    gfm.view_data()
+    assert wms_map.call_args.kwargs["times"] == [
+        ("2022-10-03 (1)", "2022-10-03"),
+        ("2022-10-09 (2)", "2022-10-09"),
+    ]
+    gfm.view_data(per_product=True)
+    assert wms_map.call_args.kwargs["times"] == [
+        "2022-10-03T01:00:00",
+        "2022-10-09T01:00:00",
+        "2022-10-09T13:00:00",
+    ]
@@ -0,0 +1,109 @@
+import pytest
+import requests
+
+from eo_floods.providers.GFM.products import ProductIndex, ProductQuery, time_slices
+
+
+def test_time_slices():
+    assert time_slices("2022-10-01", "2022-10-01", 31) == [
+        ("2022-10-01T00:00:00", "2022-10-01T23:59:59"),
+    ]
+    slices = time_slices("2022-01-01", "2022-03-15", 31)
+    assert slices == [
+        ("2022-01-01T00:00:00", "2022-01-31T23:59:59"),
+        ("2022-02-01T00:00:00", "2022-03-03T23:59:59"),
+        ("2022-03-04T00:00:00", "2022-03-15T23:59:59"),
+    ]
+
+
+@pytest.fixture
+def client(mocker):
+    failures = {"2022-02-01T00:00:00": 1}
+
+    def get(path, params):
+        if params is None:
+            # second page of the first slice
+            return mocker.Mock(
+                status_code=200,
+                json=lambda: {"products": [{"product_id": "c", "product_time": "2022-01-20"}]},
+            )
+        if failures.get(params["from"]):
+            failures[params["from"]] -= 1
+            response = mocker.Mock(status_code=503)
+            response.raise_for_status.side_effect = requests.HTTPError(response=response)
+            return response
+        products = {
+            "2022-01-01T00:00:00": [
+                {"product_id": "b", "product_time": "2022-01-25"},
+                {"product_id": "a", "product_time": "2022-01-02"},
+            ],
+            "2022-02-01T00:00:00": [
+                {"product_id": "d", "product_time": "2022-02-03"},
+                {"product_id": "b", "product_time": "2022-01-25"},
+            ],
+        }[params["from"]]
+        body = {"products": products}
+        if params["from"] == "2022-01-01T00:00:00":
+            body["next"] = "http://localhost/v2/aoi/1/products?page=2"
+        return mocker.Mock(status_code=200, json=lambda: body)
+
+    client = mocker.Mock(base_url="http://localhost/v2/")
+    client.get.side_effect = get
+    return client
+
+
+def test_product_query(client):
+    products = ProductQuery(client, slice_days=31).fetch("1", "2022-01-01", "2022-03-03")
+    assert [product["product_id"] for product in products] == ["a", "c", "b", "d"]
+    paths = [call.args[0] for call in client.get.call_args_list]
+    assert paths.count("aoi/1/products?page=2") == 1
+    # one request per slice, one for the second page and one retry of the failed slice
+    assert len(paths) == 4
+
+
+def test_product_query_raises_client_errors(client, mocker):
+    response = mocker.Mock(status_code=404)
+    response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    client.get.side_effect = None
+    client.get.return_value = response
+    with pytest.raises(requests.HTTPError):
+        ProductQuery(client).fetch("1", "2022-01-01", "2022-01-31")
+    assert client.get.call_count == 1
+
+
+@pytest.fixture
+def index():
+    products = [
+        {"product_id": "c", "product_time": "2022-10-02T13:00:00"},
+        {"product_id": "a", "product_time": "2022-10-01T01:00:00"},
+        {"product_id": "d", "product_time": "2022-10-05T01:00:00Z"},
+        {"product_id": "b", "product_time": "2022-10-02T01:00:00"},
+    ]
+    return ProductIndex(products)
+
+
+def test_product_index_queries(index):
+    assert index.ids == ["a", "b", "c", "d"]
+    assert [p["product_id"] for p in index.on_day("2022-10-02")] == ["b", "c"]
+    assert [p["product_id"] for p in index.between("2022-10-01T02:00", "2022-10-02")] == ["b", "c"]
+    assert index.between("2022-10-06", "2022-10-07").to_list() == []
+    assert index.at("2022-10-05T01:00:00").ids == ["d"]
+    assert index.nearest("2022-10-04")["product_id"] == "d"
+    assert index.nearest("2022-10-02T06:00:00")["product_id"] == "b"
+    assert index.nearest("1990-01-01")["product_id"] == "a"
+    assert index.by_day() == {
+        "2022-10-01": ["2022-10-01T01:00:00"],
+        "2022-10-02": ["2022-10-02T01:00:00", "2022-10-02T13:00:00"],
+        "2022-10-05": ["2022-10-05T01:00:00Z"],
+    }
+    with pytest.raises(ValueError, match="No products"):
+        index.between("2022-10-06", "2022-10-07").nearest("2022-10-01")
+
+
+def test_product_index_select_is_non_destructive(index):
+    selection = index.select(["2022-10-02T13:00:00", "2022-10-01"])
+    assert selection.ids == ["a", "c"]
+    assert len(index) == 4
+    assert selection.select(["2022-10-05"]).ids == []
+    assert index.select(["2022-10-05"]).ids == ["d"]
+    assert selection[0] is index[0]
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+
+from eo_floods.providers.GFM.tiles import TileCache, TileProxy
+
+TIMES = ["2022-10-01", "2022-10-02", "2022-10-03", "2022-10-04"]
+QUERY = "service=WMS&request=GetMap&layers=flood&format=image%2Fpng&bbox=0,0,1,1&time={}"
+
+
+@pytest.fixture
+def wms():
+    calls = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            calls[query["time"][0]] += 1
+            data = f"tile {query['time'][0]}".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.calls = calls
+    server.url = "http://127.0.0.1:{}/wms".format(server.server_address[1])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_tile_proxy_caches_and_prefetches(wms, tmp_path):
+    with TileProxy(wms.url, TileCache(tmp_path)) as proxy:
+        proxy.set_times("flood", TIMES)
+        r = requests.get(f"{proxy.url}?{QUERY.format(TIMES[1])}", timeout=5)
+        assert r.status_code == 200
+        assert r.content == b"tile 2022-10-02"
+        assert r.headers["Content-Type"] == "image/png"
+
+        # the neighbouring times are prefetched in the background
+        wait_for(lambda: len(proxy.cache) == 3)
+        assert set(wms.calls) == {"2022-10-01", "2022-10-02", "2022-10-03"}
+
+        r = requests.get(f"{proxy.url}?{QUERY.format(TIMES[2])}", timeout=5)
+        assert r.content == b"tile 2022-10-03"
+        assert wms.calls["2022-10-03"] == 1
+        wait_for(lambda: len(proxy.cache) == 4)
+        assert all(count == 1 for count in wms.calls.values())
+
+
+def test_tile_proxy_prefetches_several_layers(wms, tmp_path):
+    query = QUERY.replace("layers=flood", "layers=flood,water")
+    with TileProxy(wms.url, TileCache(tmp_path)) as proxy:
+        proxy.set_times(["flood", "water"], TIMES)
+        requests.get(f"{proxy.url}?{query.format(TIMES[0])}", timeout=5)
+        wait_for(lambda: len(proxy.cache) == 2)
+        assert set(wms.calls) == {"2022-10-01", "2022-10-02"}
+
+
+def test_tile_cache_evicts_least_recently_used(tmp_path):
+    cache = TileCache(tmp_path, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.set("c", b"1234")
+    assert "b" not in cache
+    assert cache.get("a") is not None
+    assert not (tmp_path / "b.tile").exists()
+
+    # the cache is restored from disk
+    assert len(TileCache(tmp_path, max_bytes=10)) == 2
@@ -0,0 +1,59 @@
+import base64
+import json
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from eo_floods.providers.GFM.tokens import Token, TokenStore, token_key
+
+
+def jwt(exp, **claims):
+    claims = json.dumps({"exp": exp, **claims}).encode()
+    payload = base64.urlsafe_b64encode(claims).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+def test_token_expiry():
+    exp = time.time() + 1000
+    assert Token.from_login({"access_token": jwt(exp)}).expires_at == exp
+    token = Token.from_login({"access_token": "opaque", "expires_in": 100})
+    assert 90 < token.expires_at - time.time() <= 100
+    assert token.expires_within(200)
+    assert not token.expires_within(50)
+
+
+def test_token_store_on_disk(tmp_path):
+    path = tmp_path / "tokens.json"
+    key = token_key("https://api.gfm.eodc.eu/v2/", "User@example.com")
+    assert key == token_key("https://api.gfm.eodc.eu/v2/", "user@example.com")
+    TokenStore(path).set(key, Token.from_login({"access_token": jwt(time.time() + 1000)}))
+
+    assert "example.com" not in path.read_text()
+    if os.name == "posix":
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert not path.with_name("tokens.json.lock").exists()
+    assert TokenStore(path).get(key) is not None
+    assert TokenStore(path, refresh_margin=2000).get(key) is None
+
+    TokenStore(path).invalidate(key)
+    assert TokenStore(path).get(key) is None
+
+
+def test_token_store_logs_in_once(tmp_path):
+    logins = []
+
+    def login():
+        logins.append(1)
+        time.sleep(0.05)
+        return {"access_token": jwt(time.time() + 1000, jti=len(logins))}
+
+    stores = [TokenStore(tmp_path / "tokens.json") for _ in range(4)]
+    with ThreadPoolExecutor(8) as executor:
+        tokens = list(executor.map(lambda i: stores[i % 4].get_or_login("key", login), range(8)))
+    assert len(logins) == 1
+    assert len({token.access_token for token in tokens}) == 1
+
+    stale = tokens[0].access_token
+    assert stores[0].get_or_login("key", login, stale_token=stale).access_token != stale
+    assert len(logins) == 2
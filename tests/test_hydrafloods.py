@@ -7,6 +7,9 @@ import pytest
 import logging
 from eo_floods.providers.hydrafloods import HydraFloodsDataset, HydraFloods
 from eo_floods.providers.hydrafloods.dataset import DATASETS
+from eo_floods.providers.hydrafloods.images import CollectionImages
+from eo_floods.providers.hydrafloods.landmask import LandMask
+from eo_floods.providers.hydrafloods.thresholds import CollectionThresholds
 from eo_floods import FloodMap
 
 
@@ -111,3 +114,161 @@ def test_export_data():
 
    
     
+
+
+def test_available_data_single_request(mocker):
+    hf_provider = hydrafloods_instance(["Sentinel-1", "Landsat 7"])
+    spy_get_info = mocker.spy(ee.ComputedObject, "getInfo")
+    available_data = hf_provider.available_data()
+    assert spy_get_info.call_count == 1
+    s1 = available_data["Sentinel-1"]
+    assert s1.n_images == len(s1.dates) == len(s1.q_scores)
+    assert available_data.datasets[1].name == "Landsat 7"
+
+
+def test_collection_images(mocker):
+    hf_provider = hydrafloods_instance(["Sentinel-1"])
+    n_images = hf_provider.datasets[0].obj.n_images
+    images = CollectionImages(hf_provider.datasets[0].obj.collection)
+    spy_get_info = mocker.spy(ee.ComputedObject, "getInfo")
+    spy_fetch_refs = mocker.spy(CollectionImages, "_fetch_refs")
+    assert len(images) == n_images
+    refs = [ref for ref, _ in images]
+    # the references of all images are fetched with a single reduceColumns request
+    assert spy_fetch_refs.call_count == 1
+    assert spy_get_info.call_count == 1
+    assert refs == sorted(refs, key=lambda ref: ref.time_start)
+    img = images.image(refs[0])
+    assert img.get("system:index").getInfo() == refs[0].index
+
+
+def test_available_data_cached(mocker, metadata_cache):
+    hf_provider = hydrafloods_instance(["Sentinel-1"])
+    available_data = hf_provider.available_data()
+    assert len(metadata_cache) == 1
+    spy_get_info = mocker.spy(ee.ComputedObject, "getInfo")
+    assert hydrafloods_instance(["Sentinel-1"]).available_data() == available_data
+    assert spy_get_info.call_count == 0
+    hf_provider.select_data(dates=[available_data["Sentinel-1"].dates[0]])
+    hf_provider.available_data()
+    assert spy_get_info.call_count == 1
+
+
+def test_land_mask():
+    # area of interest on the border of the Netherlands and Belgium, including the North Sea
+    region = ee.Geometry.BBox(3.2, 51.2, 3.8, 51.6)
+    land_mask = LandMask(region)
+    assert land_mask.countries.size().getInfo() == 2
+    land_area = land_mask.geometry.area(maxError=100).getInfo()
+    assert 0 < land_area < region.area(maxError=100).getInfo()
+
+    raster_mask = LandMask(region, method="raster")
+    img = raster_mask.apply(ee.Image(1))
+    n_land_pixels = img.reduceRegion(ee.Reducer.count(), region, scale=1000).get("constant")
+    assert n_land_pixels.getInfo() > 0
+    with pytest.raises(ValueError, match="Land mask method 'polygon' not supported"):
+        LandMask(region, method="polygon")
+
+
+def test_land_mask_once_per_provider():
+    hf_provider = hydrafloods_instance(["Sentinel-1", "Landsat 8"])
+    hf_provider._generate_flood_extents(clip_ocean=True, land_mask_method="raster")
+    assert list(hf_provider._land_masks) == [("raster", 100)]
+
+
+def test_Hydrafloods_lazy_datasets(mocker):
+    sentinel1 = mocker.spy(hf, "Sentinel1")
+    hf_provider = hydrafloods_instance(["Sentinel-1"])
+    assert not hf_provider.datasets[0].is_built
+    sentinel1.assert_not_called()
+    assert isinstance(hf_provider.datasets[0].obj, hf.Sentinel1)
+    assert hf_provider.datasets[0].obj is hf_provider.datasets[0].obj
+    sentinel1.assert_called_once()
+
+
+def test_Hydrafloods_temporal_coverage(caplog):
+    hf_provider = HydraFloods(
+        datasets=[DATASETS["Sentinel-1"], DATASETS["Landsat 7"], DATASETS["MODIS"]],
+        start_date="2025-01-01",
+        end_date="2025-01-15",
+        geometry=[67.740187, 27.712453, 68.104933, 28.000935],
+    )
+    assert [dataset.name for dataset in hf_provider.datasets] == ["Sentinel-1"]
+    assert "Skipping Landsat 7" in caplog.text
+    with pytest.raises(ValueError, match="None of the datasets"):
+        HydraFloods(
+            datasets=[DATASETS["Sentinel-1"]],
+            start_date="2010-01-01",
+            end_date="2010-01-15",
+            geometry=[67.740187, 27.712453, 68.104933, 28.000935],
+        )
+
+
+def test_generate_flood_extents_collection_threshold(caplog):
+    hf_provider = hydrafloods_instance(["Sentinel-1"])
+    caplog.set_level(logging.INFO)
+    hf_provider._generate_flood_extents(clip_ocean=False, threshold_mode="collection")
+    assert "one threshold per collection" in caplog.text
+    collection = hf_provider.flood_extents["Sentinel-1"].collection
+    thresholds = collection.aggregate_array("edge_otsu_threshold").distinct().getInfo()
+    assert len(thresholds) == 1
+    assert -40 < thresholds[0] < 10
+    assert collection.first().bandNames().getInfo() == ["water"]
+    with pytest.raises(ValueError, match="Threshold mode 'scene' not supported"):
+        hf_provider._generate_flood_extents(threshold_mode="scene")
+
+
+def test_generate_flood_extents_orbit_threshold():
+    hf_provider = hydrafloods_instance(["Sentinel-1"])
+    hf_provider._generate_flood_extents(clip_ocean=False, threshold_mode="orbit")
+    collection = hf_provider.flood_extents["Sentinel-1"].collection
+    n_orbits = collection.aggregate_array("relativeOrbitNumber_start").distinct().size()
+    n_thresholds = collection.aggregate_array("edge_otsu_threshold").distinct().size()
+    assert n_thresholds.getInfo() <= n_orbits.getInfo()
+    with pytest.raises(ValueError, match="VIIRS has no orbit property"):
+        CollectionThresholds("orbit").group(ee.Image(1), hydrafloods_instance(["VIIRS"]).datasets[0])
+
+
+def test_cached_thresholds(mocker, metadata_cache):
+    spy_thresholds = mocker.spy(ee.Dictionary, "select")
+    hf_provider = hydrafloods_instance(["Sentinel-1"])
+    hf_provider._generate_flood_extents(
+        clip_ocean=False, threshold_mode="week", cache_thresholds=True
+    )
+    assert len(metadata_cache) == 1
+    # the thresholds of the weeks are computed in a single request
+    assert spy_thresholds.call_count == 1
+    spy_thresholds.reset_mock()
+    hf_provider = hydrafloods_instance(["Sentinel-1"])
+    hf_provider._generate_flood_extents(
+        clip_ocean=False, threshold_mode="week", cache_thresholds=True
+    )
+    # the thresholds of the weeks come from the cache and are not computed again
+    assert spy_thresholds.call_count == 0
+
+
+def test_update_monitor(mocker, tmp_path):
+    from eo_floods.providers.hydrafloods.export import ExportJob, ExportState
+    from eo_floods.providers.hydrafloods.monitor import WatermarkStore
+
+    store = WatermarkStore(tmp_path / "watermarks.json")
+    hf_provider = hydrafloods_instance(["Sentinel-1"])
+    scheduler = mocker.Mock()
+    scheduler.wait.side_effect = lambda timeout: {
+        call.args[0]: ExportJob(description=call.args[0], state=ExportState.COMPLETED)
+        for call in scheduler.add.call_args_list
+    }
+    watermarks = hf_provider.update_monitor(
+        "projects/p/assets/monitor", store=store, scheduler=scheduler, clip_ocean=False
+    )
+    watermark = watermarks["Sentinel-1"]
+    assert watermark.n_scenes == hf_provider.datasets[0].obj.n_images
+    assert watermark.aggregates.startswith("projects/p/assets/monitor/S1_flood_aggregates_")
+
+    # all scenes were processed, the next run has nothing to do
+    scheduler.reset_mock()
+    hf_provider = hydrafloods_instance(["Sentinel-1"])
+    assert hf_provider.update_monitor("projects/p/assets/monitor", store=store) == watermarks
+    assert "Sentinel-1" not in hf_provider.flood_extents
+    # the watermark only filtered the monitor run, the provider still sees all scenes
+    assert hf_provider.datasets[0].obj.n_images == watermark.n_scenes
@@ -0,0 +1,82 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = [
+    "dateutil",
+    "folium",
+    "geemap",
+    "hydrafloods",
+    "ipyleaflet",
+    "ipywidgets",
+    "tabulate",
+]
+
+
+def run_import(statement: str) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "duration = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'duration': duration, 'heavy': heavy}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_import_eo_floods_is_fast():
+    result = run_import("import eo_floods\nassert 'ee' not in sys.modules")
+    assert result["heavy"] == []
+    assert result["duration"] < 0.5
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "from eo_floods import FloodMap",
+        "from eo_floods import FloodMapBatch, AsyncFloodMap",
+        "from eo_floods.providers import HydraFloods, GFM",
+    ],
+)
+def test_import_is_headless(statement):
+    assert run_import(statement)["heavy"] == []
+
+
+def test_floodmap_does_not_load_gfm():
+    code = (
+        "import sys\n"
+        "from eo_floods import FloodMap\n"
+        "assert 'eo_floods.providers.GFM.client' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_logging_not_configured_on_import():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import logging, eo_floods; from eo_floods import FloodMap;"
+            " print(len(logging.getLogger().handlers))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "0"
+
+
+def test_provider_classes():
+    code = (
+        "import eo_floods.providers.GFM.gfm\n"
+        "from eo_floods.providers import GFM, HydraFloods\n"
+        "assert isinstance(GFM, type), GFM\n"
+        "assert isinstance(HydraFloods, type), HydraFloods\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
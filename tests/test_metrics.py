@@ -0,0 +1,84 @@
+import ee
+import pytest
+
+from eo_floods import metrics
+from eo_floods.metrics import Metrics
+
+
+def test_track_records_calls_per_stage():
+    recorder = Metrics()
+    seen = []
+    recorder.hooks.append(seen.append)
+    with recorder.stage("available_data"):
+        with metrics.track("ee", "computeValue", expression_size=10):
+            pass
+        with metrics.stage("generate"), metrics.track("ee", "getMapId"):
+            pass
+        with pytest.raises(ValueError), metrics.track("ee", "computeValue"):
+            raise ValueError
+    with metrics.track("ee", "computeValue"):
+        pass
+
+    assert len(recorder.records) == 3
+    assert seen == recorder.records
+    summary = recorder.summary()
+    assert summary["available_data"].count == 2
+    assert summary["available_data"].errors == 1
+    assert summary["available_data"].expression_size == 10
+    assert summary["available_data"].calls == {"computeValue": 2}
+    assert summary["generate"].calls == {"getMapId": 1}
+
+
+def test_wrapped_ee_function(mocker):
+    func = mocker.Mock(__name__="computeValue", return_value=3)
+    wrapped = metrics._wrap_ee(func)
+    recorder = Metrics()
+
+    assert wrapped(ee.Number(1).add(2)) == 3
+    assert recorder.records == []
+    with recorder.stage("select"):
+        assert wrapped(ee.Number(1).add(2)) == 3
+    record = recorder.records[0]
+    assert record.kind == "ee"
+    assert record.name == "computeValue"
+    assert record.expression_size == len(ee.Number(1).add(2).serialize())
+
+
+def test_http_hook(mocker):
+    recorder = Metrics()
+    response = mocker.Mock(
+        url="https://api.gfm.eodc.eu/v2/aoi/1/products",
+        status_code=404,
+        ok=False,
+        elapsed=mocker.Mock(total_seconds=lambda: 0.5),
+        request=mocker.Mock(method="GET", body=None),
+    )
+    global_hook = mocker.Mock()
+    metrics.add_hook(global_hook)
+    try:
+        with recorder.stage("init"):
+            for hook in metrics.http_hooks()["response"]:
+                hook(response)
+    finally:
+        metrics.remove_hook(global_hook)
+    record = recorder.records[0]
+    assert record.name == "GET /v2/aoi/1/products"
+    assert record.duration == 0.5
+    assert record.error == "HTTP 404"
+    global_hook.assert_called_once_with(record)
+
+
+def test_floodmap_metrics():
+    from eo_floods import FloodMap
+
+    floodmap = FloodMap(
+        start_date="2022-10-01",
+        end_date="2022-10-15",
+        geometry=[67.740187, 27.712453, 68.104933, 28.000935],
+        provider="Hydrafloods",
+        datasets="Sentinel-1",
+    )
+    floodmap.available_data()
+    summary = floodmap.metrics()
+    assert summary["available_data"].calls == {"computeValue": 1}
+    assert floodmap.recorder.records[0].call_site.startswith("eo_floods")
@@ -0,0 +1,52 @@
+import ee
+
+from eo_floods.providers.hydrafloods.monitor import (
+    Watermark,
+    WatermarkStore,
+    aggregate_flood_extents,
+    flood_frequency,
+    watermark_key,
+)
+
+
+def test_watermark_store(tmp_path):
+    path = tmp_path / "monitor" / "watermarks.json"
+    store = WatermarkStore(path)
+    key = watermark_key("Sentinel-1", [67.7, 27.7, 68.1, 28.0])
+    assert key != watermark_key("Sentinel-2", [67.7, 27.7, 68.1, 28.0])
+    assert store.get(key) is None
+    watermark = Watermark(time_start=1664928000000, n_scenes=5, aggregates="projects/p/assets/a")
+    store.set(key, watermark)
+    assert WatermarkStore(path).get(key) == watermark
+    store.invalidate(key)
+    assert store.get(key) is None
+    store.set(key, watermark)
+    store.invalidate()
+    assert store.get(key) is None
+
+
+def test_watermark_store_corrupt_file(tmp_path, caplog):
+    path = tmp_path / "watermarks.json"
+    path.write_text("{")
+    store = WatermarkStore(path)
+    assert store.get("key") is None
+    assert "Ignoring corrupt watermark file" in caplog.text
+    store.set("key", Watermark(time_start=1))
+    assert store.get("key").time_start == 1
+
+
+def test_aggregate_flood_extents():
+    point = ee.Geometry.Point(68.0, 27.8)
+
+    def extent(value):
+        return ee.Image.constant(value).uint8().rename("water")
+
+    first = aggregate_flood_extents(ee.ImageCollection([extent(1), extent(0)]))
+    aggregates = aggregate_flood_extents(
+        ee.ImageCollection([extent(0), extent(0).selfMask()]),
+        previous=first,
+    )
+    values = aggregates.reduceRegion(ee.Reducer.first(), point, 30).getInfo()
+    assert values == {"max_extent": 1, "flood_count": 1, "observation_count": 3}
+    frequency = flood_frequency(aggregates).reduceRegion(ee.Reducer.first(), point, 30)
+    assert abs(frequency.get("flood_frequency").getInfo() - 1 / 3) < 1e-6